@@ -80,7 +80,13 @@ def create_app():
     # Initialize Socket.IO for WebRTC voice
     # Use 'eventlet' for production (Gunicorn compatibility)
     # Use 'threading' for local development
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+    # With several workers (SCALE_OUT=true) emits go through a Redis message queue
+    from convonet.scaling import get_socketio_message_queue, SOCKETIO_CHANNEL
+    message_queue = get_socketio_message_queue()
+    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                        message_queue=message_queue, channel=SOCKETIO_CHANNEL)
+    if message_queue:
+        print("✅ Socket.IO message queue enabled (multi-worker)")
 
     # --- Configure Login Manager ---
     # This must be done after initializing the extensions and before registering blueprints that use it.
@@ -173,6 +179,14 @@ def create_app():
     except ImportError as e:
         print(f"⚠️  Call center module not available: {e}")
 
+    # Boot warm-up (agent graph + MCP session, DB pools, caches) and the /readyz probe
+    try:
+        from convonet.warmup import warmup_bp, start_warmup
+        app.register_blueprint(warmup_bp)
+        start_warmup(app)
+    except ImportError as e:
+        print(f"⚠️  Convonet warm-up not available: {e}")
+
     # --- Main Application Routes ---
     @app.route('/', methods=["GET", "POST"])
     def home():
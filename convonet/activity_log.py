@@ -0,0 +1,348 @@
+"""
+Thread Activity Log for Convonet Project
+Per-thread conversation and tool activity recorded as the agent runs, for call-center customer profiles
+
+The agent graph records each user/assistant message and each completed tool call here
+(activities keyed by tool_call_id), so a transfer reads a ready-made profile instead of
+replaying the whole LangGraph thread. Entries live in process memory and are mirrored
+to Redis (`thread_activity:{thread_id}` / `thread_conversation:{thread_id}`) when it is
+available, so another worker can serve the transfer.
+
+Recording never touches the network: Redis commands are queued and written by a
+background flusher in one pipeline (the assistant node runs on the shared agent
+runtime loop). In memory at most ACTIVITY_LOG_MAX_THREADS threads are kept (least
+recently used first out, idle threads dropped after ACTIVITY_TTL_SECONDS). A thread
+log started without its history (first record after an eviction or a restart) is
+marked partial; reading its profile reloads it from Redis, or returns None so the
+caller backfills it from the LangGraph state.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from convonet.redis_manager import redis_manager
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_manager = None
+    REDIS_AVAILABLE = False
+
+ACTIVITY_TTL_SECONDS = 24 * 3600
+MAX_CONVERSATION_ENTRIES = 200
+# Message ids remembered per thread for de-duplication (the assistant node re-sees recent turns)
+MAX_SEEN_MESSAGES = 2 * MAX_CONVERSATION_ENTRIES
+FLUSH_INTERVAL_SECONDS = 0.05
+
+
+def _parse_json_content(tool_content: str) -> dict:
+    if tool_content.startswith('{'):
+        try:
+            data = json.loads(tool_content)
+            return data if isinstance(data, dict) else {}
+        except ValueError:
+            pass
+    return {}
+
+
+def classify_activity(tool_name: str, tool_args: Optional[dict], tool_content: str) -> Optional[dict]:
+    """Turn one completed tool call into a profile activity (None if it is not customer-visible)"""
+    name = (tool_name or '').lower()
+    tool_args = tool_args or {}
+    tool_content = str(tool_content)
+
+    if 'create_calendar_event' in name or 'calendar' in tool_content.lower():
+        event_data = _parse_json_content(tool_content)
+        title = tool_args.get('title') or event_data.get('title', '')
+        if not title and tool_content:
+            # Text responses look like "Calendar event 'title' created..."
+            match = re.search(r"Calendar event '([^']+)'", tool_content)
+            if match:
+                title = match.group(1)
+        return {
+            "type": "calendar_event",
+            "action": "created",
+            "title": title or "Calendar Event",
+            "start": tool_args.get('event_from') or event_data.get('event_from', ''),
+            "end": tool_args.get('event_to') or event_data.get('event_to', ''),
+            "description": tool_args.get('description') or event_data.get('description', ''),
+            "raw": tool_content
+        }
+
+    if 'create_todo' in name or ('todo' in tool_content.lower() and 'create' in name):
+        todo_data = _parse_json_content(tool_content)
+        return {
+            "type": "todo",
+            "action": "created",
+            "title": tool_args.get('title') or todo_data.get('title', '') or "Todo",
+            "priority": tool_args.get('priority') or todo_data.get('priority', ''),
+            "due_date": tool_args.get('due_date') or todo_data.get('due_date', ''),
+            "description": tool_args.get('description') or todo_data.get('description', ''),
+            "raw": tool_content
+        }
+
+    for action, marker in (("completed", 'complete_todo'), ("updated", 'update_todo'), ("deleted", 'delete_todo')):
+        if marker in name:
+            return {"type": "todo", "action": action, "raw": tool_content}
+    return None
+
+
+class _ThreadLog:
+    __slots__ = ("activities", "conversation", "seen_messages", "last_used", "partial")
+
+    def __init__(self, partial: bool = False):
+        self.activities: "OrderedDict[str, dict]" = OrderedDict()
+        self.conversation: List[dict] = []
+        self.seen_messages: "OrderedDict[str, None]" = OrderedDict()
+        self.last_used = time.monotonic()
+        # Started without the thread's earlier history (may be missing entries)
+        self.partial = partial
+
+    def mark_seen(self, message_id: str) -> bool:
+        """Remember a message id; False if it was already recorded"""
+        if message_id in self.seen_messages:
+            return False
+        self.seen_messages[message_id] = None
+        if len(self.seen_messages) > MAX_SEEN_MESSAGES:
+            self.seen_messages.popitem(last=False)
+        return True
+
+
+class ActivityLog:
+    """Conversation and activities per LangGraph thread, maintained incrementally"""
+
+    def __init__(self, max_threads: Optional[int] = None, idle_ttl: Optional[float] = None):
+        self.max_threads = max_threads if max_threads is not None else \
+            int(os.getenv('ACTIVITY_LOG_MAX_THREADS', '1000'))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else ACTIVITY_TTL_SECONDS
+        self._threads: "OrderedDict[str, _ThreadLog]" = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []  # Redis commands waiting for the flusher
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {'evicted': 0, 'flushes': 0, 'commands_written': 0, 'flush_errors': 0}
+
+    @property
+    def redis_available(self) -> bool:
+        return REDIS_AVAILABLE and redis_manager.is_available()
+
+    def _thread(self, thread_id: str) -> _ThreadLog:
+        """Thread log for writing (caller holds the lock)"""
+        log = self._threads.get(thread_id)
+        if log is None:
+            log = self._threads[thread_id] = _ThreadLog(partial=True)
+            self._evict()
+        self._touch(thread_id, log)
+        return log
+
+    def _touch(self, thread_id: str, log: _ThreadLog):
+        log.last_used = time.monotonic()
+        self._threads.move_to_end(thread_id)
+
+    def _evict(self):
+        """Drop least recently used threads over max_threads, and idle ones past the TTL"""
+        idle_before = time.monotonic() - self.idle_ttl
+        while self._threads:
+            thread_id, log = next(iter(self._threads.items()))
+            if len(self._threads) <= self.max_threads and log.last_used >= idle_before:
+                break
+            del self._threads[thread_id]
+            self.stats['evicted'] += 1
+
+    # Redis write-behind
+
+    def _enqueue(self, *commands: tuple):
+        if not self.redis_available:
+            return
+        with self._lock:
+            self._pending.extend(commands)
+        self._ensure_flusher()
+        self._wake.set()
+
+    def flush(self) -> int:
+        """Write queued Redis commands now in one pipeline; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                commands, self._pending = self._pending, []
+            if not commands or not self.redis_available:
+                return 0
+            try:
+                pipe = redis_manager.redis_client.pipeline(transaction=False)
+                for method, *args in commands:
+                    getattr(pipe, method)(*args)
+                pipe.execute()
+            except Exception as e:
+                self.stats['flush_errors'] += 1
+                print(f"⚠️ Activity log: failed to mirror {len(commands)} commands to Redis: {e}")
+                return 0
+            self.stats['flushes'] += 1
+            self.stats['commands_written'] += len(commands)
+            return len(commands)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="activity-log-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait()
+            time.sleep(FLUSH_INTERVAL_SECONDS)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Activity log flusher error: {e}")
+
+    def record_message(self, thread_id: str, entry: dict, message_id: Optional[str] = None):
+        """Append a conversation entry ({'type': 'user'|'assistant', 'content': ...}) once per message id"""
+        if not thread_id:
+            return
+        with self._lock:
+            log = self._thread(thread_id)
+            if message_id and not log.mark_seen(message_id):
+                return
+            log.conversation.append(entry)
+            del log.conversation[:-MAX_CONVERSATION_ENTRIES]
+        key = f"thread_conversation:{thread_id}"
+        self._enqueue(("rpush", key, json.dumps(entry)),
+                      ("ltrim", key, -MAX_CONVERSATION_ENTRIES, -1),
+                      ("expire", key, ACTIVITY_TTL_SECONDS))
+
+    def record_tool_result(self, thread_id: str, tool_call_id: str, tool_name: str,
+                           tool_args: Optional[dict], tool_content: Any) -> Optional[dict]:
+        """Classify a completed tool call and store it under its tool_call_id"""
+        if not thread_id:
+            return None
+        activity = classify_activity(tool_name, tool_args, str(tool_content))
+        if activity is None:
+            return None
+        with self._lock:
+            self._thread(thread_id).activities[tool_call_id] = activity
+        key = f"thread_activity:{thread_id}"
+        self._enqueue(("hset", key, tool_call_id, json.dumps(activity)),
+                      ("expire", key, ACTIVITY_TTL_SECONDS))
+        return activity
+
+    def _load_from_redis(self, thread_id: str) -> Optional[_ThreadLog]:
+        """Thread log as mirrored to Redis (None if Redis is unavailable or has nothing)"""
+        if not self.redis_available:
+            return None
+        self.flush()  # read our own queued writes
+        try:
+            client = redis_manager.redis_client
+            activities = client.hgetall(f"thread_activity:{thread_id}")
+            conversation = client.lrange(f"thread_conversation:{thread_id}", 0, -1)
+        except Exception as e:
+            print(f"⚠️ Activity log: Redis read failed for {thread_id}: {e}")
+            return None
+        if not activities and not conversation:
+            return None
+        log = _ThreadLog()
+        for tool_call_id, activity in activities.items():
+            log.activities[tool_call_id] = json.loads(activity)
+        log.conversation = [json.loads(entry) for entry in conversation]
+        return log
+
+    def get_profile_data(self, thread_id: str, allow_partial: bool = False) -> Optional[dict]:
+        """Conversation history and activities for a thread
+
+        Returns None when nothing was recorded, or when only a partial log is held and
+        Redis cannot complete it (the caller then backfills from the LangGraph state;
+        allow_partial=True returns the partial log anyway).
+        """
+        with self._lock:
+            self._evict()
+            log = self._threads.get(thread_id)
+        if log is None or log.partial:
+            loaded = self._load_from_redis(thread_id)
+            if loaded is not None:
+                with self._lock:
+                    current = self._threads.get(thread_id)
+                    if current is None or current.partial:
+                        # Redis holds everything mirrored so far, including this log's entries
+                        if current is not None:
+                            loaded.seen_messages = current.seen_messages
+                        self._threads[thread_id] = current = loaded
+                        self._touch(thread_id, loaded)
+                        self._evict()
+                    log = current
+        if log is None or (log.partial and not allow_partial):
+            return None
+        with self._lock:
+            if self._threads.get(thread_id) is log:
+                self._touch(thread_id, log)
+            return {
+                "conversation_history": list(log.conversation),
+                "activities": list(log.activities.values())
+            }
+
+    def backfill_from_messages(self, thread_id: str, messages: Iterable[Any], complete: bool = True):
+        """Rebuild a thread's log from LangGraph messages in a single pass
+
+        Used when a thread predates the log (e.g. after a restart or an eviction without
+        Redis). With complete=True the messages are the thread's whole history, so a
+        partial log (and its Redis mirror) is replaced rather than appended to; pass
+        complete=False to record just a slice of new messages.
+        """
+        from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
+        if complete:
+            with self._lock:
+                log = self._threads.get(thread_id)
+                reset = log is None or log.partial
+                if reset:
+                    self._threads[thread_id] = _ThreadLog()
+                    self._touch(thread_id, self._threads[thread_id])
+                    self._evict()
+            if reset:
+                self._enqueue(("delete", f"thread_activity:{thread_id}", f"thread_conversation:{thread_id}"))
+
+        tool_calls = {}
+        for msg in messages:
+            if isinstance(msg, HumanMessage):
+                self.record_message(thread_id, {"type": "user", "content": str(msg.content), "timestamp": None}, msg.id)
+            elif isinstance(msg, AIMessage):
+                for tc in msg.tool_calls or []:
+                    tool_calls[tc.get('id')] = tc
+                self.record_message(thread_id, assistant_entry(msg), msg.id)
+            elif isinstance(msg, ToolMessage):
+                tc = tool_calls.get(msg.tool_call_id, {})
+                self.record_tool_result(thread_id, msg.tool_call_id, tc.get('name') or getattr(msg, 'name', '') or '',
+                                        tc.get('args', {}), msg.content)
+
+    def clear(self, thread_id: str):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+        self._enqueue(("delete", f"thread_activity:{thread_id}", f"thread_conversation:{thread_id}"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'threads': len(self._threads), 'max_threads': self.max_threads,
+                    'pending_commands': len(self._pending)}
+
+
+def assistant_entry(msg) -> dict:
+    """Conversation entry for an AIMessage (tool calls listed by name and args)"""
+    tool_calls_info = [{"name": tc.get('name', ''), "args": tc.get('args', {})} for tc in (msg.tool_calls or [])]
+    return {
+        "type": "assistant",
+        "content": str(msg.content),
+        "timestamp": None,
+        "tool_calls": tool_calls_info or None
+    }
+
+
+# Global activity log
+activity_log = ActivityLog()
+atexit.register(activity_log.flush)
+
+
+def get_activity_log() -> ActivityLog:
+    return activity_log
@@ -0,0 +1,205 @@
+"""
+Agent Runtime for Convonet Project
+Long-lived asyncio event loop thread that owns the agent graph, MCP client and async HTTP clients
+
+Flask routes and Socket.IO handlers are synchronous, so they previously ran each
+agent turn with asyncio.run(), creating and tearing down an event loop per request.
+The runtime keeps a single loop alive instead:
+
+    from convonet.agent_runtime import get_agent_runtime
+    result = get_agent_runtime().run(_run_agent_async(prompt), timeout=12.0)
+
+Everything async that belongs to the agent (graph, MCP sessions, httpx pools) lives
+on that loop, so connections are reused across turns.
+
+Under eventlet the loop "thread" is a greenlet, so while it runs every other greenlet
+sees it as the running loop and asyncio.run() raises. Request handlers (including the
+lgch_todo blueprint) must go through run_agent_coroutine() instead.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from typing import Any, Coroutine, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+from convonet.http_clients import get_http_clients, is_http2_enabled
+
+
+class AgentRuntime:
+    """Dedicated asyncio loop thread for agent work"""
+
+    def __init__(self, name: str = "agent-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._http_client = None
+        self.turns_submitted = 0
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        self.start()
+        return self._loop
+
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self) -> "AgentRuntime":
+        """Start the loop thread (idempotent)"""
+        if self.is_running():
+            return self
+        with self._lock:
+            if self.is_running():
+                return self
+            self._started.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+            self._thread.start()
+            self._started.wait(timeout=5.0)
+            logger.info(f"✅ Agent runtime loop started ({self.name})")
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            try:
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            finally:
+                self._loop.close()
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the runtime loop and return a concurrent Future"""
+        self.start()
+        self.turns_submitted += 1
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None,
+            cancel_event: Optional[threading.Event] = None) -> Any:
+        """Run a coroutine on the runtime loop and block until it finishes
+
+        On timeout the coroutine is cancelled and TimeoutError (== asyncio.TimeoutError)
+        is raised, matching the asyncio.run(asyncio.wait_for(...)) calls it replaces.
+        If cancel_event is set while waiting (e.g. caller barge-in), the coroutine is
+        cancelled and concurrent.futures.CancelledError is raised.
+        """
+        future = self.submit(coro)
+        if cancel_event is None:
+            try:
+                return future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            if cancel_event.is_set():
+                future.cancel()
+                raise concurrent.futures.CancelledError()
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                future.cancel()
+                raise concurrent.futures.TimeoutError()
+            try:
+                return future.result(timeout=wait)
+            except concurrent.futures.TimeoutError:
+                if future.done():
+                    raise  # the coroutine itself timed out
+
+    def get_http_client(self) -> Optional["httpx.AsyncClient"]:
+        """Shared async HTTP client; only use it from coroutines running on this loop"""
+        if not HTTPX_AVAILABLE:
+            return None
+        if self._http_client is None:
+            limits = httpx.Limits(
+                max_connections=int(os.getenv('AGENT_HTTP_MAX_CONNECTIONS', '20')),
+                max_keepalive_connections=int(os.getenv('AGENT_HTTP_MAX_KEEPALIVE', '10')),
+                keepalive_expiry=60.0
+            )
+            self._http_client = httpx.AsyncClient(
+                limits=limits, timeout=httpx.Timeout(30.0, connect=5.0), http2=is_http2_enabled()
+            )
+        return self._http_client
+
+    def get_agent_graph(self, timeout: Optional[float] = None):
+        """Get (building on first use) the compiled agent graph owned by this loop"""
+        from convonet.routes import _get_agent_graph
+        return self.run(_get_agent_graph(), timeout=timeout)
+
+    def get_agent_state(self, thread_id: str, timeout: Optional[float] = None):
+        """Current LangGraph state of a thread
+
+        Uses aget_state() on the runtime loop: the scale-out checkpointer
+        (AsyncPostgresSaver) does not support the synchronous get_state().
+        """
+        from convonet.routes import _get_agent_graph
+
+        async def _get_state():
+            agent_graph = await _get_agent_graph()
+            return await agent_graph.aget_state({"configurable": {"thread_id": thread_id}})
+
+        return self.run(_get_state(), timeout=timeout)
+
+    async def _aclose_resources(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        # Provider pools created on this loop with get_async_client()
+        await get_http_clients().aclose()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Close async clients and stop the loop thread"""
+        if not self.is_running():
+            return
+        try:
+            self.run(self._aclose_resources(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ Agent runtime resource cleanup failed: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout)
+
+    def get_stats(self) -> dict:
+        return {
+            "running": self.is_running(),
+            "thread": self._thread.name if self._thread else None,
+            "turns_submitted": self.turns_submitted,
+            "pending_tasks": len(asyncio.all_tasks(self._loop)) if self.is_running() else 0,
+            "http_client": self._http_client is not None
+        }
+
+
+# Global runtime instance
+_agent_runtime = None
+_agent_runtime_lock = threading.Lock()
+
+
+def get_agent_runtime() -> AgentRuntime:
+    """Get or create the process-wide agent runtime"""
+    global _agent_runtime
+    if _agent_runtime is None:
+        with _agent_runtime_lock:
+            if _agent_runtime is None:
+                _agent_runtime = AgentRuntime()
+                atexit.register(_agent_runtime.shutdown)
+    return _agent_runtime
+
+
+def run_agent_coroutine(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Convenience wrapper: run a coroutine on the shared agent runtime"""
+    return get_agent_runtime().run(coro, timeout=timeout)
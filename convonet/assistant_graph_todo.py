@@ -1,8 +1,10 @@
 import asyncio
 import logging
 import os
+import time
 from langchain_core.tools import BaseTool
 from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph import StateGraph
@@ -12,6 +14,9 @@ from typing import List
 from dotenv import load_dotenv
 
 from .state import AgentState
+from .metrics import observe_stage
+from .activity_log import get_activity_log, assistant_entry
+from .speculation import SpeculationBlocked, is_read_only_tool
 from .mcps.local_servers.db_todo import TodoPriority, ReminderImportance
 # Optional Composio imports - app should work without them
 try:
@@ -250,6 +255,8 @@ class TodoAgent:
             Remember: ACT FIRST, ASK LATER. Use tools immediately when you understand the user's intent.
             When dealing with teams, ALWAYS verify team/user existence before operations.
             """,
+            http_async_client=None,
+            checkpointer=None,
             ) -> None:
         self.name = name
         self.system_prompt = system_prompt
@@ -261,14 +268,22 @@ class TodoAgent:
             model=model,
             api_key=os.getenv("OPENAI_API_KEY"),
             temperature=0.0,  # Lower temperature for more consistent tool calling
+            http_async_client=http_async_client,  # Shared pool when run on the agent runtime loop
         ).bind_tools(tools=self.tools)
+        self.activity_log = get_activity_log()
+        # Shared (e.g. Postgres) checkpointer when scaled out; per-process memory otherwise
+        self.checkpointer = checkpointer if checkpointer is not None else InMemorySaver()
         self.graph = self.build_graph()
 
     def build_graph(self,) -> CompiledStateGraph:
         builder = StateGraph(AgentState)
 
-        async def assistant(state: AgentState):
-            """The main assistant node that uses the LLM to generate responses."""
+        async def assistant(state: AgentState, config: RunnableConfig):
+            """The main assistant node that uses the LLM to generate responses.
+
+            The run config is forwarded to the LLM call so stream_mode="messages"
+            callers receive token deltas while the completion is generated.
+            """
             # inject todo priorities and reminder importance into the system prompt
             system_prompt = self.system_prompt.format(
                 todo_priorities=", ".join([p.value for p in TodoPriority]),
@@ -276,17 +291,43 @@ class TodoAgent:
                 )
 
             print(f"🤖 Assistant processing: {state.messages[-1].content if state.messages else 'No messages'}")
-            response = await self.llm.ainvoke([SystemMessage(content=system_prompt)] + state.messages)
+            response = await self.llm.ainvoke([SystemMessage(content=system_prompt)] + state.messages, config=config)
             print(f"🤖 Assistant response: {response.content}")
             print(f"🤖 Tool calls: {response.tool_calls if hasattr(response, 'tool_calls') else 'None'}")
             print(f"🤖 Available tools: {len(self.tools)}")
             print(f"🤖 Tool names: {[tool.name for tool in self.tools[:5]]}...")  # Show first 5 tools
             
+            # Keep the thread's activity log current so call-center transfers never replay the thread
+            # (speculative forks are recorded when they are committed)
+            configurable = (config or {}).get("configurable", {})
+            thread_id = None if configurable.get("speculative") else configurable.get("thread_id")
+            if thread_id:
+                from langchain_core.messages import HumanMessage
+                pending_user = []
+                for msg in reversed(state.messages):
+                    if not isinstance(msg, HumanMessage):
+                        break
+                    pending_user.append(msg)
+                for msg in reversed(pending_user):
+                    self.activity_log.record_message(thread_id, {"type": "user", "content": str(msg.content), "timestamp": None}, msg.id)
+                self.activity_log.record_message(thread_id, assistant_entry(response), response.id)
+
             state.messages.append(response)
             return state
 
-        async def tools_node(state: AgentState):
-            """Execute async MCP tools and return results."""
+        async def tools_node(state: AgentState, config: RunnableConfig):
+            """Execute async MCP tools and return results.
+
+            In a speculative run (config "speculative"), only read-only tools execute;
+            anything else raises SpeculationBlocked before any tool runs.
+            """
+            configurable = (config or {}).get("configurable", {})
+            if configurable.get("speculative"):
+                last_message = state.messages[-1] if state.messages else None
+                mutating = [tc['name'] for tc in getattr(last_message, 'tool_calls', None) or [] if not is_read_only_tool(tc['name'])]
+                if mutating:
+                    raise SpeculationBlocked(mutating)
+            thread_id = None if configurable.get("speculative") else configurable.get("thread_id")
             try:
                 print(f"🔧 Tools node executing with {len(self.tools)} tools available")
                 
@@ -315,6 +356,7 @@ class TodoAgent:
                         if tool:
                             # Execute the async tool with timeout
                             # Reduced timeout to stay under Twilio's 15-second HTTP limit
+                            tool_started = time.perf_counter()
                             try:
                                 if hasattr(tool, 'ainvoke'):
                                     result = await asyncio.wait_for(tool.ainvoke(tool_args), timeout=8.0)
@@ -359,6 +401,8 @@ class TodoAgent:
                                     result = "I encountered an unexpected error. Please try again or rephrase your request."
                                 else:
                                     result = f"I encountered an error: {error_str[:100]}"
+                            observe_stage(f"tool:{tool_name}", (time.perf_counter() - tool_started) * 1000)
+                            self.activity_log.record_tool_result(thread_id, tool_id, tool_name, tool_args, result)
                             
                             from langchain_core.messages import ToolMessage
                             tool_message = ToolMessage(
@@ -429,7 +473,7 @@ class TodoAgent:
         )
         builder.add_edge("tools", "assistant")
 
-        return builder.compile(checkpointer=InMemorySaver())
+        return builder.compile(checkpointer=self.checkpointer)
 
     def draw_graph(self,):
         if self.graph is None:
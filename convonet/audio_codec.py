@@ -0,0 +1,481 @@
+"""
+In-Memory Audio Codec for Convonet Project
+EBML/WebM demuxing, Ogg Opus repackaging and WAV writing on bytes/memoryview buffers
+
+MediaRecorder uploads are WebM (Matroska) files carrying Opus packets. Every consumer
+used to round-trip them (and raw PCM turned into WAV) through NamedTemporaryFile just
+to read the bytes back; everything here works on in-memory buffers with no disk I/O:
+
+    from convonet.audio_codec import demux_webm, webm_to_ogg_opus, pcm_to_wav
+    audio = demux_webm(blob)            # codec, sample rate, channels, Opus frames
+    ogg = webm_to_ogg_opus(blob)        # same packets in an Ogg Opus stream
+    wav = pcm_to_wav(pcm, 16000)        # RIFF/WAVE bytes
+
+Raw sample streams carry no header, so the client declares them at start_recording
+({'codec': 'pcm16', 'sample_rate': 16000, 'channels': 1, 'sample_width': 2}); the
+AudioFormat is stored on the session and encode_audio() writes exactly one payload:
+
+    fmt = AudioFormat.from_client(data)                # or AudioFormat.parse(session.audio_format)
+    payload, mimetype = encode_audio(blob, fmt)        # WAV for raw samples, WebM/Ogg as-is
+    payload, mimetype = encode_audio(blob, fmt, "ogg") # WebM/Opus repackaged as Ogg
+
+Opus is repackaged, not decoded (decoding would need libopus); Deepgram and browsers
+accept WebM and Ogg Opus directly.
+"""
+
+import io
+import struct
+import wave
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+OGG_MAGIC = b"OggS"
+RIFF_MAGIC = b"RIFF"
+
+# Matroska element IDs (with their length marker bits, as they appear on the wire)
+ID_SEGMENT = 0x18538067
+ID_CLUSTER = 0x1F43B675
+ID_TRACKS = 0x1654AE6B
+ID_TRACK_ENTRY = 0xAE
+ID_TRACK_NUMBER = 0xD7
+ID_CODEC_ID = 0x86
+ID_CODEC_PRIVATE = 0x63A2
+ID_AUDIO = 0xE1
+ID_SAMPLING_FREQUENCY = 0xB5
+ID_CHANNELS = 0x9F
+ID_TIMECODE_SCALE = 0x2AD7B1
+ID_INFO = 0x1549A966
+ID_CLUSTER_TIMECODE = 0xE7
+ID_SIMPLE_BLOCK = 0xA3
+ID_BLOCK_GROUP = 0xA0
+ID_BLOCK = 0xA1
+
+# Containers the demuxer descends into; everything else is skipped by size
+MASTER_IDS = {ID_SEGMENT, ID_CLUSTER, ID_TRACKS, ID_TRACK_ENTRY, ID_AUDIO, ID_INFO, ID_BLOCK_GROUP}
+
+OPUS_SAMPLE_RATE = 48000  # Opus granule positions are always in 48kHz samples
+
+# Declared codecs: raw samples (need a declared format) and Opus (self-describing container)
+CODEC_PCM16 = "pcm16"
+CODEC_PCM8 = "pcm8"  # unsigned, as WAV stores 8-bit PCM
+CODEC_MULAW = "mulaw"
+CODEC_OPUS = "opus"
+# codec -> (bytes per sample, WAVE format tag)
+RAW_CODECS = {CODEC_PCM16: (2, 1), CODEC_PCM8: (1, 1), CODEC_MULAW: (1, 7)}
+SUPPORTED_CODECS = (*RAW_CODECS, CODEC_OPUS)
+
+CONTAINER_MIMETYPES = {"webm": "audio/webm", "ogg": "audio/ogg", "wav": "audio/wav"}
+
+
+class AudioCodecError(ValueError):
+    """Raised for buffers that are not the expected container"""
+
+
+def detect_container(data: Buffer) -> str:
+    """'webm', 'ogg', 'wav' or 'raw' from the buffer's magic bytes"""
+    head = bytes(data[:12])
+    if head.startswith(EBML_MAGIC):
+        return "webm"
+    if head.startswith(OGG_MAGIC):
+        return "ogg"
+    if head.startswith(RIFF_MAGIC) and head[8:12] == b"WAVE":
+        return "wav"
+    return "raw"
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """Audio format negotiated with the client at start_recording"""
+    codec: str = CODEC_PCM16
+    sample_rate: int = 16000
+    channels: int = 1
+    sample_width: int = 2  # bytes per sample (0 for Opus)
+
+    @property
+    def is_raw(self) -> bool:
+        return self.codec in RAW_CODECS
+
+    @classmethod
+    def from_client(cls, data: Optional[dict]) -> Optional["AudioFormat"]:
+        """Validate a client declaration ('codec' or legacy 'encoding'); None if nothing was declared"""
+        data = data if isinstance(data, dict) else {}
+        codec = data.get("codec") or data.get("encoding")
+        if not codec:
+            return None
+        if codec not in SUPPORTED_CODECS:
+            raise AudioCodecError(f"unsupported codec '{codec}' (expected one of {', '.join(SUPPORTED_CODECS)})")
+        try:
+            sample_rate = int(data.get("sample_rate") or (OPUS_SAMPLE_RATE if codec == CODEC_OPUS else 16000))
+            channels = int(data.get("channels") or 1)
+        except (TypeError, ValueError):
+            raise AudioCodecError("sample_rate and channels must be integers")
+        sample_width = RAW_CODECS[codec][0] if codec in RAW_CODECS else 0
+        if not 8000 <= sample_rate <= 192000 or not 1 <= channels <= 8:
+            raise AudioCodecError(f"unsupported sample rate/channels: {sample_rate}Hz x {channels}")
+        if data.get("sample_width") not in (None, "", sample_width):
+            raise AudioCodecError(f"{codec} has {sample_width}-byte samples, not {data.get('sample_width')}")
+        return cls(codec, sample_rate, channels, sample_width)
+
+    def to_session_value(self) -> str:
+        """Compact form stored in the session hash, e.g. 'pcm16/16000/1/2'"""
+        return f"{self.codec}/{self.sample_rate}/{self.channels}/{self.sample_width}"
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional["AudioFormat"]:
+        """Inverse of to_session_value(); None for empty or malformed values"""
+        try:
+            codec, sample_rate, channels, sample_width = (value or "").split("/")
+            return cls(codec, int(sample_rate), int(channels), int(sample_width))
+        except ValueError:
+            return None
+
+    def info(self) -> dict:
+        return {"codec": self.codec, "sample_rate": self.sample_rate, "channels": self.channels,
+                "sample_width": self.sample_width}
+
+
+# Browser capture rate, used for headerless samples from clients that declared nothing
+DEFAULT_RAW_FORMAT = AudioFormat(CODEC_PCM16, 48000, 1, 2)
+
+
+def is_webm(data: Buffer) -> bool:
+    return bytes(data[:4]) == EBML_MAGIC
+
+
+def _read_vint(data: memoryview, pos: int, keep_marker: bool) -> Tuple[int, int, bool]:
+    """EBML variable-length integer at pos -> (value, new_pos, all_ones)"""
+    if pos >= len(data):
+        raise AudioCodecError("truncated EBML varint")
+    first = data[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(data):
+        raise AudioCodecError("invalid EBML varint")
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == mask - 1
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return value, pos + length, all_ones
+
+
+def _read_uint(payload: memoryview) -> int:
+    return int.from_bytes(payload, "big") if len(payload) else 0
+
+
+def _read_float(payload: memoryview) -> float:
+    if len(payload) == 4:
+        return struct.unpack(">f", payload)[0]
+    if len(payload) == 8:
+        return struct.unpack(">d", payload)[0]
+    return 0.0
+
+
+@dataclass
+class AudioTrack:
+    number: int = 0
+    codec_id: str = ""
+    codec_private: bytes = b""
+    sample_rate: float = 0.0
+    channels: int = 1
+
+
+@dataclass
+class WebmAudio:
+    """Demuxed audio track of a WebM buffer; frames are views into the original buffer"""
+    track: AudioTrack
+    frames: List[memoryview] = field(default_factory=list)
+    timecodes_ms: List[float] = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def codec(self) -> str:
+        return self.track.codec_id
+
+    @property
+    def duration_ms(self) -> float:
+        if not self.frames:
+            return 0.0
+        if self.codec == "A_OPUS":
+            return self.timecodes_ms[-1] - self.timecodes_ms[0] + opus_packet_samples(self.frames[-1]) / 48.0
+        return self.timecodes_ms[-1] - self.timecodes_ms[0]
+
+    def info(self) -> dict:
+        return {
+            "codec": self.codec,
+            "sample_rate": self.track.sample_rate,
+            "channels": self.track.channels,
+            "frames": len(self.frames),
+            "duration_ms": round(self.duration_ms, 1),
+            "payload_bytes": sum(len(frame) for frame in self.frames),
+            "truncated": self.truncated
+        }
+
+
+def _split_laced(payload: memoryview, lacing: int) -> List[memoryview]:
+    """Frames of a (Simple)Block payload after the header; lacing = flags bits 1-2"""
+    if lacing == 0:
+        return [payload]
+    count = payload[0] + 1
+    pos = 1
+    sizes: List[int] = []
+    if lacing == 1:  # Xiph
+        for _ in range(count - 1):
+            size = 0
+            while True:
+                byte = payload[pos]
+                pos += 1
+                size += byte
+                if byte != 0xFF:
+                    break
+            sizes.append(size)
+    elif lacing == 3:  # EBML: first size, then signed differences
+        size, pos, _ = _read_vint(payload, pos, keep_marker=False)
+        sizes.append(size)
+        for _ in range(count - 2):
+            start = pos
+            raw, pos, _ = _read_vint(payload, pos, keep_marker=False)
+            length = pos - start
+            size += raw - ((1 << (7 * length - 1)) - 1)
+            sizes.append(size)
+    else:  # fixed-size
+        each = (len(payload) - pos) // count
+        sizes = [each] * (count - 1)
+    frames = []
+    for size in sizes:
+        frames.append(payload[pos:pos + size])
+        pos += size
+    frames.append(payload[pos:])
+    return frames
+
+
+def demux_webm(data: Buffer) -> WebmAudio:
+    """Extract the first audio track's frames from a WebM/Matroska buffer (no copies)
+
+    Handles unknown-size Segments/Clusters (as written by MediaRecorder) and buffers cut
+    off mid-element (WebmAudio.truncated is set and the complete frames are returned).
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) != EBML_MAGIC:
+        raise AudioCodecError("not an EBML/WebM buffer")
+
+    tracks: List[AudioTrack] = []
+    current: Optional[AudioTrack] = None
+    blocks: List[Tuple[int, float, memoryview, int]] = []  # (track, timecode_ms, payload, lacing)
+    timecode_scale = 1_000_000  # ns per tick
+    cluster_timecode = 0
+    truncated = False
+
+    pos = 0
+    end = len(view)
+    try:
+        while pos < end:
+            element_id, pos, _ = _read_vint(view, pos, keep_marker=True)
+            size, pos, unknown_size = _read_vint(view, pos, keep_marker=False)
+
+            if element_id in MASTER_IDS:
+                if element_id == ID_TRACK_ENTRY:
+                    current = AudioTrack()
+                    tracks.append(current)
+                continue  # descend: children follow immediately
+            if unknown_size:
+                raise AudioCodecError(f"unknown-size leaf element 0x{element_id:X}")
+            if pos + size > end:
+                truncated = True
+                break
+            payload = view[pos:pos + size]
+            pos += size
+
+            if element_id in (ID_SIMPLE_BLOCK, ID_BLOCK):
+                track_number, header_end, _ = _read_vint(payload, 0, keep_marker=False)
+                relative = struct.unpack(">h", payload[header_end:header_end + 2])[0]
+                flags = payload[header_end + 2]
+                tick_ms = timecode_scale / 1_000_000
+                blocks.append((track_number, (cluster_timecode + relative) * tick_ms, payload[header_end + 3:], (flags >> 1) & 0x03))
+            elif element_id == ID_CLUSTER_TIMECODE:
+                cluster_timecode = _read_uint(payload)
+            elif element_id == ID_TIMECODE_SCALE:
+                timecode_scale = _read_uint(payload) or timecode_scale
+            elif current is not None:
+                if element_id == ID_TRACK_NUMBER:
+                    current.number = _read_uint(payload)
+                elif element_id == ID_CODEC_ID:
+                    current.codec_id = bytes(payload).decode("ascii", "replace").rstrip("\x00")
+                elif element_id == ID_CODEC_PRIVATE:
+                    current.codec_private = bytes(payload)
+                elif element_id == ID_SAMPLING_FREQUENCY:
+                    current.sample_rate = _read_float(payload)
+                elif element_id == ID_CHANNELS:
+                    current.channels = _read_uint(payload) or 1
+    except (AudioCodecError, IndexError, struct.error):
+        if not blocks and not tracks:
+            raise
+        truncated = True
+
+    audio_tracks = [t for t in tracks if t.codec_id.startswith("A_")]
+    if not audio_tracks:
+        raise AudioCodecError("no audio track in WebM buffer")
+    track = audio_tracks[0]
+
+    audio = WebmAudio(track=track, truncated=truncated)
+    for track_number, timecode_ms, payload, lacing in blocks:
+        if track_number != track.number:
+            continue
+        for frame in _split_laced(payload, lacing):
+            audio.frames.append(frame)
+            audio.timecodes_ms.append(timecode_ms)
+    return audio
+
+
+# Samples per Opus frame (48kHz) by TOC config number (RFC 6716 section 3.1)
+_OPUS_FRAME_SAMPLES = [480, 960, 1920, 2880] * 3 + [480, 960] * 2 + [120, 240, 480, 960] * 4
+
+
+def opus_packet_samples(packet: Buffer) -> int:
+    """Number of 48kHz samples in one Opus packet, from its TOC byte"""
+    if not len(packet):
+        return 0
+    toc = packet[0]
+    per_frame = _OPUS_FRAME_SAMPLES[toc >> 3]
+    code = toc & 0x03
+    if code == 0:
+        frames = 1
+    elif code in (1, 2):
+        frames = 2
+    else:
+        frames = (packet[1] & 0x3F) if len(packet) > 1 else 0
+    return per_frame * frames
+
+
+def _opus_head(track: AudioTrack) -> bytes:
+    if track.codec_private.startswith(b"OpusHead"):
+        return track.codec_private
+    # Version 1, channels, pre-skip 312 (libopus default), input rate, gain 0, mapping family 0
+    return b"OpusHead" + struct.pack("<BBHIhB", 1, track.channels, 312, int(track.sample_rate or OPUS_SAMPLE_RATE), 0, 0)
+
+
+def _ogg_crc_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else crc << 1
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+_OGG_CRC_TABLE = _ogg_crc_table()
+
+
+def _ogg_crc(data: Buffer) -> int:
+    crc = 0
+    for byte in bytes(data):
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _OGG_CRC_TABLE[(crc >> 24) ^ byte]
+    return crc
+
+
+class OggWriter:
+    """Writes one logical Ogg stream, one packet per page, into an in-memory buffer"""
+
+    def __init__(self, serial: int = 0x436F6E76):
+        self.buffer = io.BytesIO()
+        self.serial = serial
+        self.sequence = 0
+
+    def write_packet(self, packet: Buffer, granule: int, first: bool = False, last: bool = False):
+        packet = memoryview(packet)
+        lacing = bytearray([255] * (len(packet) // 255))
+        lacing.append(len(packet) % 255)
+        if len(lacing) > 255:
+            raise AudioCodecError("Ogg packet too large for a single page")
+        header_type = (0x02 if first else 0) | (0x04 if last else 0)
+        header = struct.pack("<4sBBqIIIB", OGG_MAGIC, 0, header_type, granule, self.serial, self.sequence, 0, len(lacing))
+        page = bytearray(header) + lacing + packet
+        struct.pack_into("<I", page, 22, _ogg_crc(page))
+        self.buffer.write(page)
+        self.sequence += 1
+
+    def getvalue(self) -> bytes:
+        return self.buffer.getvalue()
+
+
+def webm_to_ogg_opus(data: Union[Buffer, WebmAudio]) -> bytes:
+    """Repackage a WebM/Opus recording as an Ogg Opus stream, entirely in memory"""
+    audio = data if isinstance(data, WebmAudio) else demux_webm(data)
+    if audio.codec != "A_OPUS":
+        raise AudioCodecError(f"cannot repackage {audio.codec or 'unknown codec'} as Ogg Opus")
+
+    writer = OggWriter()
+    writer.write_packet(_opus_head(audio.track), 0, first=True)
+    vendor = b"convonet"
+    writer.write_packet(b"OpusTags" + struct.pack("<I", len(vendor)) + vendor + struct.pack("<I", 0), 0,
+                        last=not audio.frames)
+    granule = 0
+    for index, frame in enumerate(audio.frames):
+        granule += opus_packet_samples(frame)
+        writer.write_packet(frame, granule, last=index == len(audio.frames) - 1)
+    return writer.getvalue()
+
+
+def _wav_header(data_bytes: int, format_tag: int, sample_rate: int, channels: int, sample_width: int) -> bytes:
+    block_align = channels * sample_width
+    return (RIFF_MAGIC + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, format_tag, channels, sample_rate,
+                                    sample_rate * block_align, block_align, sample_width * 8)
+            + b"data" + struct.pack("<I", data_bytes))
+
+
+def pcm_to_wav(pcm: Buffer, sample_rate: int = 16000, channels: int = 1, sample_width: int = 2,
+               format_tag: int = 1) -> bytes:
+    """Wrap raw little-endian samples in a RIFF/WAVE header in memory (format_tag 7 = mu-law)"""
+    frame_bytes = channels * sample_width
+    data_bytes = len(pcm) - len(pcm) % frame_bytes  # drop a trailing partial frame
+    return _wav_header(data_bytes, format_tag, sample_rate, channels, sample_width) + bytes(pcm[:data_bytes])
+
+
+def encode_audio(data: Buffer, audio_format: Optional[AudioFormat] = None,
+                 container: Optional[str] = None) -> Tuple[bytes, str]:
+    """One playable/uploadable payload for a recording -> (bytes, mimetype)
+
+    Self-describing uploads (WebM, Ogg, WAV) pass through unchanged, except WebM/Opus
+    repackaged as Ogg when container='ogg'. Headerless samples are wrapped in a WAV
+    header built from the declared format (DEFAULT_RAW_FORMAT if none was declared).
+    """
+    detected = detect_container(data)
+    if detected == "webm" and container == "ogg":
+        return webm_to_ogg_opus(data), CONTAINER_MIMETYPES["ogg"]
+    if detected != "raw":
+        return bytes(data), CONTAINER_MIMETYPES[detected]
+
+    audio_format = audio_format or DEFAULT_RAW_FORMAT
+    if not audio_format.is_raw:
+        raise AudioCodecError(f"declared {audio_format.codec} but the buffer has no recognizable container")
+    sample_width, format_tag = RAW_CODECS[audio_format.codec]
+    wav = pcm_to_wav(data, audio_format.sample_rate, audio_format.channels, sample_width, format_tag)
+    return wav, CONTAINER_MIMETYPES["wav"]
+
+
+def describe_audio(data: Buffer) -> dict:
+    """Container and stream details for analysis endpoints (never raises)"""
+    container = detect_container(data)
+    info = {"container": container, "bytes": len(data)}
+    try:
+        if container == "webm":
+            info.update(demux_webm(data).info())
+        elif container == "wav":
+            with wave.open(io.BytesIO(bytes(data)), "rb") as wav_file:
+                info.update({
+                    "sample_rate": wav_file.getframerate(),
+                    "channels": wav_file.getnchannels(),
+                    "sample_width": wav_file.getsampwidth(),
+                    "duration_ms": round(wav_file.getnframes() * 1000 / wav_file.getframerate(), 1)
+                })
+    except Exception as e:
+        info["error"] = str(e)
+    return info
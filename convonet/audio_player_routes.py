@@ -4,16 +4,12 @@ Integrated audio player functionality for the main Flask app
 """
 
 import base64
-import json
-import time
-import tempfile
-import os
 from flask import Blueprint, render_template, request, jsonify, Response
-from flask_socketio import emit
+from convonet.audio_codec import encode_audio, describe_audio, AudioFormat, AudioCodecError
 
 # Redis imports
 try:
-    from convonet.redis_manager import redis_manager, get_session
+    from convonet.redis_manager import redis_manager, get_session, get_audio_buffer
     REDIS_AVAILABLE = True
 except ImportError:
     REDIS_AVAILABLE = False
@@ -53,40 +49,16 @@ def get_active_sessions():
         print(f"❌ Error getting sessions: {e}")
         return []
 
-def create_wav_file(audio_data):
-    """Create WAV file from raw audio data"""
-    import wave
+def load_session_audio(session_id, session_data):
+    """Get the recorded audio for a session as raw bytes
     
-    # Try different audio parameters
-    audio_params = [
-        {"channels": 1, "sample_width": 2, "framerate": 44100, "desc": "16-bit, 44.1kHz, mono"},
-        {"channels": 1, "sample_width": 2, "framerate": 16000, "desc": "16-bit, 16kHz, mono"},
-        {"channels": 1, "sample_width": 1, "framerate": 44100, "desc": "8-bit, 44.1kHz, mono"},
-        {"channels": 2, "sample_width": 2, "framerate": 44100, "desc": "16-bit, 44.1kHz, stereo"},
-    ]
-    
-    for params in audio_params:
-        temp_file = None
-        try:
-            # Create temporary WAV file
-            temp_file = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-            
-            with wave.open(temp_file.name, 'wb') as wav_file:
-                wav_file.setnchannels(params['channels'])
-                wav_file.setsampwidth(params['sample_width'])
-                wav_file.setframerate(params['framerate'])
-                wav_file.writeframes(audio_data)
-            
-            print(f"✅ Created WAV file with {params['desc']}")
-            return temp_file.name, params['desc']
-            
-        except Exception as e:
-            print(f"❌ Failed with {params['desc']}: {e}")
-            if temp_file and os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
-            continue
-    
-    return None, "All audio parameter combinations failed"
+    Base64 clients leave the blob in the session hash ('audio_buffer'); binary
+    transport clients leave it in the raw audio_buffer:{session_id} key instead.
+    """
+    audio_buffer_b64 = session_data.get('audio_buffer', '')
+    if audio_buffer_b64:
+        return base64.b64decode(audio_buffer_b64)
+    return get_audio_buffer(session_id) or b''
 
 @audio_player_bp.route('/')
 def index():
@@ -147,7 +119,7 @@ def api_session_info(session_id):
 
 @audio_player_bp.route('/api/session/<session_id>/download')
 def api_download_audio(session_id):
-    """Download audio as WAV file"""
+    """Download audio as WAV file (WebM recordings as-is, or Ogg Opus with ?format=ogg)"""
     try:
         if not REDIS_AVAILABLE:
             return jsonify({'success': False, 'message': 'Redis not available'})
@@ -157,55 +129,30 @@ def api_download_audio(session_id):
         if not session_data:
             return jsonify({'success': False, 'message': 'Session not found'})
         
-        # Get audio buffer
-        audio_buffer_b64 = session_data.get('audio_buffer', '')
-        if not audio_buffer_b64:
-            return jsonify({'success': False, 'message': 'No audio buffer found'})
-        
-        # Decode audio data
+        # Get audio buffer (base64 session field or raw binary buffer)
         try:
-            audio_data = base64.b64decode(audio_buffer_b64)
+            audio_data = load_session_audio(session_id, session_data)
         except Exception as e:
             return jsonify({'success': False, 'message': f'Failed to decode audio: {e}'})
+        if not audio_data:
+            return jsonify({'success': False, 'message': 'No audio buffer found'})
         
-        # Check if audio is WebM format (from WebRTC)
-        if audio_data.startswith(b'\x1a\x45\xdf\xa3'):  # WebM/Matroska header
-            # For WebM, return the original file without conversion
-            def generate():
-                yield audio_data
-            
-            return Response(
-                generate(),
-                mimetype='audio/webm',
-                headers={
-                    'Content-Disposition': f'attachment; filename="session_{session_id}_audio.webm"',
-                    'Content-Type': 'audio/webm'
-                }
-            )
-        else:
-            # For other formats, create WAV file
-            wav_file_path, format_desc = create_wav_file(audio_data)
-            if not wav_file_path:
-                return jsonify({'success': False, 'message': f'Failed to create WAV file: {format_desc}'})
-            
-            # Return WAV file
-            def generate():
-                with open(wav_file_path, 'rb') as f:
-                    while True:
-                        data = f.read(1024)
-                        if not data:
-                            break
-                        yield data
-                # Clean up
-                os.unlink(wav_file_path)
-            
-            return Response(
-                generate(),
-                mimetype='audio/wav',
-                headers={
-                    'Content-Disposition': f'attachment; filename=audio_{session_id}.wav'
-                }
-            )
+        # One payload in the recording's own container (raw samples get a WAV header
+        # built from the format the client declared at start_recording)
+        container = 'ogg' if request.args.get('format') == 'ogg' else None
+        try:
+            payload, mimetype = encode_audio(audio_data, AudioFormat.parse(session_data.get('audio_format')), container)
+        except AudioCodecError as e:
+            return jsonify({'success': False, 'message': f'Failed to package audio: {e}'})
+        
+        extension = mimetype.split('/')[1]
+        return Response(
+            payload,
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="session_{session_id}_audio.{extension}"'
+            }
+        )
         
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {e}'})
@@ -222,16 +169,14 @@ def api_analyze_audio(session_id):
         if not session_data:
             return jsonify({'success': False, 'message': 'Session not found'})
         
-        # Get audio buffer
+        # Get audio buffer (base64 session field or raw binary buffer)
         audio_buffer_b64 = session_data.get('audio_buffer', '')
-        if not audio_buffer_b64:
-            return jsonify({'success': False, 'message': 'No audio buffer found'})
-        
-        # Decode audio data
         try:
-            audio_data = base64.b64decode(audio_buffer_b64)
+            audio_data = load_session_audio(session_id, session_data)
         except Exception as e:
             return jsonify({'success': False, 'message': f'Failed to decode audio: {e}'})
+        if not audio_data:
+            return jsonify({'success': False, 'message': 'No audio buffer found'})
         
         # Analyze audio data
         analysis = {
@@ -256,6 +201,9 @@ def api_analyze_audio(session_id):
         }
         
         analysis['headers'] = headers
+        analysis['stream'] = describe_audio(audio_data)
+        declared = AudioFormat.parse(session_data.get('audio_format'))
+        analysis['declared_format'] = declared.info() if declared else None
         analysis['detected_format'] = 'Unknown'
         
         for format_name, detected in headers.items():
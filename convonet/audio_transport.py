@@ -0,0 +1,151 @@
+"""
+Audio Transport for the WebRTC Voice Assistant
+Negotiates binary Socket.IO attachments vs. base64-in-JSON for audio payloads and measures both
+
+Binary mode sends audio as raw Socket.IO attachments (bytes on the server, ArrayBuffer in
+the browser). Base64 mode is the original format and stays available for older clients:
+a client that does not advertise 'binary' in its authenticate payload gets base64.
+"""
+
+import base64
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Union
+
+AUDIO_TRANSPORT_BINARY = "binary"
+AUDIO_TRANSPORT_BASE64 = "base64"
+AUDIO_TRANSPORTS = (AUDIO_TRANSPORT_BINARY, AUDIO_TRANSPORT_BASE64)
+
+AudioPayload = Union[bytes, bytearray, memoryview, str]
+
+
+def get_preferred_audio_transport() -> str:
+    """Server preference (AUDIO_TRANSPORT=binary|base64, default: binary)"""
+    preferred = os.getenv('AUDIO_TRANSPORT', AUDIO_TRANSPORT_BINARY).lower()
+    return preferred if preferred in AUDIO_TRANSPORTS else AUDIO_TRANSPORT_BINARY
+
+
+def negotiate_audio_transport(client_transports: Optional[Union[str, Iterable[str]]]) -> str:
+    """Pick the audio transport for a session from what the client advertises
+
+    Clients that send nothing (pre-negotiation builds) always get base64.
+    """
+    if not client_transports:
+        return AUDIO_TRANSPORT_BASE64
+    if isinstance(client_transports, str):
+        client_transports = [client_transports]
+    supported = {str(t).lower() for t in client_transports}
+    preferred = get_preferred_audio_transport()
+    if preferred in supported:
+        return preferred
+    return AUDIO_TRANSPORT_BINARY if AUDIO_TRANSPORT_BINARY in supported else AUDIO_TRANSPORT_BASE64
+
+
+def payload_transport(payload: AudioPayload) -> str:
+    """Which transport an incoming payload actually used"""
+    return AUDIO_TRANSPORT_BASE64 if isinstance(payload, str) else AUDIO_TRANSPORT_BINARY
+
+
+class AudioTransportStats:
+    """Bytes on the wire and codec CPU time per transport mode
+
+    Wire bytes are the size of the audio payload as carried in the Socket.IO packet
+    (base64 characters or raw attachment bytes). CPU time is thread CPU spent on
+    decoding inbound payloads and on encoding + emitting outbound ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._modes = {
+                mode: {
+                    "inbound_messages": 0,
+                    "inbound_wire_bytes": 0,
+                    "inbound_audio_bytes": 0,
+                    "outbound_messages": 0,
+                    "outbound_wire_bytes": 0,
+                    "outbound_audio_bytes": 0,
+                    "cpu_seconds": 0.0,
+                    "turns": 0
+                }
+                for mode in AUDIO_TRANSPORTS
+            }
+
+    def record(self, mode: str, direction: str, wire_bytes: int, audio_bytes: int, cpu_seconds: float):
+        with self._lock:
+            stats = self._modes[mode]
+            stats[f"{direction}_messages"] += 1
+            stats[f"{direction}_wire_bytes"] += wire_bytes
+            stats[f"{direction}_audio_bytes"] += audio_bytes
+            stats["cpu_seconds"] += cpu_seconds
+
+    def record_turn(self, mode: str):
+        with self._lock:
+            self._modes[mode]["turns"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for mode, stats in self._modes.items():
+                turns = stats["turns"]
+                audio_bytes = stats["inbound_audio_bytes"] + stats["outbound_audio_bytes"]
+                wire_bytes = stats["inbound_wire_bytes"] + stats["outbound_wire_bytes"]
+                result[mode] = dict(stats)
+                result[mode]["wire_overhead_ratio"] = round(wire_bytes / audio_bytes, 4) if audio_bytes else None
+                result[mode]["per_turn"] = {
+                    "wire_bytes": round(wire_bytes / turns) if turns else None,
+                    "cpu_ms": round(stats["cpu_seconds"] * 1000 / turns, 3) if turns else None
+                }
+            return result
+
+
+transport_stats = AudioTransportStats()
+
+
+def decode_audio_payload(payload: AudioPayload) -> bytes:
+    """Decode an inbound audio payload (binary attachment or base64 string) to bytes"""
+    cpu_started = time.thread_time()
+    mode = payload_transport(payload)
+    if mode == AUDIO_TRANSPORT_BASE64:
+        audio = base64.b64decode(payload)
+        wire_bytes = len(payload)
+    else:
+        audio = bytes(payload)
+        wire_bytes = len(audio)
+    transport_stats.record(mode, "inbound", wire_bytes, len(audio), time.thread_time() - cpu_started)
+    return audio
+
+
+def encode_audio_payload(audio: bytes, transport: str) -> Union[bytes, str]:
+    """Encode outbound audio for the session's transport (bytes for binary, str for base64)"""
+    if transport == AUDIO_TRANSPORT_BINARY:
+        return bytes(audio)
+    return base64.b64encode(audio).decode('utf-8')
+
+
+@contextmanager
+def measure_outbound(transport: str, audio: bytes):
+    """Measure encoding + emitting one outbound audio message
+
+        with measure_outbound(transport, audio_bytes):
+            socketio.emit('agent_response', {'audio': encode_audio_payload(audio_bytes, transport)}, ...)
+    """
+    cpu_started = time.thread_time()
+    try:
+        yield
+    finally:
+        wire_bytes = len(audio) if transport == AUDIO_TRANSPORT_BINARY else 4 * ((len(audio) + 2) // 3)
+        transport_stats.record(transport, "outbound", wire_bytes, len(audio), time.thread_time() - cpu_started)
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """Snapshot of per-mode transport statistics"""
+    return {
+        "preferred": get_preferred_audio_transport(),
+        "modes": transport_stats.snapshot()
+    }
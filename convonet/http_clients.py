@@ -0,0 +1,238 @@
+"""
+Outbound HTTP Clients for Convonet Project
+Shared keep-alive connection pools (sync and async) per provider, with HTTP/2 and DNS caching
+
+Deepgram batch STT used a bare requests.post per utterance (new TCP + TLS handshake
+each time), and every agent transfer built a new twilio.rest.Client. All outbound
+provider traffic now goes through one httpx pool per provider:
+
+    from convonet.http_clients import get_sync_client
+    response = get_sync_client("deepgram").post("https://api.deepgram.com/v1/listen", ...)
+
+- one pool per provider host, so HTTP_POOL_<PROVIDER>_MAX_CONNECTIONS is a per-host limit
+- keep-alive connections (HTTP_POOL_KEEPALIVE_SECONDS) reused across utterances and turns
+- HTTP/2 when the `h2` package is installed (HTTP_POOL_HTTP2=false to disable)
+- getaddrinfo results for provider hosts cached for DNS_CACHE_TTL seconds
+- get_twilio_client() returns a shared Twilio REST client backed by the Twilio pool
+- async clients are meant for the agent runtime loop (see agent_runtime.py)
+- the boot warm-up opens one connection per configured provider
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    from twilio.http import HttpClient as TwilioHttpClient
+    from twilio.http.response import Response as TwilioResponse
+    TWILIO_AVAILABLE = True
+except ImportError:
+    TwilioHttpClient = object
+    TwilioResponse = None
+    TWILIO_AVAILABLE = False
+
+# provider -> (host, default max connections, API key env var that marks it configured)
+PROVIDERS: Dict[str, Tuple[str, int, str]] = {
+    "deepgram": ("api.deepgram.com", 10, "DEEPGRAM_API_KEY"),
+    "openai": ("api.openai.com", 20, "OPENAI_API_KEY"),
+    "twilio": ("api.twilio.com", 5, "TWILIO_ACCOUNT_SID"),
+}
+
+DEFAULT_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 5.0
+
+
+def _provider_env(provider: str, name: str, default: str) -> str:
+    return os.getenv(f"HTTP_POOL_{provider.upper()}_{name}", default)
+
+
+def is_http2_enabled() -> bool:
+    return HTTP2_AVAILABLE and os.getenv('HTTP_POOL_HTTP2', 'true').lower() == 'true'
+
+
+def _client_kwargs(provider: str) -> dict:
+    _, default_max, _ = PROVIDERS.get(provider, ("", 10, ""))
+    max_connections = int(_provider_env(provider, 'MAX_CONNECTIONS', str(default_max)))
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv('HTTP_POOL_KEEPALIVE_SECONDS', '90')),
+        ),
+        "timeout": httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+        "http2": is_http2_enabled(),
+    }
+
+
+class DnsCache:
+    """TTL cache in front of socket.getaddrinfo for provider hosts only"""
+
+    def __init__(self, hosts, ttl: Optional[float] = None):
+        self.hosts = set(hosts)
+        self.ttl = ttl if ttl is not None else float(os.getenv('DNS_CACHE_TTL', '300'))
+        self._entries: Dict[tuple, Tuple[float, list]] = {}
+        self._lock = threading.Lock()
+        self._original = None
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def install(self):
+        """Wrap socket.getaddrinfo (after eventlet monkey patching, so green DNS stays in use)"""
+        if self._original is not None or self.ttl <= 0:
+            return
+        self._original = socket.getaddrinfo
+        socket.getaddrinfo = self._getaddrinfo
+
+    def _getaddrinfo(self, host, port, *args, **kwargs):
+        if host not in self.hosts:
+            return self._original(host, port, *args, **kwargs)
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats['hits'] += 1
+            return entry[1]
+        self.stats['misses'] += 1
+        result = self._original(host, port, *args, **kwargs)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+        return result
+
+
+class HttpClients:
+    """Process-wide httpx clients, one pool per provider"""
+
+    def __init__(self):
+        self._sync: Dict[str, "httpx.Client"] = {}
+        self._async: Dict[str, "httpx.AsyncClient"] = {}
+        self._twilio = {}
+        self._lock = threading.Lock()
+        self.dns_cache = DnsCache(host for host, _, _ in PROVIDERS.values())
+
+    def sync_client(self, provider: str) -> "httpx.Client":
+        client = self._sync.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._sync.get(provider)
+                if client is None:
+                    self.dns_cache.install()
+                    client = self._sync[provider] = httpx.Client(**_client_kwargs(provider))
+        return client
+
+    def async_client(self, provider: str) -> "httpx.AsyncClient":
+        """Only use from coroutines on the agent runtime loop (httpx async pools are loop-bound)"""
+        client = self._async.get(provider)
+        if client is None:
+            with self._lock:
+                client = self._async.get(provider)
+                if client is None:
+                    self.dns_cache.install()
+                    client = self._async[provider] = httpx.AsyncClient(**_client_kwargs(provider))
+        return client
+
+    def twilio_client(self, account_sid: str, auth_token: str):
+        """Shared twilio.rest.Client per account, sending requests through the Twilio pool"""
+        key = (account_sid, auth_token)
+        client = self._twilio.get(key)
+        if client is None:
+            from twilio.rest import Client
+
+            with self._lock:
+                client = self._twilio.get(key)
+                if client is None:
+                    http_client = _TwilioHttpxClient(self.sync_client("twilio"))
+                    client = self._twilio[key] = Client(account_sid, auth_token, http_client=http_client)
+        return client
+
+    def close(self):
+        with self._lock:
+            clients, self._sync = list(self._sync.values()), {}
+            self._twilio = {}
+        for client in clients:
+            client.close()
+
+    async def aclose(self):
+        with self._lock:
+            clients, self._async = list(self._async.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    def get_stats(self) -> dict:
+        return {
+            'http2': is_http2_enabled(),
+            'sync_pools': sorted(self._sync),
+            'async_pools': sorted(self._async),
+            'twilio_clients': len(self._twilio),
+            'dns_cache': {**self.dns_cache.stats, 'ttl': self.dns_cache.ttl, 'installed': self.dns_cache._original is not None},
+        }
+
+
+class _TwilioHttpxClient(TwilioHttpClient):
+    """twilio.http.HttpClient that sends requests through a pooled httpx.Client"""
+
+    def __init__(self, client: "httpx.Client", timeout: Optional[float] = DEFAULT_TIMEOUT):
+        super().__init__(logging.getLogger("twilio.http_client"), is_async=False, timeout=timeout)
+        self._client = client
+
+    def request(self, method, url, params=None, data=None, headers=None, auth=None, timeout=None,
+                allow_redirects=False):
+        kwargs = {"params": params, "headers": headers, "auth": auth,
+                  "timeout": timeout if timeout is not None else self.timeout, "follow_redirects": allow_redirects}
+        if headers and headers.get("Content-Type") in ("application/json", "application/scim+json"):
+            kwargs["json"] = data
+        else:
+            kwargs["data"] = data
+        self.log_request({"method": method.upper(), "url": url, "params": params, "headers": headers})
+        response = self._client.request(method.upper(), url, **kwargs)
+        self.log_response(response.status_code, response)
+        self._test_only_last_response = TwilioResponse(int(response.status_code), response.text, response.headers)
+        return self._test_only_last_response
+
+
+# Global HTTP clients
+http_clients = HttpClients()
+
+
+def get_http_clients() -> HttpClients:
+    return http_clients
+
+
+def get_sync_client(provider: str) -> "httpx.Client":
+    return http_clients.sync_client(provider)
+
+
+def get_async_client(provider: str) -> "httpx.AsyncClient":
+    return http_clients.async_client(provider)
+
+
+def get_twilio_client(account_sid: str, auth_token: str):
+    return http_clients.twilio_client(account_sid, auth_token)
+
+
+def prewarm_connections() -> List[str]:
+    """Open one keep-alive connection to each configured provider; returns the providers warmed"""
+    warmed = []
+    for provider, (host, _, key_env) in PROVIDERS.items():
+        if not os.getenv(key_env):
+            continue
+        try:
+            # Any response (usually 401/404) leaves a TLS connection in the pool
+            get_sync_client(provider).head(f"https://{host}/", timeout=CONNECT_TIMEOUT)
+            warmed.append(provider)
+        except Exception as e:
+            print(f"⚠️ HTTP pool warm-up for {provider} failed: {e}")
+    return warmed
@@ -0,0 +1,256 @@
+"""
+Voice Instrumentation for the WebRTC Voice Assistant
+Sampled, aggregated Sentry reporting with a background flusher for hot voice paths
+
+sentry_capture_voice_event / sentry_capture_redis_operation used to open a Sentry
+scope, set tags and context and add a breadcrumb on every call, including every
+audio_data chunk and its Redis APPEND, and Redis failures called capture_message
+inline. They now go through this facade:
+
+- every event increments an in-memory counter (a dict update under a lock)
+- events are sampled per type (hot per-chunk events at VOICE_HOT_EVENT_SAMPLE_RATE,
+  others at VOICE_EVENT_SAMPLE_RATE, overrides in VOICE_EVENT_SAMPLE_RATES="name=rate,...");
+  sampled events go into a per-session trail, not into Sentry
+- errors and turns slower than VOICE_SLOW_TURN_MS are always reported, with the
+  session's trail attached, by a background flusher that also publishes the
+  counters to the Sentry global scope every VOICE_INSTRUMENTATION_FLUSH_SECONDS
+"""
+
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+try:
+    import sentry_sdk
+    SENTRY_AVAILABLE = True
+except ImportError:
+    sentry_sdk = None
+    SENTRY_AVAILABLE = False
+
+# Emitted once per audio_data chunk
+HOT_EVENTS = frozenset({
+    "redis_append_audio_chunk",
+    "audio_received_not_recording",
+    "session_not_found",
+})
+
+TRAIL_LENGTH = 50
+MAX_TRAILS = 1000
+
+
+def _sentry_active() -> bool:
+    """True once sentry_sdk.init() ran with a DSN (no flusher work otherwise)"""
+    if not SENTRY_AVAILABLE:
+        return False
+    get_client = getattr(sentry_sdk, 'get_client', None)
+    if get_client is not None:
+        return get_client().is_active()
+    return sentry_sdk.Hub.current.client is not None
+
+
+def _parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            try:
+                rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+            except ValueError:
+                print(f"⚠️ Instrumentation: ignoring bad sample rate '{item}'")
+    return rates
+
+
+class Instrumentation:
+    """Counters, sampled per-session trails and an async Sentry reporter"""
+
+    def __init__(self, default_rate: Optional[float] = None, hot_rate: Optional[float] = None,
+                 rates: Optional[Dict[str, float]] = None, slow_turn_ms: Optional[float] = None,
+                 flush_interval: Optional[float] = None):
+        self.default_rate = default_rate if default_rate is not None else float(os.getenv('VOICE_EVENT_SAMPLE_RATE', '1.0'))
+        self.hot_rate = hot_rate if hot_rate is not None else float(os.getenv('VOICE_HOT_EVENT_SAMPLE_RATE', '0.01'))
+        self.rates = rates if rates is not None else _parse_sample_rates(os.getenv('VOICE_EVENT_SAMPLE_RATES', ''))
+        self.slow_turn_ms = slow_turn_ms if slow_turn_ms is not None else float(os.getenv('VOICE_SLOW_TURN_MS', '5000'))
+        self.flush_interval = flush_interval if flush_interval is not None else \
+            float(os.getenv('VOICE_INSTRUMENTATION_FLUSH_SECONDS', '10'))
+        self._counters: Dict[str, int] = {}
+        self._trails: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._reports: "queue.Queue" = queue.Queue(maxsize=1000)
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {'events': 0, 'sampled': 0, 'reported': 0, 'dropped': 0, 'flushes': 0}
+
+    def sample_rate(self, name: str) -> float:
+        rate = self.rates.get(name)
+        if rate is not None:
+            return rate
+        return self.hot_rate if name in HOT_EVENTS else self.default_rate
+
+    def event(self, name: str, session_id: Optional[str] = None, user_id: Optional[str] = None,
+              details: Optional[dict] = None):
+        """Count an event; keep it in the session trail if sampled"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            self.stats['events'] += 1
+        rate = self.sample_rate(name)
+        if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+            return
+        with self._lock:
+            self.stats['sampled'] += 1
+        if session_id:
+            self._trail(session_id).append((time.time(), name, user_id, details))
+
+    def error(self, name: str, session_id: Optional[str] = None, message: Optional[str] = None,
+              exception: Optional[BaseException] = None, user_id: Optional[str] = None,
+              details: Optional[dict] = None, level: str = "error"):
+        """Always reported (with the session trail) by the flusher"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            self.stats['events'] += 1
+        if session_id:
+            self._trail(session_id).append((time.time(), name, user_id, details))
+        self._report({
+            'kind': 'exception' if exception is not None else 'message',
+            'name': name,
+            'message': message or name,
+            'exception': exception,
+            'level': level,
+            'session_id': session_id,
+            'user_id': user_id,
+            'details': details or {},
+        })
+
+    def turn_completed(self, session_id: str, total_ms: float, user_id: Optional[str] = None):
+        """Report the full trail of turns slower than VOICE_SLOW_TURN_MS"""
+        if total_ms < self.slow_turn_ms:
+            return
+        with self._lock:
+            self._counters['slow_turn'] = self._counters.get('slow_turn', 0) + 1
+        self._report({
+            'kind': 'message',
+            'name': 'slow_turn',
+            'message': f"Slow voice turn: {total_ms:.0f}ms",
+            'exception': None,
+            'level': 'warning',
+            'session_id': session_id,
+            'user_id': user_id,
+            'details': {'total_ms': round(total_ms, 1), 'threshold_ms': self.slow_turn_ms},
+        })
+
+    def end_session(self, session_id: str):
+        with self._lock:
+            self._trails.pop(session_id, None)
+
+    def _trail(self, session_id: str) -> deque:
+        trail = self._trails.get(session_id)
+        if trail is None:
+            with self._lock:
+                if len(self._trails) >= MAX_TRAILS:
+                    # Sessions that never disconnected cleanly; drop the oldest
+                    self._trails.pop(next(iter(self._trails)))
+                trail = self._trails.setdefault(session_id, deque(maxlen=TRAIL_LENGTH))
+        return trail
+
+    def _report(self, report: dict):
+        if not _sentry_active():
+            return
+        if report['session_id']:
+            trail = self._trails.get(report['session_id'])
+            report['trail'] = list(trail) if trail else []
+        try:
+            self._reports.put_nowait(report)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return
+        self._ensure_flusher()
+
+    def start(self) -> bool:
+        """Start the background flusher (no-op without an initialized Sentry client)"""
+        if not _sentry_active():
+            return False
+        self._ensure_flusher()
+        return True
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._flush_loop, name="voice-instrumentation", daemon=True)
+                    self._flusher.start()
+
+    def _flush_loop(self):
+        last_counters = 0.0
+        while True:
+            try:
+                report = self._reports.get(timeout=self.flush_interval)
+            except queue.Empty:
+                report = None
+            try:
+                if report is not None:
+                    self._send(report)
+                if time.time() - last_counters >= self.flush_interval:
+                    last_counters = time.time()
+                    self.flush_counters()
+            except Exception as e:
+                print(f"❌ Instrumentation flusher error: {e}")
+
+    def _send(self, report: dict):
+        started = report['trail'][0][0] if report.get('trail') else None
+        trail = [
+            {'t_ms': round((ts - started) * 1000, 1), 'event': name, 'user_id': user_id, 'details': details or {}}
+            for ts, name, user_id, details in report.get('trail', [])
+        ]
+        tags = {'component': 'webrtc_voice_server', 'event': report['name']}
+        contexts = {
+            'voice_event': {
+                'session_id': report['session_id'],
+                'user_id': report['user_id'],
+                'event': report['name'],
+                'details': report['details'],
+            },
+            'voice_trail': {'events': trail},
+        }
+        if report['kind'] == 'exception':
+            sentry_sdk.capture_exception(report['exception'], tags=tags, contexts=contexts)
+        else:
+            sentry_sdk.capture_message(report['message'], level=report['level'], tags=tags, contexts=contexts)
+        self.stats['reported'] += 1
+
+    def flush_counters(self):
+        """Publish cumulative counters on the global scope so every later Sentry event carries them"""
+        if not _sentry_active():
+            return
+        with self._lock:
+            counters = dict(self._counters)
+        if not counters:
+            return
+        get_global_scope = getattr(sentry_sdk, 'get_global_scope', None)
+        if get_global_scope is not None:
+            get_global_scope().set_context('voice_counters', counters)
+        else:
+            with sentry_sdk.configure_scope() as scope:
+                scope.set_context('voice_counters', counters)
+        self.stats['flushes'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            trails = len(self._trails)
+        return {
+            **self.stats,
+            'pending_reports': self._reports.qsize(),
+            'trails': trails,
+            'counters': counters,
+            'sentry': _sentry_active(),
+        }
+
+
+# Global instrumentation instance
+instrumentation = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    return instrumentation
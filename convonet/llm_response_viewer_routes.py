@@ -3,23 +3,16 @@ LLM Response Viewer Routes for Convonet Project
 Dashboard to view and troubleshoot LLM responses, conversation logs, and LangGraph agent interactions
 """
 
-import asyncio
 import json
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from flask import Blueprint, render_template, request, jsonify
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 
-# Apply nest_asyncio to allow nested event loops (needed for eventlet compatibility)
-try:
-    import nest_asyncio
-    nest_asyncio.apply()
-except ImportError:
-    pass  # nest_asyncio not available, may cause issues with eventlet
-
-# Import agent graph and state
+# Import agent graph and state (the graph lives on the agent runtime loop)
 try:
     from convonet.routes import _get_agent_graph
+    from convonet.agent_runtime import get_agent_runtime
     from convonet.state import AgentState
     AGENT_AVAILABLE = True
 except ImportError as e:
@@ -113,7 +106,7 @@ def api_threads():
     
     try:
         # Run async function in sync context
-        agent_graph = asyncio.run(_get_agent_graph())
+        agent_graph = get_agent_runtime().get_agent_graph()
         
         # Note: InMemorySaver doesn't provide list_threads()
         # We'll need to track threads ourselves or return empty list
@@ -164,11 +157,8 @@ def api_conversation(thread_id: str):
         })
     
     try:
-        agent_graph = asyncio.run(_get_agent_graph())
-        config = {"configurable": {"thread_id": thread_id}}
-        
         # Get the conversation state
-        state = agent_graph.get_state(config=config)
+        state = get_agent_runtime().get_agent_state(thread_id)
         
         if not state or not state.values:
             return jsonify({
@@ -237,11 +227,8 @@ def api_search():
             })
         
         # Try to get conversation with the query as thread_id
-        agent_graph = asyncio.run(_get_agent_graph())
-        config = {"configurable": {"thread_id": query}}
-        
         try:
-            state = agent_graph.get_state(config=config)
+            state = get_agent_runtime().get_agent_state(query)
             if state and state.values:
                 messages = state.values.get("messages", [])
                 if messages:
@@ -294,10 +281,7 @@ def api_analyze(thread_id: str):
         })
     
     try:
-        agent_graph = asyncio.run(_get_agent_graph())
-        config = {"configurable": {"thread_id": thread_id}}
-        
-        state = agent_graph.get_state(config=config)
+        state = get_agent_runtime().get_agent_state(thread_id)
         if not state or not state.values:
             return jsonify({
                 'success': False,
@@ -0,0 +1,182 @@
+"""
+Local CPU Speech-to-Text for the WebRTC Voice Assistant
+In-process faster-whisper backend for offline runs and short command utterances
+
+With Deepgram unreachable there was no way to transcribe at all, and CI could not run
+the voice pipeline without network access. LocalWhisperSTT is an STT provider
+("local" in STT_PROVIDERS) backed by faster-whisper (optional: pip install faster-whisper):
+
+    STT_PROVIDERS=local,deepgram,whisper      # short commands locally, cloud for the rest
+    STT_PROVIDERS=deepgram,whisper,local      # local only as a last-resort fallback
+
+- the model (LOCAL_STT_MODEL, default tiny.en, int8 on CPU) loads once during boot warm-up
+- utterances longer than LOCAL_STT_MAX_SECONDS are left to the next provider
+- at most LOCAL_STT_MAX_CONCURRENCY transcriptions run at once; a request that cannot
+  start within LOCAL_STT_QUEUE_TIMEOUT_SECONDS fails over instead of queueing
+- inference runs on real OS threads (eventlet's tpool under monkey patching), so the
+  Socket.IO loop keeps serving while CTranslate2 decodes
+
+transcribe_audio_locally() has the same signature as transcribe_audio_with_deepgram_webrtc().
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    WhisperModel = None
+    FASTER_WHISPER_AVAILABLE = False
+
+from convonet.audio_codec import AudioFormat, DEFAULT_RAW_FORMAT, detect_container, demux_webm, encode_audio, describe_audio
+from convonet.stt_providers import STTBusy, STTProvider, STTRequest
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_local_stt_enabled() -> bool:
+    """Local STT is used when 'local' is in STT_PROVIDERS (and faster-whisper is installed)"""
+    chain = [name.strip() for name in os.getenv('STT_PROVIDERS', '').split(',')]
+    return FASTER_WHISPER_AVAILABLE and 'local' in chain
+
+
+def _run_on_os_thread(fn, *args):
+    """Run CPU-bound fn on a native thread even when eventlet has patched threading"""
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def audio_duration_seconds(audio: bytes, audio_format: Optional[AudioFormat] = None) -> Optional[float]:
+    """Duration of a recording without decoding it (None if unknown)"""
+    container = detect_container(audio)
+    if container == "raw":
+        audio_format = audio_format or DEFAULT_RAW_FORMAT
+        if not audio_format.is_raw:
+            return None
+        return len(audio) / (audio_format.sample_rate * audio_format.channels * audio_format.sample_width)
+    if container == "webm":
+        try:
+            return demux_webm(audio).duration_ms / 1000
+        except Exception:
+            return None
+    duration_ms = describe_audio(audio).get("duration_ms")
+    return duration_ms / 1000 if duration_ms is not None else None
+
+
+class LocalWhisperSTT(STTProvider):
+    """faster-whisper on CPU, bounded concurrency"""
+
+    name = "local"
+
+    def __init__(self):
+        self.model_name = os.getenv('LOCAL_STT_MODEL', 'tiny.en')
+        self.compute_type = os.getenv('LOCAL_STT_COMPUTE_TYPE', 'int8')
+        self.cpu_threads = int(os.getenv('LOCAL_STT_CPU_THREADS', '2'))
+        self.max_seconds = _env_float('LOCAL_STT_MAX_SECONDS', 8.0)
+        self.max_concurrency = int(os.getenv('LOCAL_STT_MAX_CONCURRENCY', '1'))
+        self.queue_timeout = _env_float('LOCAL_STT_QUEUE_TIMEOUT_SECONDS', 0.5)
+        self.beam_size = int(os.getenv('LOCAL_STT_BEAM_SIZE', '1'))
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'busy': 0, 'too_long': 0, 'in_flight': 0, 'load_ms': None}
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> "WhisperModel":
+        """Load the model (once); called from boot warm-up so the first turn does not pay for it"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    if not FASTER_WHISPER_AVAILABLE:
+                        raise RuntimeError("faster-whisper is not installed")
+                    started = time.perf_counter()
+                    self._model = _run_on_os_thread(
+                        lambda: WhisperModel(self.model_name, device="cpu", compute_type=self.compute_type,
+                                             cpu_threads=self.cpu_threads, num_workers=self.max_concurrency)
+                    )
+                    self.stats['load_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                    print(f"✅ Local STT model {self.model_name} loaded in {self.stats['load_ms']}ms")
+        return self._model
+
+    def is_available(self, request: STTRequest) -> bool:
+        if not FASTER_WHISPER_AVAILABLE:
+            return False
+        duration = audio_duration_seconds(request.audio, request.audio_format)
+        if duration is None or duration > self.max_seconds:
+            self.stats['too_long'] += 1
+            return False
+        return True
+
+    def _decode(self, model, payload: bytes, language: str) -> Optional[str]:
+        segments, _ = model.transcribe(io.BytesIO(payload), language=language, beam_size=self.beam_size,
+                                       vad_filter=True, condition_on_previous_text=False)
+        return " ".join(segment.text.strip() for segment in segments).strip() or None
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._stats_lock:
+                self.stats['busy'] += 1
+            raise STTBusy(f"local STT busy ({self.max_concurrency} running)")
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['in_flight'] += 1
+        try:
+            model = self.load()
+            payload, _ = encode_audio(request.audio, request.audio_format)
+            return _run_on_os_thread(self._decode, model, payload, request.language)
+        finally:
+            with self._stats_lock:
+                self.stats['in_flight'] -= 1
+            self._slots.release()
+
+    def get_stats(self) -> dict:
+        return {**self.stats, 'model': self.model_name, 'loaded': self.loaded,
+                'max_concurrency': self.max_concurrency, 'max_seconds': self.max_seconds}
+
+
+# Global local STT backend (one model per process)
+_local_stt: Optional[LocalWhisperSTT] = None
+_local_stt_lock = threading.Lock()
+
+
+def get_local_stt() -> LocalWhisperSTT:
+    global _local_stt
+    if _local_stt is None:
+        with _local_stt_lock:
+            if _local_stt is None:
+                _local_stt = LocalWhisperSTT()
+    return _local_stt
+
+
+def prewarm_local_stt() -> str:
+    """Boot warm-up step: load the model before the first caller needs it"""
+    stt = get_local_stt()
+    stt.load()
+    return f"{stt.model_name} in {stt.stats['load_ms']}ms"
+
+
+def transcribe_audio_locally(audio_buffer: bytes, language: str = "en",
+                             audio_format: Optional[AudioFormat] = None) -> Optional[str]:
+    """Drop-in for transcribe_audio_with_deepgram_webrtc() using the local model"""
+    try:
+        return get_local_stt().transcribe(STTRequest(audio_buffer, language=language, audio_format=audio_format))
+    except Exception as e:
+        print(f"❌ Local STT failed: {e}")
+        return None
@@ -0,0 +1,207 @@
+"""
+Voice Pipeline Metrics for Convonet Project
+In-process per-stage latency histograms with percentile and Prometheus text export
+
+Histograms are HDR-style: each power-of-two range of milliseconds is split into
+SUB_BUCKETS linear buckets, giving a bounded relative error (~3% at 16 sub-buckets)
+over ~0.5µs..~35min with a fixed array of counters. Recording is a frexp, an index
+computation and a counter increment, so it stays on in production.
+
+    from convonet.metrics import stage_timer, observe_stage
+    with stage_timer("stt"):
+        text = transcribe(...)
+    observe_stage("tool:create_todo", elapsed_ms)
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+SUB_BUCKETS = 16
+MIN_EXPONENT = -10  # 2**-11 ms ≈ 0.5µs
+MAX_EXPONENT = 21   # 2**21 ms ≈ 35 min
+BUCKET_COUNT = (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+# Voice pipeline stages (tools are recorded as "tool:<name>")
+STAGE_AUDIO_INGEST = "audio_ingest"
+STAGE_STT = "stt"
+STAGE_AGENT = "agent"
+STAGE_TTS = "tts"
+STAGE_EMIT = "emit"
+STAGE_TURN = "turn"
+STAGE_QUEUE_WAIT = "queue_wait"
+
+
+def is_metrics_enabled() -> bool:
+    """Per-stage latency metrics (disable with VOICE_METRICS=false)"""
+    return os.getenv('VOICE_METRICS', 'true').lower() == 'true'
+
+
+def _bucket_index(value_ms: float) -> int:
+    if value_ms <= 0:
+        return 0
+    mantissa, exponent = math.frexp(value_ms)  # value = mantissa * 2**exponent, mantissa in [0.5, 1)
+    if exponent < MIN_EXPONENT:
+        return 0
+    if exponent > MAX_EXPONENT:
+        return BUCKET_COUNT - 1
+    return (exponent - MIN_EXPONENT) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def _bucket_value(index: int) -> float:
+    """Midpoint (ms) of a bucket"""
+    exponent = index // SUB_BUCKETS + MIN_EXPONENT
+    sub = index % SUB_BUCKETS
+    low = math.ldexp(0.5 + sub / (2 * SUB_BUCKETS), exponent)
+    high = math.ldexp(0.5 + (sub + 1) / (2 * SUB_BUCKETS), exponent)
+    return (low + high) / 2
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in milliseconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * BUCKET_COUNT
+            self.count = 0
+            self.total_ms = 0.0
+            self.min_ms = math.inf
+            self.max_ms = 0.0
+
+    def record(self, value_ms: float):
+        index = _bucket_index(value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            if value_ms < self.min_ms:
+                self.min_ms = value_ms
+            if value_ms > self.max_ms:
+                self.max_ms = value_ms
+
+    def percentiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[float, Optional[float]]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self.count
+            low, high = self.min_ms, self.max_ms
+        if not total:
+            return {q: None for q in quantiles}
+
+        result = {}
+        targets = sorted((max(1, math.ceil(q * total)), q) for q in quantiles)
+        seen = 0
+        t = 0
+        for index, bucket_count in enumerate(counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while t < len(targets) and seen >= targets[t][0]:
+                # Clamp to observed extremes so small samples don't report a bucket midpoint outside them
+                result[targets[t][1]] = min(max(_bucket_value(index), low), high)
+                t += 1
+            if t == len(targets):
+                break
+        return result
+
+    def snapshot(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> dict:
+        percentiles = self.percentiles(quantiles)
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "min_ms": round(self.min_ms, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3) if self.count else None,
+            **{f"p{int(q * 100)}_ms": (round(v, 3) if v is not None else None) for q, v in percentiles.items()}
+        }
+
+
+class MetricsRegistry:
+    """Named latency histograms, one per pipeline stage"""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage: str, value_ms: float):
+        self.histogram(stage).record(value_ms)
+
+    @contextmanager
+    def timer(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - started) * 1000)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = dict(self._histograms)
+        return {
+            "since": self.started_at,
+            "stages": {stage: histogram.snapshot() for stage, histogram in sorted(stages.items())}
+        }
+
+    def prometheus_text(self, metric: str = "convonet_voice_stage_latency_seconds") -> str:
+        """Prometheus exposition format (a summary per stage, in seconds)"""
+        with self._lock:
+            stages = dict(self._histograms)
+        lines = [
+            f"# HELP {metric} Voice pipeline stage latency.",
+            f"# TYPE {metric} summary"
+        ]
+        for stage, histogram in sorted(stages.items()):
+            label = stage.replace('\\', '\\\\').replace('"', '\\"')
+            for q, value in histogram.percentiles().items():
+                if value is not None:
+                    lines.append(f'{metric}{{stage="{label}",quantile="{q}"}} {value / 1000:.6f}')
+            lines.append(f'{metric}_sum{{stage="{label}"}} {histogram.total_ms / 1000:.6f}')
+            lines.append(f'{metric}_count{{stage="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    return metrics_registry
+
+
+def observe_stage(stage: str, value_ms: float):
+    """Record one latency sample (ms) for a stage"""
+    if is_metrics_enabled():
+        metrics_registry.observe(stage, value_ms)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time the enclosed block into the stage's histogram"""
+    if not is_metrics_enabled():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics_registry.observe(stage, (time.perf_counter() - started) * 1000)
@@ -37,17 +37,19 @@ class RedisManager:
             redis_password = os.getenv('REDIS_PASSWORD', '')
             redis_db = safe_int(os.getenv('REDIS_DB', '0'), 0)
         
+        self._connection_kwargs = {
+            'host': redis_host,
+            'port': redis_port,
+            'password': redis_password if redis_password else None,
+            'db': redis_db,
+            'socket_connect_timeout': 5,
+            'socket_timeout': 5,
+            'retry_on_timeout': True
+        }
+        self._binary_client = None
+        
         try:
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password if redis_password else None,
-                db=redis_db,
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-                retry_on_timeout=True
-            )
+            self.redis_client = redis.Redis(decode_responses=True, **self._connection_kwargs)
             
             # Test connection
             self.redis_client.ping()
@@ -133,6 +135,69 @@ class RedisManager:
             logger.error(f"❌ Failed to extend session: {e}")
             return False
     
+    # Binary audio buffers
+    def get_binary_client(self) -> Optional[redis.Redis]:
+        """Get a client that returns raw bytes (decode_responses=False) for binary payloads"""
+        if not self.redis_client:
+            return None
+        if self._binary_client is None:
+            self._binary_client = redis.Redis(decode_responses=False, **self._connection_kwargs)
+        return self._binary_client
+    
+    def append_audio_chunk(self, session_id: str, chunk: bytes, ttl: int = 3600) -> Optional[int]:
+        """Append a raw audio chunk to the session's binary buffer (O(chunk) per call)
+        
+        Returns the new buffer length in bytes, or None on failure.
+        """
+        try:
+            client = self.get_binary_client()
+            if client is None:
+                return None
+            key = f"audio_buffer:{session_id}"
+            pipe = client.pipeline(transaction=False)
+            pipe.append(key, chunk)
+            pipe.expire(key, ttl)
+            new_length, _ = pipe.execute()
+            return new_length
+        except Exception as e:
+            logger.error(f"❌ Failed to append audio chunk: {e}")
+            return None
+    
+    def set_audio_buffer(self, session_id: str, audio: bytes, ttl: int = 3600) -> bool:
+        """Replace the session's raw audio buffer (e.g. with the complete recorded blob)"""
+        try:
+            client = self.get_binary_client()
+            if client is None:
+                return False
+            client.setex(f"audio_buffer:{session_id}", ttl, audio)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to set audio buffer: {e}")
+            return False
+    
+    def get_audio_buffer(self, session_id: str) -> Optional[bytes]:
+        """Get the session's raw audio buffer"""
+        try:
+            client = self.get_binary_client()
+            if client is None:
+                return None
+            return client.get(f"audio_buffer:{session_id}")
+        except Exception as e:
+            logger.error(f"❌ Failed to get audio buffer: {e}")
+            return None
+    
+    def clear_audio_buffer(self, session_id: str) -> bool:
+        """Delete the session's raw audio buffer"""
+        try:
+            client = self.get_binary_client()
+            if client is None:
+                return False
+            client.delete(f"audio_buffer:{session_id}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to clear audio buffer: {e}")
+            return False
+    
     # Caching
     def cache_user_data(self, user_id: str, data_type: str, data: Any, ttl: int = 300) -> bool:
         """Cache user-specific data (todos, teams, etc.)"""
@@ -294,3 +359,19 @@ def publish_team_notification(team_id: str, notification: Dict[str, Any]) -> boo
 def publish_user_notification(user_id: str, notification: Dict[str, Any]) -> bool:
     """Publish user notification"""
     return redis_manager.publish_user_notification(user_id, notification)
+
+def append_audio_chunk(session_id: str, chunk: bytes, ttl: int = 3600) -> Optional[int]:
+    """Append a raw audio chunk to the session's binary buffer"""
+    return redis_manager.append_audio_chunk(session_id, chunk, ttl)
+
+def set_audio_buffer(session_id: str, audio: bytes, ttl: int = 3600) -> bool:
+    """Replace the session's raw audio buffer"""
+    return redis_manager.set_audio_buffer(session_id, audio, ttl)
+
+def get_audio_buffer(session_id: str) -> Optional[bytes]:
+    """Get the session's raw audio buffer"""
+    return redis_manager.get_audio_buffer(session_id)
+
+def clear_audio_buffer(session_id: str) -> bool:
+    """Clear the session's raw audio buffer"""
+    return redis_manager.clear_audio_buffer(session_id)
@@ -1,26 +1,25 @@
 from flask import Blueprint, request, jsonify, render_template, Response
 from flask_socketio import emit, join_room, leave_room
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from langgraph.graph import StateGraph
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 import asyncio
 import json
 import os
 import logging
+import queue
 import time
 import sentry_sdk
 
-# Apply nest_asyncio to allow nested event loops (needed for eventlet compatibility)
-try:
-    import nest_asyncio
-    nest_asyncio.apply()
-except ImportError:
-    pass  # nest_asyncio not available, may cause issues with eventlet
+# Agent coroutines run on the persistent agent runtime loop (convonet.agent_runtime)
+# instead of asyncio.run() per request, so nest_asyncio is no longer needed here.
 
 from twilio.twiml.voice_response import VoiceResponse, Connect, Gather
 from .state import AgentState
 from .assistant_graph_todo import get_agent, TodoAgent
 from .voice_intent_utils import has_transfer_intent
+from .agent_runtime import get_agent_runtime
+from .scaling import create_agent_checkpointer
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
 # Import new authentication and team routes (optional - commented out as api_routes moved to archive)
@@ -34,6 +33,7 @@ logger = logging.getLogger(__name__)
 # Global agent graph cache (initialized on first use)
 _agent_graph_cache = None
 _agent_graph_lock = asyncio.Lock()
+_mcp_client = None  # Kept alive alongside the cached graph (owned by the agent runtime loop)
 
 convonet_todo_bp = Blueprint(
     'convonet_todo',
@@ -609,7 +609,7 @@ def process_audio_webhook():
             
             with sentry_sdk.start_span(op="agent_processing", description="LangGraph agent execution"):
                 try:
-                    agent_result = asyncio.run(asyncio.wait_for(
+                    agent_result = get_agent_runtime().run(
                         _run_agent_async(
                             transcribed_text,
                             user_id=user_id,
@@ -617,7 +617,7 @@ def process_audio_webhook():
                             include_metadata=True
                         ),
                         timeout=12.0  # Reduced from 30 to 12 seconds to stay under Twilio's 15s timeout
-                    ))
+                    )
                     if isinstance(agent_result, dict):
                         agent_response = agent_result.get("response", "")
                         transfer_marker = agent_result.get("transfer_marker")
@@ -800,8 +800,12 @@ def index():
 
 
 async def _get_agent_graph() -> StateGraph:
-    """Helper to initialize the agent graph with tools (cached for performance)."""
-    global _agent_graph_cache
+    """Helper to initialize the agent graph with tools (cached for performance).
+    
+    Must run on the agent runtime loop (see convonet.agent_runtime), which owns
+    the graph, the MCP client and the shared async HTTP client.
+    """
+    global _agent_graph_cache, _mcp_client
     
     # Return cached graph if available
     if _agent_graph_cache is not None:
@@ -896,8 +900,13 @@ async def _get_agent_graph() -> StateGraph:
             
             print("🔧 Building agent graph...")
             
-            # Build and cache the graph
-            _agent_graph_cache = TodoAgent(tools=tools).build_graph()
+            # Build and cache the graph (LLM calls reuse the runtime's connection pool)
+            _mcp_client = client
+            _agent_graph_cache = TodoAgent(
+                tools=tools,
+                http_async_client=get_agent_runtime().get_http_client(),
+                checkpointer=await create_agent_checkpointer()
+            ).build_graph()
             print("✅ Agent graph cached for future requests")
             
             return _agent_graph_cache
@@ -956,6 +965,75 @@ async def _run_agent_for_pin_verification(pin: str) -> str:
         traceback.print_exc()
         return f"AUTHENTICATION_ERROR: {str(e)}"
 
+def _agent_unavailable_response(prompt: str) -> str:
+    """Response used when the agent graph cannot be initialized"""
+    lower_prompt = prompt.lower()
+    fallback_extension = os.getenv('VOICE_AGENT_FALLBACK_EXTENSION', '2001')
+    fallback_department = os.getenv('VOICE_AGENT_FALLBACK_DEPARTMENT', 'support')
+    transfer_keywords = [
+        "transfer",
+        "speak to a human",
+        "human agent",
+        "talk to an agent",
+        "representative",
+        "customer service",
+        "live agent"
+    ]
+    if any(keyword in lower_prompt for keyword in transfer_keywords):
+        reason = "Automated transfer triggered due to assistant service interruption"
+        print(f"🔄 Fallback transfer to extension {fallback_extension} ({fallback_department}) because agent initialization failed.")
+        return f"TRANSFER_INITIATED:{fallback_extension}|{fallback_department}|{reason}"
+    return "I'm sorry, there's a temporary system issue. Please try again in a moment."
+
+
+def _agent_thread_id(user_id: Optional[str] = None, reset_thread: bool = False) -> str:
+    """LangGraph thread for a caller's conversation"""
+    # Use timestamped thread ID after errors to start fresh conversation
+    thread_suffix = f"-{int(time.time())}" if reset_thread else ""
+    return f"user-{user_id}{thread_suffix}" if user_id else f"flask-thread-1{thread_suffix}"
+
+
+def _build_agent_input(
+    prompt: str,
+    user_id: Optional[str] = None,
+    user_name: Optional[str] = None,
+    reset_thread: bool = False
+) -> tuple:
+    """Build the input state and run config (thread_id) for one agent turn"""
+    input_state = AgentState(
+        messages=[HumanMessage(content=prompt)],
+        customer_id="",
+        authenticated_user_id=user_id,
+        authenticated_user_name=user_name,
+        is_authenticated=bool(user_id)
+    )
+    
+    thread_id = _agent_thread_id(user_id, reset_thread)
+    config = {"configurable": {"thread_id": thread_id}}
+    
+    # Debug logging
+    if reset_thread:
+        print(f"🆕 Using FRESH thread_id: {thread_id} (reset=True)")
+    else:
+        print(f"📝 Using existing thread_id: {thread_id} (reset=False)")
+    return input_state, config
+
+
+def _agent_error_marker(e: Exception) -> str:
+    """Map an agent execution error to the special markers detected upstream"""
+    print(f"Error in agent execution: {e}")
+    error_str = str(e)
+    if "tool_call" in error_str.lower():
+        return f"AGENT_ERROR:tool_call_incomplete:{error_str[:100]}"
+    elif "BrokenResourceError" in error_str:
+        return "AGENT_ERROR:broken_resource:Connection issue with database"
+    else:
+        return f"AGENT_ERROR:general:{error_str[:100]}"
+
+
+AGENT_TIMEOUT_RESPONSE = "AGENT_TIMEOUT: Taking too long to process. Please try a simpler request."
+
+
 async def _run_agent_async(
     prompt: str,
     user_id: Optional[str] = None,
@@ -975,42 +1053,9 @@ async def _run_agent_async(
         agent_graph = await _get_agent_graph()
     except Exception as e:
         print(f"❌ Failed to initialize agent: {e}")
-        lower_prompt = prompt.lower()
-        fallback_extension = os.getenv('VOICE_AGENT_FALLBACK_EXTENSION', '2001')
-        fallback_department = os.getenv('VOICE_AGENT_FALLBACK_DEPARTMENT', 'support')
-        transfer_keywords = [
-            "transfer",
-            "speak to a human",
-            "human agent",
-            "talk to an agent",
-            "representative",
-            "customer service",
-            "live agent"
-        ]
-        if any(keyword in lower_prompt for keyword in transfer_keywords):
-            reason = "Automated transfer triggered due to assistant service interruption"
-            print(f"🔄 Fallback transfer to extension {fallback_extension} ({fallback_department}) because agent initialization failed.")
-            return f"TRANSFER_INITIATED:{fallback_extension}|{fallback_department}|{reason}"
-        return "I'm sorry, there's a temporary system issue. Please try again in a moment."
+        return _agent_unavailable_response(prompt)
 
-    input_state = AgentState(
-        messages=[HumanMessage(content=prompt)],
-        customer_id="",
-        authenticated_user_id=user_id,
-        authenticated_user_name=user_name,
-        is_authenticated=bool(user_id)
-    )
-    
-    # Use timestamped thread ID after errors to start fresh conversation
-    thread_suffix = f"-{int(time.time())}" if reset_thread else ""
-    thread_id = f"user-{user_id}{thread_suffix}" if user_id else f"flask-thread-1{thread_suffix}"
-    config = {"configurable": {"thread_id": thread_id}}
-    
-    # Debug logging
-    if reset_thread:
-        print(f"🆕 Using FRESH thread_id: {thread_id} (reset=True)")
-    else:
-        print(f"📝 Using existing thread_id: {thread_id} (reset=False)")
+    input_state, config = _build_agent_input(prompt, user_id, user_name, reset_thread)
 
     # Stream through the graph to execute the agent logic with timeout
     try:
@@ -1032,7 +1077,7 @@ async def _run_agent_async(
                                 print(f"🔄 Transfer marker detected in tool result: {transfer_marker}")
             
             # Get final state and last message
-            final_state = agent_graph.get_state(config=config)
+            final_state = await agent_graph.aget_state(config)
             last_message = final_state.values.get("messages")[-1]
             final_response = getattr(last_message, 'content', "")
             
@@ -1050,18 +1095,240 @@ async def _run_agent_async(
         return await asyncio.wait_for(process_stream(), timeout=20.0)  # Increased to 20 seconds for multiple tool execution
     except asyncio.TimeoutError:
         # Return a special marker for timeout
-        return "AGENT_TIMEOUT: Taking too long to process. Please try a simpler request."
+        return AGENT_TIMEOUT_RESPONSE
     except Exception as e:
-        print(f"Error in agent execution: {e}")
-        error_str = str(e)
-        
         # Return special markers for specific errors so they can be detected upstream
-        if "tool_call" in error_str.lower():
-            return f"AGENT_ERROR:tool_call_incomplete:{error_str[:100]}"
-        elif "BrokenResourceError" in error_str:
-            return "AGENT_ERROR:broken_resource:Connection issue with database"
-        else:
-            return f"AGENT_ERROR:general:{error_str[:100]}"
+        return _agent_error_marker(e)
+
+
+def _speculative_thread_id(user_id: Optional[str], spec_id: int) -> str:
+    """Thread holding a speculative fork of the caller's conversation"""
+    return f"{_agent_thread_id(user_id)}:spec-{spec_id}"
+
+
+async def _run_agent_speculative(
+    prompt: str,
+    user_id: Optional[str],
+    user_name: Optional[str],
+    spec_thread_id: str
+) -> Optional[dict]:
+    """Runs the agent on a fork of the caller's thread (see convonet.speculation).
+    
+    The fork starts from the thread's latest checkpoint. Tools that are not read-only
+    raise SpeculationBlocked in the tools node, which leaves the fork paused right
+    before its tool call. Returns the fork description _commit_speculative_run
+    applies, or None if the run failed or timed out.
+    """
+    from .speculation import SpeculationBlocked
+    
+    try:
+        agent_graph = await _get_agent_graph()
+    except Exception as e:
+        print(f"❌ Failed to initialize agent: {e}")
+        return None
+    
+    input_state, base_config = _build_agent_input(prompt, user_id, user_name)
+    spec_config = {"configurable": {"thread_id": spec_thread_id, "speculative": True}}
+    
+    base = await agent_graph.aget_state(base_config)
+    base_messages = base.values.get("messages", []) if base.values else []
+    if base.values:
+        await agent_graph.aupdate_state(spec_config, base.values, as_node="assistant")
+    
+    async def process_stream():
+        async for _ in agent_graph.astream(input=input_state, stream_mode="values", config=spec_config):
+            pass
+    
+    blocked = False
+    try:
+        await asyncio.wait_for(process_stream(), timeout=20.0)
+    except SpeculationBlocked as e:
+        blocked = True
+        print(f"🔮 Speculative run paused before mutating tool(s): {e.tool_names}")
+    except Exception as e:
+        print(f"⚠️ Speculative agent run failed: {e!r}")
+        await _discard_speculative_run(spec_thread_id)
+        return None
+    
+    return {
+        "base_config": base_config,
+        "base_checkpoint_id": base.config.get("configurable", {}).get("checkpoint_id"),
+        "base_count": len(base_messages),
+        "spec_config": spec_config,
+        "blocked": blocked
+    }
+
+
+async def _commit_speculative_run(spec: dict) -> Optional[dict]:
+    """Applies a speculative fork to the caller's real thread.
+    
+    Returns {"response", "transfer_marker"} like _run_agent_async(include_metadata=True),
+    or None if the real thread moved on since the fork (nothing is applied then).
+    A fork paused before a mutating tool is resumed on the real thread, so the tool
+    runs once, after the final transcript confirmed the request.
+    """
+    from .activity_log import get_activity_log
+    
+    agent_graph = await _get_agent_graph()
+    base_config = spec["base_config"]
+    try:
+        base = await agent_graph.aget_state(base_config)
+        if base.config.get("configurable", {}).get("checkpoint_id") != spec["base_checkpoint_id"]:
+            return None
+        
+        fork = await agent_graph.aget_state(spec["spec_config"])
+        values = dict(fork.values)
+        new_messages = values.pop("messages")[spec["base_count"]:]
+        await agent_graph.aupdate_state(base_config, {**values, "messages": new_messages}, as_node="assistant")
+        # The fork ran with activity recording off; record what it contributed to the real thread
+        get_activity_log().backfill_from_messages(base_config["configurable"]["thread_id"], new_messages,
+                                                 complete=False)
+        
+        if spec["blocked"]:
+            async def resume():
+                async for _ in agent_graph.astream(None, stream_mode="values", config=base_config):
+                    pass
+            try:
+                await asyncio.wait_for(resume(), timeout=20.0)
+            except asyncio.TimeoutError:
+                return {"response": AGENT_TIMEOUT_RESPONSE, "transfer_marker": None}
+            except Exception as e:
+                return {"response": _agent_error_marker(e), "transfer_marker": None}
+            new_messages = (await agent_graph.aget_state(base_config)).values["messages"][spec["base_count"]:]
+    finally:
+        await _discard_speculative_run(spec["spec_config"]["configurable"]["thread_id"])
+    
+    transfer_marker = None
+    for msg in new_messages:
+        if isinstance(getattr(msg, 'content', None), str) and 'TRANSFER_INITIATED:' in msg.content:
+            transfer_marker = msg.content
+            print(f"🔄 Transfer marker detected in tool result: {transfer_marker}")
+    return {"response": getattr(new_messages[-1], 'content', ""), "transfer_marker": transfer_marker}
+
+
+async def _discard_speculative_run(spec_thread_id: str):
+    """Drops a speculative fork's checkpoints"""
+    try:
+        checkpointer = (await _get_agent_graph()).checkpointer
+        if checkpointer is not None and hasattr(checkpointer, "adelete_thread"):
+            await checkpointer.adelete_thread(spec_thread_id)
+    except Exception as e:
+        print(f"⚠️ Failed to discard speculative thread {spec_thread_id}: {e}")
+
+
+async def _stream_agent_async(
+    prompt: str,
+    user_id: Optional[str] = None,
+    user_name: Optional[str] = None,
+    reset_thread: bool = False,
+    timeout: float = 20.0
+) -> AsyncIterator[dict]:
+    """Runs the agent and yields the assistant's text as it is generated.
+    
+    Yields {"type": "delta", "text": ...} for each token chunk produced by the
+    assistant node, followed by exactly one
+    {"type": "done", "response": ..., "transfer_marker": ...} event carrying the
+    same values _run_agent_async(include_metadata=True) returns (or its
+    AGENT_TIMEOUT / AGENT_ERROR markers).
+    
+    Assistant turns that end in a tool call stop producing deltas as soon as the
+    call starts, so callers only speak text meant for the user.
+    """
+    try:
+        agent_graph = await _get_agent_graph()
+    except Exception as e:
+        print(f"❌ Failed to initialize agent: {e}")
+        yield {"type": "done", "response": _agent_unavailable_response(prompt), "transfer_marker": None}
+        return
+
+    input_state, config = _build_agent_input(prompt, user_id, user_name, reset_thread)
+
+    transfer_marker = None
+    final_response = ""
+    tool_call_message_ids = set()
+    deadline = asyncio.get_running_loop().time() + timeout
+    stream = agent_graph.astream(input=input_state, stream_mode=["messages", "values"], config=config)
+    try:
+        while True:
+            async with asyncio.timeout_at(deadline):
+                try:
+                    mode, payload = await anext(stream)
+                except StopAsyncIteration:
+                    break
+
+            if mode == "messages":
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") != "assistant" or not isinstance(chunk, AIMessageChunk):
+                    continue
+                if chunk.tool_call_chunks:
+                    tool_call_message_ids.add(chunk.id)
+                if chunk.id in tool_call_message_ids:
+                    continue
+                if isinstance(chunk.content, str) and chunk.content:
+                    yield {"type": "delta", "text": chunk.content}
+            elif mode == "values" and payload.get("messages"):
+                for msg in payload["messages"]:
+                    # Check for TRANSFER_INITIATED in tool message content
+                    if isinstance(getattr(msg, 'content', None), str) and 'TRANSFER_INITIATED:' in msg.content:
+                        if transfer_marker != msg.content:
+                            print(f"🔄 Transfer marker detected in tool result: {msg.content}")
+                        transfer_marker = msg.content
+                final_response = getattr(payload["messages"][-1], 'content', "")
+    except TimeoutError:
+        final_response = AGENT_TIMEOUT_RESPONSE
+    except Exception as e:
+        final_response = _agent_error_marker(e)
+    finally:
+        await stream.aclose()
+
+    yield {"type": "done", "response": final_response, "transfer_marker": transfer_marker}
+
+
+def iter_agent_stream(
+    prompt: str,
+    user_id: Optional[str] = None,
+    user_name: Optional[str] = None,
+    reset_thread: bool = False,
+    is_cancelled=None
+) -> Iterator[dict]:
+    """Synchronous view of _stream_agent_async for Flask/Socket.IO handlers.
+    
+    The async generator runs on the agent runtime loop and hands events over
+    through a queue, so the caller can start TTS on the first sentence while
+    the LLM is still generating the rest. Closing the iterator early, or
+    is_cancelled() turning true, cancels the agent task on the loop.
+    """
+    events = queue.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for event in _stream_agent_async(prompt, user_id, user_name, reset_thread):
+                events.put(event)
+        except Exception as e:
+            events.put({"type": "done", "response": _agent_error_marker(e), "transfer_marker": None})
+        finally:
+            events.put(finished)
+
+    future = get_agent_runtime().submit(pump())
+    try:
+        while True:
+            if is_cancelled and is_cancelled():
+                return
+            try:
+                event = events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if event is finished:
+                return
+            yield event
+    finally:
+        future.cancel()
+
+
+def is_streaming_agent_enabled() -> bool:
+    """Token streaming from the agent into TTS (disable with STREAMING_AGENT=false)"""
+    return os.getenv('STREAMING_AGENT', 'true').lower() == 'true'
 
 
 @convonet_todo_bp.route('/run_agent', methods=['POST'])
@@ -1072,7 +1339,7 @@ def run_agent():
         return jsonify({"error": "Missing 'prompt' in JSON body"}), 400
 
     try:
-        result = asyncio.run(_run_agent_async(prompt))
+        result = get_agent_runtime().run(_run_agent_async(prompt))
         return jsonify({"result": result})
     except Exception as e:
         # Log the full error for debugging
@@ -0,0 +1,264 @@
+"""
+Horizontal Scaling for the WebRTC Voice Server
+Socket.IO message queue, per-session worker ownership and cross-worker routing of voice events
+
+A websocket stays on the worker that accepted it, but that worker holds state that
+cannot be serialized (the turn registry, streaming STT socket, VAD, speculation). With
+SCALE_OUT=true (or SOCKETIO_MESSAGE_QUEUE set) several gunicorn workers/nodes share:
+
+- a Redis Socket.IO message queue, so socketio.emit(room=sid) reaches the client from any worker
+- `session_owner:{sid}` -> worker id, claimed on connect and released on disconnect
+- a Redis pub/sub WorkerBus: a stop_recording/cancel (or HTTP action) that lands on a
+  worker which does not own the session is forwarded to the owner and run there
+- the agent checkpointer in Postgres (AGENT_CHECKPOINTER=postgres), so a caller's
+  LangGraph thread continues on whichever worker serves the next turn
+
+Session fields and audio buffers already live in Redis (session_cache / redis_manager).
+"""
+
+import base64
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from convonet.redis_manager import redis_manager
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_manager = None
+    REDIS_AVAILABLE = False
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+SOCKETIO_CHANNEL = os.getenv('SOCKETIO_CHANNEL', 'convonet-socketio')
+OWNER_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+
+_BYTES_MARKER = "__b64__"
+
+
+def is_scale_out_enabled() -> bool:
+    """Multi-worker mode is on with SCALE_OUT=true or an explicit SOCKETIO_MESSAGE_QUEUE"""
+    return os.getenv('SCALE_OUT', 'false').lower() == 'true' or bool(os.getenv('SOCKETIO_MESSAGE_QUEUE'))
+
+
+def get_socketio_message_queue() -> Optional[str]:
+    """Redis URL for SocketIO(message_queue=...), or None on a single worker"""
+    url = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    if url:
+        return url
+    if not is_scale_out_enabled():
+        return None
+    url = os.getenv('REDIS_URL')
+    if url:
+        return url
+    password = os.getenv('REDIS_PASSWORD', '')
+    auth = f":{password}@" if password else ""
+    return f"redis://{auth}{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/{os.getenv('REDIS_DB', '0')}"
+
+
+def _redis_ready() -> bool:
+    return REDIS_AVAILABLE and redis_manager.is_available()
+
+
+# --- Session ownership ---
+
+def claim_session(session_id: str):
+    """Record this worker as the owner of a Socket.IO session"""
+    if not is_scale_out_enabled() or not _redis_ready():
+        return
+    try:
+        redis_manager.redis_client.setex(f"session_owner:{session_id}", OWNER_TTL_SECONDS, WORKER_ID)
+    except Exception as e:
+        print(f"⚠️ Scaling: failed to claim session {session_id}: {e}")
+
+
+def release_session(session_id: str):
+    """Drop the ownership record if this worker still holds it"""
+    if not is_scale_out_enabled() or not _redis_ready():
+        return
+    try:
+        key = f"session_owner:{session_id}"
+        if redis_manager.redis_client.get(key) == WORKER_ID:
+            redis_manager.redis_client.delete(key)
+    except Exception as e:
+        print(f"⚠️ Scaling: failed to release session {session_id}: {e}")
+
+
+def get_session_owner(session_id: str) -> Optional[str]:
+    """Worker id owning the session (this worker when not scaled out or unknown)"""
+    if not is_scale_out_enabled() or not _redis_ready():
+        return WORKER_ID
+    try:
+        return redis_manager.redis_client.get(f"session_owner:{session_id}")
+    except Exception as e:
+        print(f"⚠️ Scaling: owner lookup failed for {session_id}: {e}")
+        return None
+
+
+def owns_session(session_id: str) -> bool:
+    owner = get_session_owner(session_id)
+    # Unknown owner (expired or Redis hiccup): handle it here rather than drop it
+    return owner is None or owner == WORKER_ID
+
+
+# --- Cross-worker event routing ---
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_BYTES_MARKER: base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {_BYTES_MARKER}:
+            return base64.b64decode(value[_BYTES_MARKER])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+class WorkerBus:
+    """Redis pub/sub channel per worker for actions that must run on a session's owner"""
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[str, Any], None]] = {}
+        self._listening = False
+        self._lock = threading.Lock()
+        self.stats = {'forwarded': 0, 'received': 0, 'local': 0, 'errors': 0}
+
+    @property
+    def channel(self) -> str:
+        return f"voice_worker:{WORKER_ID}"
+
+    def register(self, action: str, handler: Callable[[str, Any], None]):
+        """handler(session_id, payload) runs on the owning worker"""
+        self._handlers[action] = handler
+
+    def start(self, spawn: Callable = None) -> bool:
+        """Subscribe to this worker's channel (no-op unless scaled out with Redis)"""
+        if not is_scale_out_enabled() or not _redis_ready():
+            return False
+        with self._lock:
+            if self._listening:
+                return False
+            self._listening = True
+        spawn = spawn or (lambda fn: threading.Thread(target=fn, name="voice-worker-bus", daemon=True).start())
+        spawn(self._listen)
+        print(f"📡 Worker bus listening on {self.channel}")
+        return True
+
+    def _listen(self):
+        import redis
+
+        # Dedicated connection: the shared client's socket_timeout would end an idle subscription
+        client = redis.Redis(decode_responses=True, **{**redis_manager._connection_kwargs, 'socket_timeout': None})
+        while True:
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._handle_message(message)
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"❌ Worker bus: subscription lost ({e}); resubscribing")
+                time.sleep(1.0)
+
+    def _handle_message(self, message: dict):
+        try:
+            envelope = json.loads(message['data'])
+            self.stats['received'] += 1
+            self._run(envelope['action'], envelope['session_id'], _decode(envelope.get('payload')))
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"❌ Worker bus: failed to handle message: {e}")
+
+    def _run(self, action: str, session_id: str, payload: Any):
+        handler = self._handlers.get(action)
+        if handler is None:
+            print(f"⚠️ Worker bus: no handler for {action}")
+            return
+        handler(session_id, payload)
+
+    def dispatch(self, session_id: str, action: str, payload: Any = None) -> bool:
+        """Run the action here if this worker owns the session, else forward it to the owner
+
+        Returns True if it ran locally.
+        """
+        owner = get_session_owner(session_id)
+        if owner is None or owner == WORKER_ID:
+            self.stats['local'] += 1
+            self._run(action, session_id, payload)
+            return True
+        try:
+            envelope = {'action': action, 'session_id': session_id, 'payload': _encode(payload), 'from': WORKER_ID}
+            receivers = redis_manager.redis_client.publish(f"voice_worker:{owner}", json.dumps(envelope))
+        except Exception as e:
+            receivers = 0
+            print(f"⚠️ Worker bus: publish to {owner} failed: {e}")
+        if not receivers:
+            # Owner is gone (crashed/recycled): take the session over
+            print(f"⚠️ Worker bus: owner {owner} of {session_id} unreachable, handling {action} here")
+            claim_session(session_id)
+            self.stats['local'] += 1
+            self._run(action, session_id, payload)
+            return True
+        self.stats['forwarded'] += 1
+        print(f"📡 Forwarded {action} for {session_id} to {owner}")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'worker_id': WORKER_ID, 'scale_out': is_scale_out_enabled(), 'listening': self._listening}
+
+
+# Global worker bus
+worker_bus = WorkerBus()
+
+
+def get_worker_bus() -> WorkerBus:
+    return worker_bus
+
+
+# --- Shared agent checkpointer ---
+
+async def create_agent_checkpointer():
+    """Checkpointer for the agent graph
+
+    AGENT_CHECKPOINTER=postgres (the default when scaled out) stores LangGraph threads in
+    DB_URI via langgraph-checkpoint-postgres, so every worker sees the same conversation;
+    otherwise (or if the package is missing) threads stay in this worker's memory.
+    """
+    from langgraph.checkpoint.memory import InMemorySaver
+
+    backend = os.getenv('AGENT_CHECKPOINTER', 'postgres' if is_scale_out_enabled() else 'memory').lower()
+    if backend != 'postgres':
+        return InMemorySaver()
+    db_uri = os.getenv('DB_URI')
+    if not db_uri:
+        print("⚠️ AGENT_CHECKPOINTER=postgres but DB_URI is not set; using in-memory checkpointer")
+        return InMemorySaver()
+    try:
+        from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        from psycopg_pool import AsyncConnectionPool
+    except ImportError as e:
+        print(f"⚠️ Postgres checkpointer not available ({e}); using in-memory checkpointer")
+        return InMemorySaver()
+
+    pool = AsyncConnectionPool(
+        conninfo=db_uri.replace('postgresql+psycopg2://', 'postgresql://'),
+        max_size=int(os.getenv('AGENT_CHECKPOINTER_POOL_SIZE', '5')),
+        kwargs={'autocommit': True, 'prepare_threshold': 0},
+        open=False,
+    )
+    await pool.open()
+    checkpointer = AsyncPostgresSaver(pool)
+    await checkpointer.setup()
+    print("✅ Agent checkpointer: Postgres (shared across workers)")
+    return checkpointer
@@ -0,0 +1,322 @@
+"""
+Voice Session Cache for the WebRTC Voice Assistant
+Typed per-process session objects with coalesced write-behind to the Redis session hash
+
+Socket.IO handlers used to HGETALL `session:{sid}` and parse 'True'/'False' strings on
+every event, including every audio_data chunk. Sessions now live in a local dict keyed by
+request.sid; Redis is only read on a cache miss (e.g. a session created by another worker),
+and mutations are marked dirty and written back by a background flusher that batches
+HSET + EXPIRE for all dirty sessions in one pipeline. The Redis hash keeps its original
+field names and string encoding, so the audio player and debug endpoints read it unchanged.
+When Redis is unavailable the cache is the session store (replacing the old active_sessions dict).
+
+Scaled out across workers (see scaling.py), only sessions created on this worker are
+cached; a session owned by another worker is read from Redis on every get() and its
+updates are written through immediately, so no worker acts on a stale copy.
+"""
+
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Optional
+
+try:
+    from convonet.redis_manager import redis_manager
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_manager = None
+    REDIS_AVAILABLE = False
+
+from convonet.scaling import is_scale_out_enabled
+
+# Attribute name -> Redis hash field (only attributes listed here are persisted)
+REDIS_FIELDS = {
+    'authenticated': 'authenticated',
+    'user_id': 'user_id',
+    'user_name': 'user_name',
+    'is_recording': 'is_recording',
+    'transfer_in_progress': 'transfer_in_progress',
+    'connected_at': 'connected_at',
+    'authenticated_at': 'authenticated_at',
+    'audio_blob': 'audio_buffer',
+    'resume_token': 'resume_token',
+    'audio_format': 'audio_format',
+}
+
+
+def _to_bool(value: Any) -> bool:
+    return str(value).lower() == 'true'
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class VoiceSession:
+    """State of one /voice Socket.IO connection"""
+    session_id: str
+    authenticated: bool = False
+    user_id: str = ''
+    user_name: str = ''
+    is_recording: bool = False
+    transfer_in_progress: bool = False
+    connected_at: float = field(default_factory=time.time)
+    authenticated_at: Optional[float] = None
+    # Complete base64 recording from stop_recording (read by the audio player)
+    audio_blob: str = ''
+    # Current resume token (see session_resume.py)
+    resume_token: str = ''
+    # AudioFormat declared at start_recording (AudioFormat.to_session_value(); '' if none)
+    audio_format: str = ''
+    # Chunk buffer used only when Redis is unavailable (never persisted)
+    audio_chunks: bytearray = field(default_factory=bytearray)
+
+    def to_redis(self, names=None) -> Dict[str, str]:
+        """Encode persisted attributes as Redis hash fields ('True'/'False' for booleans)"""
+        mapping = {}
+        for name in names if names is not None else REDIS_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, bool):
+                value = 'True' if value else 'False'
+            mapping[REDIS_FIELDS[name]] = '' if value is None else str(value)
+        return mapping
+
+    @classmethod
+    def from_redis(cls, session_id: str, data: Dict[str, Any]) -> "VoiceSession":
+        """Decode a Redis session hash"""
+        return cls(
+            session_id=session_id,
+            authenticated=_to_bool(data.get('authenticated')),
+            user_id=data.get('user_id') or '',
+            user_name=data.get('user_name') or '',
+            is_recording=_to_bool(data.get('is_recording')),
+            transfer_in_progress=_to_bool(data.get('transfer_in_progress')),
+            connected_at=_to_float(data.get('connected_at')) or time.time(),
+            authenticated_at=_to_float(data.get('authenticated_at')),
+            audio_blob=data.get('audio_buffer') or '',
+            resume_token=data.get('resume_token') or '',
+            audio_format=data.get('audio_format') or '',
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict view for helpers that take session_data dicts (profiles, transfers)"""
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name in REDIS_FIELDS and f.name != 'resume_token'}
+
+
+class SessionCache:
+    """Local VoiceSession cache with write-behind to Redis"""
+
+    def __init__(self, flush_interval: Optional[float] = None, ttl: Optional[int] = None, shared: Optional[bool] = None):
+        self.flush_interval = flush_interval if flush_interval is not None else \
+            int(os.getenv('SESSION_CACHE_FLUSH_MS', '100')) / 1000.0
+        self.ttl = ttl if ttl is not None else int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+        self.shared = shared if shared is not None else is_scale_out_enabled()
+        self._sessions: Dict[str, VoiceSession] = {}
+        self._dirty: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {'hits': 0, 'misses': 0, 'redis_reads': 0, 'updates': 0, 'flushes': 0, 'fields_written': 0,
+                      'flush_errors': 0, 'write_through': 0}
+
+    @property
+    def redis_available(self) -> bool:
+        return REDIS_AVAILABLE and redis_manager.is_available()
+
+    @property
+    def storage(self) -> str:
+        return "redis" if self.redis_available else "memory"
+
+    def _mark_dirty(self, session_id: str, names):
+        if not self.redis_available:
+            return
+        self._dirty.setdefault(session_id, set()).update(names)
+        self._ensure_flusher()
+        self._wake.set()
+
+    def create(self, session_id: str, **values) -> VoiceSession:
+        """Register a new session (all persisted fields are written on the next flush)"""
+        session = VoiceSession(session_id=session_id, **values)
+        with self._lock:
+            self._sessions[session_id] = session
+            self._mark_dirty(session_id, REDIS_FIELDS)
+        return session
+
+    def get(self, session_id: str) -> Optional[VoiceSession]:
+        """Cached session, loading it from Redis only on a miss"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self.stats['hits'] += 1
+            return session
+        self.stats['misses'] += 1
+        if not self.redis_available:
+            return None
+        try:
+            self.stats['redis_reads'] += 1
+            data = redis_manager.redis_client.hgetall(f"session:{session_id}")
+        except Exception as e:
+            print(f"⚠️ Session cache: Redis read failed for {session_id}: {e}")
+            return None
+        if not data:
+            return None
+        if self.shared:
+            # Owned by another worker: don't keep a copy that its updates would make stale
+            return VoiceSession.from_redis(session_id, data)
+        with self._lock:
+            # Another thread may have loaded or created it meanwhile
+            return self._sessions.setdefault(session_id, VoiceSession.from_redis(session_id, data))
+
+    def adopt(self, session_id: str) -> Optional[VoiceSession]:
+        """Cache a session created on another worker locally (this worker now owns it, e.g. after a resume)"""
+        session = self._sessions.get(session_id)
+        if session is not None or not self.redis_available:
+            return session
+        try:
+            self.stats['redis_reads'] += 1
+            data = redis_manager.redis_client.hgetall(f"session:{session_id}")
+        except Exception as e:
+            print(f"⚠️ Session cache: Redis read failed for {session_id}: {e}")
+            return None
+        if not data:
+            return None
+        with self._lock:
+            return self._sessions.setdefault(session_id, VoiceSession.from_redis(session_id, data))
+
+    def update(self, session_id: str, **changes) -> VoiceSession:
+        """Apply changes locally and queue them for Redis (creates the session if unknown)"""
+        session = self.get(session_id)
+        if session is None:
+            return self.create(session_id, **changes)
+        if session_id not in self._sessions:
+            return self._write_through(session, changes)
+        with self._lock:
+            for name, value in changes.items():
+                setattr(session, name, value)
+            self.stats['updates'] += 1
+            self._mark_dirty(session_id, [name for name in changes if name in REDIS_FIELDS])
+        return session
+
+    def _write_through(self, session: VoiceSession, changes: Dict[str, Any]) -> VoiceSession:
+        """Update a session this worker does not cache straight in Redis"""
+        for name, value in changes.items():
+            setattr(session, name, value)
+        mapping = session.to_redis([name for name in changes if name in REDIS_FIELDS])
+        if mapping:
+            try:
+                pipe = redis_manager.redis_client.pipeline(transaction=False)
+                pipe.hset(f"session:{session.session_id}", mapping=mapping)
+                pipe.expire(f"session:{session.session_id}", self.ttl)
+                pipe.execute()
+                self.stats['write_through'] += 1
+            except Exception as e:
+                self.stats['flush_errors'] += 1
+                print(f"❌ Session cache write-through failed for {session.session_id}: {e}")
+        return session
+
+    def flush(self) -> int:
+        """Write all dirty fields to Redis now; returns the number of sessions written"""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                batch = {
+                    session_id: self._sessions[session_id].to_redis(names)
+                    for session_id, names in dirty.items()
+                    if session_id in self._sessions and names
+                }
+            if not batch or not self.redis_available:
+                return 0
+            try:
+                pipe = redis_manager.redis_client.pipeline(transaction=False)
+                for session_id, mapping in batch.items():
+                    pipe.hset(f"session:{session_id}", mapping=mapping)
+                    pipe.expire(f"session:{session_id}", self.ttl)
+                pipe.execute()
+            except Exception as e:
+                self.stats['flush_errors'] += 1
+                print(f"❌ Session cache flush failed ({len(batch)} sessions): {e}")
+                # Re-queue so the next flush retries
+                with self._lock:
+                    for session_id in batch:
+                        self._dirty.setdefault(session_id, set()).update(dirty[session_id])
+                return 0
+            self.stats['flushes'] += 1
+            self.stats['fields_written'] += sum(len(mapping) for mapping in batch.values())
+            return len(batch)
+
+    def evict(self, session_id: str, delete: bool = True):
+        """Forget a session locally and (by default) delete its Redis hash"""
+        with self._flush_lock:
+            with self._lock:
+                self._sessions.pop(session_id, None)
+                self._dirty.pop(session_id, None)
+            if delete and self.redis_available:
+                try:
+                    redis_manager.redis_client.delete(f"session:{session_id}")
+                except Exception as e:
+                    print(f"⚠️ Session cache: failed to delete {session_id} from Redis: {e}")
+
+    def expire(self, session_id: str, seconds: int):
+        """Shorten the Redis TTL (e.g. a disconnected session's resume grace period)"""
+        self.flush()
+        if self.redis_available:
+            try:
+                redis_manager.redis_client.expire(f"session:{session_id}", seconds)
+            except Exception as e:
+                print(f"⚠️ Session cache: failed to set TTL for {session_id}: {e}")
+
+    def invalidate(self, session_id: str):
+        """Drop the local copy only; the next get() reloads from Redis"""
+        self.flush()
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _ensure_flusher(self):
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-cache-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wake.wait()
+            # Let a burst of handler updates accumulate into one pipeline
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Session cache flusher error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(len(names) for names in self._dirty.values())
+        return {**self.stats, 'sessions': len(self._sessions), 'pending_fields': pending, 'storage': self.storage,
+                'shared': self.shared}
+
+
+# Global session cache instance
+_session_cache = None
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> SessionCache:
+    """Get or create the process-wide voice session cache"""
+    global _session_cache
+    if _session_cache is None:
+        with _session_cache_lock:
+            if _session_cache is None:
+                _session_cache = SessionCache()
+                atexit.register(_session_cache.flush)
+    return _session_cache
@@ -0,0 +1,189 @@
+"""
+Resumable Voice Sessions for the WebRTC Voice Assistant
+Resume tokens, a grace period on disconnect and re-binding a reconnecting socket to its session
+
+A network blip used to delete the session on disconnect, so the caller had to re-enter
+the PIN, hear the welcome greeting again, and any reply still being generated was lost.
+Now `authenticated` carries a resume token. On disconnect an authenticated session is
+parked for VOICE_RESUME_GRACE_SECONDS instead of deleted. Its turn keeps running, and
+turn results emitted while parked are held in an outbox. A reconnecting client sends
+`resume` with the token. The new sid is then aliased to the original session id, which
+stays canonical for the session cache, turn registry and Socket.IO room. The outbox is
+replayed and a fresh token is issued. Sessions not resumed in time are cleaned up as
+before.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from convonet.redis_manager import redis_manager
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_manager = None
+    REDIS_AVAILABLE = False
+
+# Events worth replaying after a reconnect (status/interim updates are stale by then)
+REPLAY_EVENTS = frozenset({
+    'transcription', 'agent_response', 'agent_response_chunk', 'transfer_initiated', 'transfer_status', 'error'
+})
+MAX_OUTBOX_EVENTS = 64
+
+
+def is_session_resume_enabled() -> bool:
+    """Resumable sessions are on unless VOICE_SESSION_RESUME=false"""
+    return os.getenv('VOICE_SESSION_RESUME', 'true').lower() == 'true'
+
+
+class _ParkedSession:
+    __slots__ = ("parked_at", "outbox", "timer")
+
+    def __init__(self, timer: threading.Timer):
+        self.parked_at = time.time()
+        self.outbox: deque = deque(maxlen=MAX_OUTBOX_EVENTS)
+        self.timer = timer
+
+
+class ResumableSessions:
+    """Resume tokens, parked sessions and live-sid -> session-id aliases (per worker)"""
+
+    def __init__(self, grace_seconds: Optional[int] = None, token_ttl: Optional[int] = None):
+        self.grace_seconds = grace_seconds if grace_seconds is not None else \
+            int(os.getenv('VOICE_RESUME_GRACE_SECONDS', '120'))
+        self.token_ttl = token_ttl if token_ttl is not None else int(os.getenv('SESSION_TTL_SECONDS', '3600'))
+        self._parked: Dict[str, _ParkedSession] = {}
+        self._aliases: Dict[str, str] = {}
+        self._tokens: Dict[str, Tuple[str, float]] = {}  # in-memory fallback: token -> (session_id, expires_at)
+        self._lock = threading.Lock()
+        self.stats = {'issued': 0, 'parked': 0, 'resumed': 0, 'expired': 0, 'rejected': 0, 'replayed_events': 0}
+
+    @property
+    def redis_available(self) -> bool:
+        return REDIS_AVAILABLE and redis_manager.is_available()
+
+    # --- sid aliases ---
+
+    def resolve(self, sid: str) -> str:
+        """Session id for a live Socket.IO sid (itself unless the socket resumed a session)"""
+        return self._aliases.get(sid, sid)
+
+    def bind(self, sid: str, session_id: str):
+        with self._lock:
+            self._aliases[sid] = session_id
+
+    def unbind(self, sid: str) -> str:
+        with self._lock:
+            return self._aliases.pop(sid, sid)
+
+    # --- tokens ---
+
+    def issue_token(self, session_id: str, previous: Optional[str] = None) -> str:
+        """New single-use resume token for the session (revokes `previous`)"""
+        if previous:
+            self.revoke_token(previous)
+        token = secrets.token_urlsafe(24)
+        if self.redis_available:
+            try:
+                redis_manager.redis_client.setex(f"resume_token:{token}", self.token_ttl, session_id)
+            except Exception as e:
+                print(f"⚠️ Session resume: failed to store token in Redis: {e}")
+                return ''
+        else:
+            with self._lock:
+                self._tokens[token] = (session_id, time.time() + self.token_ttl)
+        self.stats['issued'] += 1
+        return token
+
+    def redeem_token(self, token: str) -> Optional[str]:
+        """Session id for a resume token; the token is consumed"""
+        if not token:
+            return None
+        if self.redis_available:
+            try:
+                key = f"resume_token:{token}"
+                pipe = redis_manager.redis_client.pipeline()
+                pipe.get(key)
+                pipe.delete(key)
+                session_id, _ = pipe.execute()
+                return session_id
+            except Exception as e:
+                print(f"⚠️ Session resume: token lookup failed: {e}")
+                return None
+        with self._lock:
+            session_id, expires_at = self._tokens.pop(token, (None, 0.0))
+        return session_id if expires_at > time.time() else None
+
+    def revoke_token(self, token: str):
+        if not token:
+            return
+        if self.redis_available:
+            try:
+                redis_manager.redis_client.delete(f"resume_token:{token}")
+            except Exception as e:
+                print(f"⚠️ Session resume: failed to revoke token: {e}")
+        else:
+            with self._lock:
+                self._tokens.pop(token, None)
+
+    # --- grace period ---
+
+    def park(self, session_id: str, on_expire: Callable[[str], None]):
+        """Keep the session for the grace period; on_expire(session_id) runs if nobody resumes it"""
+        timer = threading.Timer(self.grace_seconds, self._expire, args=(session_id, on_expire))
+        timer.daemon = True
+        with self._lock:
+            previous = self._parked.pop(session_id, None)
+            self._parked[session_id] = _ParkedSession(timer)
+        if previous:
+            previous.timer.cancel()
+        timer.start()
+        self.stats['parked'] += 1
+        print(f"⏸️ Session parked for {self.grace_seconds}s awaiting resume: {session_id}")
+
+    def _expire(self, session_id: str, on_expire: Callable[[str], None]):
+        with self._lock:
+            parked = self._parked.pop(session_id, None)
+        if parked is None:
+            return
+        self.stats['expired'] += 1
+        print(f"⌛ Resume grace period over, ending session: {session_id}")
+        on_expire(session_id)
+
+    def is_parked(self, session_id: str) -> bool:
+        return session_id in self._parked
+
+    def buffer_if_parked(self, session_id: str, event: str, data: dict) -> bool:
+        """Hold an event for replay while the session has no socket; True if it was held"""
+        parked = self._parked.get(session_id)
+        if parked is None:
+            return False
+        if event in REPLAY_EVENTS:
+            parked.outbox.append((event, data))
+        return True
+
+    def unpark(self, session_id: str) -> Optional[List[Tuple[str, dict]]]:
+        """Stop the grace timer and return the held events (None if the session was not parked here)"""
+        with self._lock:
+            parked = self._parked.pop(session_id, None)
+        if parked is None:
+            return None
+        parked.timer.cancel()
+        self.stats['resumed'] += 1
+        self.stats['replayed_events'] += len(parked.outbox)
+        return list(parked.outbox)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, 'parked_now': len(self._parked), 'aliases': len(self._aliases),
+                'grace_seconds': self.grace_seconds, 'enabled': is_session_resume_enabled()}
+
+
+# Global resumable session registry
+resumable_sessions = ResumableSessions()
+
+
+def get_resumable_sessions() -> ResumableSessions:
+    return resumable_sessions
@@ -0,0 +1,180 @@
+"""
+Speculative Agent Execution for the WebRTC Voice Assistant
+Starts the agent on a stable interim transcript while the caller's trailing silence is still being endpointed
+
+When an interim transcript from streaming STT has not changed for SPECULATIVE_STABLE_MS,
+the agent runs against a fork of the caller's LangGraph thread (see
+routes._run_agent_speculative). If the final transcript matches, the fork's messages are
+committed to the real thread and its reply is used directly; otherwise the fork is
+discarded and the turn runs normally. Read-only tools (get_*/search_*) run
+speculatively; a mutating tool call stops the fork, and the commit resumes the real
+thread so the tool only executes once the transcript is confirmed.
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import os
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+from convonet.agent_runtime import get_agent_runtime
+
+READ_ONLY_TOOL_PREFIXES = ("get_", "search_")
+
+speculation_stats = {"started": 0, "committed": 0, "resumed": 0, "discarded": 0, "stale": 0, "failed": 0}
+_spec_ids = itertools.count(1)
+
+
+class SpeculationBlocked(Exception):
+    """Raised in the tools node when a speculative run reaches a mutating tool call"""
+
+    def __init__(self, tool_names):
+        super().__init__(f"mutating tool(s) deferred until commit: {', '.join(tool_names)}")
+        self.tool_names = list(tool_names)
+
+
+def is_speculation_enabled() -> bool:
+    """Speculative agent execution is opt-in via SPECULATIVE_AGENT=true (needs streaming STT)"""
+    return os.getenv('SPECULATIVE_AGENT', 'false').lower() == 'true'
+
+
+def is_read_only_tool(tool_name: str) -> bool:
+    """Tools safe to execute before the transcript is final (extend with SPECULATIVE_READ_ONLY_TOOLS)"""
+    extra = {name.strip() for name in os.getenv('SPECULATIVE_READ_ONLY_TOOLS', '').split(',') if name.strip()}
+    return tool_name in extra or tool_name.startswith(READ_ONLY_TOOL_PREFIXES)
+
+
+def normalize_transcript(text: str) -> str:
+    """Case/punctuation-insensitive form used to match interim and final transcripts"""
+    return " ".join(re.sub(r"[^\w\s']", " ", (text or "").lower()).split())
+
+
+class SpeculativeRun:
+    """One speculative agent run for one interim transcript"""
+
+    def __init__(self, spec_id: int, thread_id: str, text: str, future):
+        self.spec_id = spec_id
+        self.thread_id = thread_id
+        self.text = text
+        self.normalized = normalize_transcript(text)
+        self.future = future
+        self.started_at = time.perf_counter()
+
+
+class Speculator:
+    """Watches one utterance's interim transcripts and speculates once they are stable
+
+    on_interim() is called from the streaming STT receiver; take() is called by the turn
+    pipeline with the final transcript and returns (response, transfer_marker) when the
+    speculation can be committed, or None to run the agent normally.
+    """
+
+    def __init__(self, user_id: str, user_name: str, stable_ms: Optional[int] = None):
+        self.user_id = user_id
+        self.user_name = user_name
+        self.stable_ms = stable_ms if stable_ms is not None else int(os.getenv('SPECULATIVE_STABLE_MS', '250'))
+        self._lock = threading.Lock()
+        self._latest = ""
+        self._timer: Optional[threading.Timer] = None
+        self._run: Optional[SpeculativeRun] = None
+        self._closed = False
+
+    def on_interim(self, text: str):
+        normalized = normalize_transcript(text)
+        with self._lock:
+            if self._closed or not normalized or normalized == self._latest:
+                return
+            self._latest = normalized
+            if self._timer:
+                self._timer.cancel()
+            stale = self._run if self._run and self._run.normalized != normalized else None
+            if stale:
+                self._run = None
+            self._timer = threading.Timer(self.stable_ms / 1000.0, self._on_stable, args=(text, normalized))
+            self._timer.daemon = True
+            self._timer.start()
+        if stale:
+            self._discard_run(stale)
+
+    def _on_stable(self, text: str, normalized: str):
+        from convonet.routes import _run_agent_speculative, _speculative_thread_id
+
+        with self._lock:
+            if self._closed or normalized != self._latest or self._run is not None:
+                return
+            spec_id = next(_spec_ids)
+            thread_id = _speculative_thread_id(self.user_id, spec_id)
+            future = get_agent_runtime().submit(_run_agent_speculative(text, self.user_id, self.user_name, thread_id))
+            self._run = SpeculativeRun(spec_id, thread_id, text, future)
+            speculation_stats["started"] += 1
+        print(f"🔮 Speculating on stable interim transcript: {text}")
+
+    def take(self, final_text: str, cancel_event: Optional[threading.Event] = None,
+             timeout: float = 20.0) -> Optional[Tuple[str, Optional[str]]]:
+        """Commit the speculation if it was made on final_text; None means run the agent normally"""
+        from convonet.routes import _commit_speculative_run
+
+        with self._lock:
+            self._closed = True
+            if self._timer:
+                self._timer.cancel()
+            run, self._run = self._run, None
+        if run is None:
+            return None
+        if run.normalized != normalize_transcript(final_text):
+            print(f"🔮 Speculation missed (interim '{run.text}' != final '{final_text}')")
+            self._discard_run(run)
+            return None
+
+        runtime = get_agent_runtime()
+        try:
+            spec = runtime.run(_await_future(run.future), timeout=timeout, cancel_event=cancel_event)
+        except concurrent.futures.CancelledError:
+            self._discard_run(run)
+            raise
+        except Exception as e:
+            spec = None
+            print(f"⚠️ Speculative run failed: {e}")
+        if spec is None:
+            speculation_stats["failed"] += 1
+            self._discard_run(run)
+            return None
+
+        # The fork is deleted by the commit whether or not it applies
+        result = runtime.run(_commit_speculative_run(spec), timeout=timeout, cancel_event=cancel_event)
+        if result is None:
+            speculation_stats["stale"] += 1
+            print("🔮 Thread changed since the fork; discarding speculation")
+            return None
+        speculation_stats["resumed" if spec["blocked"] else "committed"] += 1
+        print(f"🔮 Speculation committed ({(time.perf_counter() - run.started_at) * 1000:.0f}ms since fork)")
+        return result["response"], result["transfer_marker"]
+
+    def discard(self):
+        """Drop any pending or finished speculation (caller barged in, transfer, disconnect)"""
+        with self._lock:
+            self._closed = True
+            if self._timer:
+                self._timer.cancel()
+            run, self._run = self._run, None
+        if run:
+            self._discard_run(run)
+
+    @staticmethod
+    def _discard_run(run: SpeculativeRun):
+        from convonet.routes import _discard_speculative_run
+
+        speculation_stats["discarded"] += 1
+        run.future.cancel()
+        get_agent_runtime().submit(_discard_speculative_run(run.thread_id))
+
+
+async def _await_future(future):
+    return await asyncio.wrap_future(future)
+
+
+def get_speculation_stats() -> dict:
+    return dict(speculation_stats)
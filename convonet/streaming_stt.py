@@ -0,0 +1,239 @@
+"""
+Streaming Speech-to-Text for the WebRTC Voice Assistant
+Forwards audio chunks to a live transcription websocket while the caller is still talking
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+from convonet.audio_codec import AudioCodecError, AudioFormat, CODEC_MULAW, CODEC_PCM16
+
+logger = logging.getLogger(__name__)
+
+TranscriptCallback = Callable[[str], None]
+
+
+class StreamingTranscriber:
+    """One live transcription stream (one utterance)"""
+
+    def send(self, chunk: bytes) -> bool:
+        """Forward an audio chunk to the provider"""
+        raise NotImplementedError
+
+    def finish(self, timeout: float = 3.0) -> Optional[str]:
+        """Signal end of audio and return the final transcript (None if nothing was recognized)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Abort the stream without waiting for results"""
+        raise NotImplementedError
+
+
+class StreamingSTTProvider:
+    """Base class for pluggable live transcription providers"""
+
+    name = "base"
+
+    def open(self, on_interim: TranscriptCallback = None, on_final: TranscriptCallback = None,
+             language: str = "en", audio_format: Optional[AudioFormat] = None) -> StreamingTranscriber:
+        """Open a new live transcription stream for audio in the negotiated format"""
+        raise NotImplementedError
+
+
+class WebSocketStreamingTranscriber(StreamingTranscriber):
+    """Live transcription over a Deepgram-compatible websocket
+
+    Binary frames carry audio; the server answers with JSON "Results" messages
+    (is_final=False for interim hypotheses, is_final=True for committed segments).
+    A {"type": "CloseStream"} text frame asks the server to flush and close.
+    """
+
+    def __init__(self, url: str, headers: Dict[str, str] = None,
+                 on_interim: TranscriptCallback = None, on_final: TranscriptCallback = None,
+                 connect_timeout: float = 5.0):
+        from websockets.sync.client import connect
+
+        self.on_interim = on_interim
+        self.on_final = on_final
+        self._final_segments: List[str] = []
+        self._closed = threading.Event()
+        self._bytes_sent = 0
+
+        self._connection = connect(url, additional_headers=headers or {}, open_timeout=connect_timeout)
+        self._receiver = threading.Thread(target=self._receive_loop, daemon=True)
+        self._receiver.start()
+
+    @property
+    def bytes_sent(self) -> int:
+        return self._bytes_sent
+
+    def send(self, chunk: bytes) -> bool:
+        if self._closed.is_set() or not chunk:
+            return False
+        try:
+            self._connection.send(chunk)
+            self._bytes_sent += len(chunk)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Streaming STT send failed: {e}")
+            self._closed.set()
+            return False
+
+    def finish(self, timeout: float = 3.0) -> Optional[str]:
+        if not self._closed.is_set():
+            try:
+                self._connection.send(json.dumps({"type": "CloseStream"}))
+            except Exception as e:
+                logger.warning(f"⚠️ Streaming STT close request failed: {e}")
+
+        # The server flushes its final results and then closes the socket
+        self._closed.wait(timeout)
+        self.close()
+
+        transcript = " ".join(self._final_segments).strip()
+        return transcript or None
+
+    def close(self):
+        self._closed.set()
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+
+    def _receive_loop(self):
+        try:
+            for message in self._connection:
+                if isinstance(message, bytes):
+                    continue
+                self._handle_message(message)
+        except Exception as e:
+            if not self._closed.is_set():
+                logger.warning(f"⚠️ Streaming STT receive loop ended: {e}")
+        finally:
+            self._closed.set()
+
+    def _handle_message(self, message: str):
+        try:
+            result = json.loads(message)
+        except ValueError:
+            return
+        if result.get("type") != "Results":
+            return
+
+        alternatives = result.get("channel", {}).get("alternatives") or [{}]
+        text = (alternatives[0].get("transcript") or "").strip()
+        if not text:
+            return
+
+        if result.get("is_final"):
+            self._final_segments.append(text)
+            if self.on_final:
+                self.on_final(" ".join(self._final_segments))
+        elif self.on_interim:
+            self.on_interim(" ".join(self._final_segments + [text]))
+
+
+# Headerless codecs Deepgram's live API can decode -> its encoding name
+DEEPGRAM_RAW_ENCODINGS = {CODEC_PCM16: "linear16", CODEC_MULAW: "mulaw"}
+
+
+def deepgram_audio_params(audio_format: Optional[AudioFormat]) -> Dict[str, str]:
+    """Live-stream query params describing the audio (none for containerized audio)
+
+    The batch API gets raw samples wrapped in a WAV header (encode_audio), but a live
+    stream has no header, so raw codecs must be declared in the URL.
+    """
+    if audio_format is None or not audio_format.is_raw:
+        return {}  # WebM/Ogg Opus from MediaRecorder is auto-detected
+    encoding = DEEPGRAM_RAW_ENCODINGS.get(audio_format.codec)
+    if encoding is None:
+        raise AudioCodecError(f"Deepgram streaming does not accept {audio_format.codec} audio")
+    return {"encoding": encoding, "sample_rate": str(audio_format.sample_rate),
+            "channels": str(audio_format.channels)}
+
+
+class DeepgramStreamingProvider(StreamingSTTProvider):
+    """Deepgram live transcription (wss://api.deepgram.com/v1/listen)
+
+    DEEPGRAM_STREAMING_URL can point at a local fake server (tests/fake_stt_server.py) for
+    offline tests and benchmarks.
+    """
+
+    name = "deepgram"
+
+    def __init__(self, api_key: Optional[str] = None, url: Optional[str] = None, model: str = "nova-2"):
+        self.api_key = api_key or os.getenv('DEEPGRAM_API_KEY')
+        self.url = url or os.getenv('DEEPGRAM_STREAMING_URL', 'wss://api.deepgram.com/v1/listen')
+        self.model = model
+
+    def open(self, on_interim: TranscriptCallback = None, on_final: TranscriptCallback = None,
+             language: str = "en", audio_format: Optional[AudioFormat] = None) -> StreamingTranscriber:
+        params = {
+            "model": self.model,
+            "language": language,
+            "smart_format": "true",
+            "punctuate": "true",
+            "interim_results": "true",
+            "endpointing": "300",
+            **deepgram_audio_params(audio_format),
+        }
+        headers = {"Authorization": f"Token {self.api_key}"} if self.api_key else {}
+        return WebSocketStreamingTranscriber(
+            f"{self.url}?{urlencode(params)}",
+            headers=headers,
+            on_interim=on_interim,
+            on_final=on_final
+        )
+
+
+# Provider registry
+_provider_factories: Dict[str, Callable[[], StreamingSTTProvider]] = {
+    DeepgramStreamingProvider.name: DeepgramStreamingProvider,
+}
+_provider_instances: Dict[str, StreamingSTTProvider] = {}
+
+
+def register_streaming_provider(name: str, factory: Callable[[], StreamingSTTProvider]):
+    """Register (or replace) a streaming STT provider factory"""
+    _provider_factories[name] = factory
+    _provider_instances.pop(name, None)
+
+
+def get_streaming_provider(name: Optional[str] = None) -> Optional[StreamingSTTProvider]:
+    """Get the configured streaming STT provider (STREAMING_STT_PROVIDER, default: deepgram)"""
+    name = name or os.getenv('STREAMING_STT_PROVIDER', 'deepgram')
+    if name not in _provider_instances:
+        factory = _provider_factories.get(name)
+        if factory is None:
+            logger.error(f"❌ Unknown streaming STT provider: {name}")
+            return None
+        _provider_instances[name] = factory()
+    return _provider_instances[name]
+
+
+def is_streaming_stt_enabled() -> bool:
+    """Streaming STT is opt-in via ENABLE_STREAMING_STT=true"""
+    return os.getenv('ENABLE_STREAMING_STT', 'false').lower() == 'true'
+
+
+def open_streaming_transcriber(on_interim: TranscriptCallback = None, on_final: TranscriptCallback = None,
+                               language: str = "en",
+                               audio_format: Optional[AudioFormat] = None) -> Optional[StreamingTranscriber]:
+    """Open a live transcription stream, returning None if streaming is disabled or unavailable
+
+    audio_format is the format negotiated at start_recording (None: containerized audio).
+    """
+    if not is_streaming_stt_enabled():
+        return None
+    provider = get_streaming_provider()
+    if provider is None:
+        return None
+    try:
+        return provider.open(on_interim=on_interim, on_final=on_final, language=language, audio_format=audio_format)
+    except Exception as e:
+        logger.error(f"❌ Failed to open streaming STT ({provider.name}): {e}")
+        return None
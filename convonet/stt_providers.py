@@ -0,0 +1,459 @@
+"""
+Speech-to-Text Providers for the WebRTC Voice Assistant
+Pluggable batch STT backends with hedged requests and per-provider circuit breakers
+
+STT used to be a single blocking transcribe_audio_with_deepgram_webrtc() call, so a
+slow or failing Deepgram request held the turn for up to its 30s timeout. Turns now go
+through an STTRouter over an ordered provider chain (STT_PROVIDERS, default
+"deepgram_streaming,deepgram,whisper"):
+
+    result = get_stt_router().transcribe(STTRequest(audio, audio_format=fmt, streaming_transcriber=stream))
+    result.text, result.provider, result.hedged
+
+- the first available provider whose breaker is closed gets the request
+- if it has not answered after its own p95 latency (STT_HEDGE_DELAY_MS until it has
+  STT_HEDGE_MIN_SAMPLES samples), the next provider is fired as a hedge and the first
+  transcript wins; errors fail over to the next provider immediately
+- STT_BREAKER_FAILURES consecutive errors open a provider's breaker for
+  STT_BREAKER_COOLDOWN_SECONDS, after which one probe request may close it again
+- latencies go into the metrics registry as "stt:<provider>"; breaker state and
+  counters are on /metrics and /stt-provider-stats
+- repeated audio is answered from the transcription cache without calling any
+  provider (see transcription_cache.py)
+
+Providers: deepgram_streaming (the live stream opened at start_recording), deepgram
+(batch HTTP), whisper (OpenAI), local (faster-whisper on CPU, see local_stt.py),
+stub (STT_STUB_TRANSCRIPT, for offline tests).
+A provider returns None when it heard no speech and raises on provider errors.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from convonet.audio_codec import AudioFormat, encode_audio
+from convonet.metrics import get_metrics_registry, observe_stage
+from convonet.transcription_cache import get_transcription_cache, is_transcription_cache_enabled, transcription_cache_key
+
+DEFAULT_PROVIDER_CHAIN = "deepgram_streaming,deepgram,whisper"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_stt_hedging_enabled() -> bool:
+    """Hedged STT requests are on unless STT_HEDGING=false"""
+    return os.getenv('STT_HEDGING', 'true').lower() == 'true'
+
+
+class STTBusy(Exception):
+    """Provider is at its concurrency limit: fail over without counting against its breaker"""
+
+
+@dataclass
+class STTRequest:
+    """One utterance to transcribe"""
+    audio: bytes
+    language: str = "en"
+    audio_format: Optional[AudioFormat] = None
+    streaming_transcriber: Any = None  # streaming_stt.StreamingTranscriber opened for this utterance
+    audio_quality: Optional[dict] = None  # audio_stats summary computed at stop time, if any
+
+
+@dataclass
+class STTResult:
+    text: Optional[str]
+    provider: str
+    latency_ms: float
+    hedged: bool = False
+    cached: bool = False
+
+
+class STTProvider:
+    """Base class for batch STT providers"""
+
+    name = "base"
+    # A None (no speech) answer ends the request; False lets the next provider try
+    final_on_empty = True
+
+    def is_available(self, request: STTRequest) -> bool:
+        return True
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        """Transcript, or None if no speech was recognized; raise on provider errors"""
+        raise NotImplementedError
+
+
+class DeepgramStreamingSTT(STTProvider):
+    """Final transcript of the live stream that ran while the caller was talking"""
+
+    name = "deepgram_streaming"
+    # The live stream can miss the tail of an utterance; let batch providers retry
+    final_on_empty = False
+
+    def is_available(self, request: STTRequest) -> bool:
+        return request.streaming_transcriber is not None
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        return request.streaming_transcriber.finish()
+
+
+class DeepgramBatchSTT(STTProvider):
+    """Deepgram prerecorded API (pooled HTTP, see deepgram_service.py)"""
+
+    name = "deepgram"
+
+    def is_available(self, request: STTRequest) -> bool:
+        return bool(os.getenv('DEEPGRAM_API_KEY'))
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        from deepgram_service import get_deepgram_service
+
+        return get_deepgram_service().transcribe_audio_buffer(
+            request.audio, request.language, request.audio_format, strict=True, audio_quality=request.audio_quality
+        )
+
+
+class OpenAIWhisperSTT(STTProvider):
+    """OpenAI transcription API (STT_WHISPER_MODEL, default whisper-1)"""
+
+    name = "whisper"
+
+    def __init__(self):
+        self.model = os.getenv('STT_WHISPER_MODEL', 'whisper-1')
+        self._client = None
+
+    def is_available(self, request: STTRequest) -> bool:
+        return bool(os.getenv('OPENAI_API_KEY'))
+
+    def _get_client(self):
+        if self._client is None:
+            import openai
+            from convonet.http_clients import get_sync_client
+
+            self._client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=get_sync_client('openai'))
+        return self._client
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        payload, mimetype = encode_audio(request.audio, request.audio_format)
+        result = self._get_client().audio.transcriptions.create(
+            model=self.model,
+            file=(f"audio.{mimetype.split('/')[1]}", payload, mimetype),
+            language=request.language,
+        )
+        return (result.text or "").strip() or None
+
+
+class StubSTT(STTProvider):
+    """Fixed transcript from STT_STUB_TRANSCRIPT (hermetic tests, no network)"""
+
+    name = "stub"
+
+    def is_available(self, request: STTRequest) -> bool:
+        return bool(os.getenv('STT_STUB_TRANSCRIPT'))
+
+    def transcribe(self, request: STTRequest) -> Optional[str]:
+        return os.getenv('STT_STUB_TRANSCRIPT') or None
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe after the cooldown"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, cooldown_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold if failure_threshold is not None else \
+            int(os.getenv('STT_BREAKER_FAILURES', '5'))
+        self.cooldown_seconds = cooldown_seconds if cooldown_seconds is not None else \
+            _env_float('STT_BREAKER_COOLDOWN_SECONDS', 30.0)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether allow() could currently succeed (does not claim the half-open probe)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown_seconds
+            return self.state == CLOSED or not self._probing
+
+    def allow(self) -> bool:
+        """Admit one request; in half-open state this claims the single probe"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a claimed probe that ended without a verdict (provider busy)"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; True if this opened the breaker"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def get_stats(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'open_for_s': round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else 0.0,
+        }
+
+
+class STTRouter:
+    """Runs an STTRequest through the provider chain with hedging and failover"""
+
+    def __init__(self, providers: List[STTProvider], max_workers: Optional[int] = None):
+        self.providers = providers
+        self.breakers: Dict[str, CircuitBreaker] = {provider.name: CircuitBreaker() for provider in providers}
+        self.hedge_delay_ms = _env_float('STT_HEDGE_DELAY_MS', 2000.0)
+        self.hedge_min_delay_ms = _env_float('STT_HEDGE_MIN_DELAY_MS', 300.0)
+        self.hedge_min_samples = int(os.getenv('STT_HEDGE_MIN_SAMPLES', '20'))
+        self.timeout_seconds = _env_float('STT_TIMEOUT_SECONDS', 20.0)
+        # Hedged requests overlap, so this bounds provider calls across all turns
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv('STT_MAX_CONCURRENCY', '16')), thread_name_prefix="stt"
+        )
+        # Part of the transcription cache key: a different chain or model may transcribe differently
+        self.cache_params = ",".join(
+            f"{provider.name}:{getattr(provider, 'model', None) or getattr(provider, 'model_name', '')}"
+            for provider in providers
+        )
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {
+            provider.name: {'calls': 0, 'successes': 0, 'empty': 0, 'failures': 0, 'busy': 0, 'hedges_fired': 0,
+                            'hedges_won': 0, 'skipped_open': 0, 'breaker_opened': 0}
+            for provider in providers
+        }
+
+    def _count(self, name: str, key: str):
+        with self._lock:
+            self.stats[name][key] += 1
+
+    def hedge_delay(self, provider: STTProvider) -> float:
+        """Seconds to wait on provider before firing a hedge: its p95, once it has enough samples"""
+        histogram = get_metrics_registry().histogram(f"stt:{provider.name}")
+        if histogram.count >= self.hedge_min_samples:
+            p95 = histogram.percentiles((0.95,))[0.95]
+            delay_ms = max(self.hedge_min_delay_ms, p95)
+        else:
+            delay_ms = self.hedge_delay_ms
+        return delay_ms / 1000
+
+    def _candidates(self, request: STTRequest) -> List[STTProvider]:
+        candidates = []
+        for provider in self.providers:
+            try:
+                if not provider.is_available(request):
+                    continue
+            except Exception as e:
+                print(f"⚠️ STT provider {provider.name} availability check failed: {e}")
+                continue
+            if not self.breakers[provider.name].available():
+                self._count(provider.name, 'skipped_open')
+                continue
+            candidates.append(provider)
+        return candidates
+
+    def _call(self, provider: STTProvider, request: STTRequest):
+        started = time.perf_counter()
+        try:
+            text = provider.transcribe(request)
+        except STTBusy as e:
+            # Not a provider failure: no breaker verdict, and a half-open probe may be retried
+            self.breakers[provider.name].release()
+            self._count(provider.name, 'busy')
+            raise RuntimeError(f"{provider.name}: {e}") from e
+        except Exception as e:
+            self._count(provider.name, 'failures')
+            if self.breakers[provider.name].record_failure():
+                self._count(provider.name, 'breaker_opened')
+                print(f"🔌 STT circuit breaker opened for {provider.name}")
+            raise RuntimeError(f"{provider.name}: {e}") from e
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.breakers[provider.name].record_success()
+        self._count(provider.name, 'successes' if text else 'empty')
+        observe_stage(f"stt:{provider.name}", latency_ms)
+        return text, latency_ms
+
+    def transcribe(self, request: STTRequest) -> Optional[STTResult]:
+        """First usable transcript from the chain (text None if nobody heard speech); None if all failed"""
+        if not is_transcription_cache_enabled():
+            return self._route(request)
+        started = time.perf_counter()
+        cache = get_transcription_cache()
+        key = transcription_cache_key(request.audio, request.language, request.audio_format, self.cache_params)
+        cached = cache.get(key)
+        if cached is not None:
+            if request.streaming_transcriber is not None:
+                request.streaming_transcriber.close()
+            text, provider = cached
+            return STTResult(text, provider, (time.perf_counter() - started) * 1000, cached=True)
+        result = self._route(request)
+        if result is not None:
+            cache.put(key, result.text, result.provider)
+        return result
+
+    def _route(self, request: STTRequest) -> Optional[STTResult]:
+        candidates = self._candidates(request)
+        if not candidates:
+            print("❌ No STT provider available (unconfigured or circuit open)")
+            return None
+
+        deadline = time.monotonic() + self.timeout_seconds
+        pending = {}
+        next_index = 0
+        empty_result = None
+
+        def launch(hedge: bool = False) -> bool:
+            nonlocal next_index
+            while next_index < len(candidates):
+                provider = candidates[next_index]
+                next_index += 1
+                # The breaker is only consulted for providers that actually run, so a
+                # half-open probe is never claimed by a backup that was not needed
+                if not self.breakers[provider.name].allow():
+                    self._count(provider.name, 'skipped_open')
+                    continue
+                self._count(provider.name, 'calls')
+                if hedge:
+                    self._count(provider.name, 'hedges_fired')
+                    print(f"🏁 STT hedge: firing {provider.name}")
+                future = self._executor.submit(self._call, provider, request)
+                pending[future] = (provider, hedge, time.monotonic())
+                return True
+            return False
+
+        if not launch():
+            print("❌ No STT provider available (circuit open)")
+            return None
+        while pending:
+            now = time.monotonic()
+            wait_until = deadline
+            newest_provider, _, newest_started = max(pending.values(), key=lambda entry: entry[2])
+            can_hedge = is_stt_hedging_enabled() and next_index < len(candidates)
+            if can_hedge:
+                wait_until = min(deadline, newest_started + self.hedge_delay(newest_provider))
+            done, _ = wait(list(pending), timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider, hedged, _ = pending.pop(future)
+                try:
+                    text, latency_ms = future.result()
+                except Exception as e:
+                    print(f"⚠️ STT provider failed: {e}")
+                    continue
+                if text:
+                    if hedged:
+                        self._count(provider.name, 'hedges_won')
+                    return STTResult(text, provider.name, latency_ms, hedged)
+                if provider.final_on_empty:
+                    empty_result = empty_result or STTResult(None, provider.name, latency_ms, hedged)
+
+            if empty_result is not None and not any(p.final_on_empty is False for p, _, _ in pending.values()):
+                # A provider heard no speech; don't wait for (or pay) the others
+                return empty_result
+            if time.monotonic() >= deadline:
+                print(f"⏱️ STT timed out after {self.timeout_seconds}s")
+                break
+            if next_index < len(candidates) and (not pending or (not done and can_hedge)):
+                # Failover (nothing left in flight) or hedge (in-flight request slower than its p95)
+                launch(hedge=bool(pending))
+        return empty_result
+
+    def get_stats(self) -> dict:
+        registry = get_metrics_registry()
+        with self._lock:
+            counters = {name: dict(values) for name, values in self.stats.items()}
+        return {
+            'chain': [provider.name for provider in self.providers],
+            'hedging': is_stt_hedging_enabled(),
+            'cache': get_transcription_cache().get_stats(),
+            'providers': {
+                provider.name: {
+                    **counters[provider.name],
+                    'breaker': self.breakers[provider.name].get_stats(),
+                    'latency': registry.histogram(f"stt:{provider.name}").snapshot(),
+                    'hedge_delay_ms': round(self.hedge_delay(provider) * 1000, 1),
+                    **({'details': provider.get_stats()} if hasattr(provider, 'get_stats') else {}),
+                }
+                for provider in self.providers
+            },
+        }
+
+
+def _local_stt_factory() -> STTProvider:
+    from convonet.local_stt import get_local_stt
+    return get_local_stt()
+
+
+# Provider registry
+_provider_factories: Dict[str, Callable[[], STTProvider]] = {
+    DeepgramStreamingSTT.name: DeepgramStreamingSTT,
+    DeepgramBatchSTT.name: DeepgramBatchSTT,
+    OpenAIWhisperSTT.name: OpenAIWhisperSTT,
+    "local": _local_stt_factory,
+    StubSTT.name: StubSTT,
+}
+_router: Optional[STTRouter] = None
+_router_lock = threading.Lock()
+
+
+def register_stt_provider(name: str, factory: Callable[[], STTProvider]):
+    """Register (or replace) a batch STT provider factory; takes effect for the next router"""
+    global _router
+    _provider_factories[name] = factory
+    _router = None
+
+
+def get_stt_router() -> STTRouter:
+    """Router over the STT_PROVIDERS chain (unknown names are skipped)"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                providers = []
+                for name in os.getenv('STT_PROVIDERS', DEFAULT_PROVIDER_CHAIN).split(','):
+                    factory = _provider_factories.get(name.strip())
+                    if factory is None:
+                        if name.strip():
+                            print(f"⚠️ Unknown STT provider: {name.strip()}")
+                        continue
+                    providers.append(factory())
+                _router = STTRouter(providers)
+    return _router
+
+
+def get_stt_stats() -> dict:
+    return get_stt_router().get_stats()
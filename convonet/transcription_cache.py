@@ -0,0 +1,173 @@
+"""
+Transcription Cache for the WebRTC Voice Assistant
+Transcripts keyed by a fingerprint of the audio, with an in-process LRU in front of Redis
+
+Clients retry stop_recording with the same blob after a dropped ack, and recordings
+are re-sent when a turn is replayed, so the same audio was sent to the STT providers
+(and paid for) again. The STTRouter now looks each request up before calling any
+provider:
+
+    cache = get_transcription_cache()
+    key = transcription_cache_key(audio, "en", audio_format, params="deepgram,whisper")
+    cache.get(key)        # (text, provider) or None on a miss
+
+- the key is blake2b over the audio payload (for WebM the Opus frames, so re-muxing
+  the same audio still hits) plus language, declared format and the provider chain
+- the memory tier holds TRANSCRIPTION_CACHE_ENTRIES transcripts; Redis holds them for
+  TRANSCRIPTION_CACHE_TTL_SECONDS so retries that land on another worker also hit
+- "no speech" answers are cached too (text None), failures are not
+- hit/miss counters are on /metrics (stt.cache) and /transcription-cache-stats
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+try:
+    from convonet.redis_manager import redis_manager
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_manager = None
+    REDIS_AVAILABLE = False
+
+from convonet.audio_codec import AudioFormat, demux_webm, detect_container
+
+REDIS_KEY_PREFIX = "stt_cache:"
+
+CachedTranscript = Tuple[Optional[str], str]  # (text, provider that produced it)
+
+
+def is_transcription_cache_enabled() -> bool:
+    """Transcription cache (disable with TRANSCRIPTION_CACHE=false)"""
+    return os.getenv('TRANSCRIPTION_CACHE', 'true').lower() == 'true'
+
+
+def transcription_cache_key(audio: bytes, language: str = "en", audio_format: Optional[AudioFormat] = None,
+                            params: str = "") -> str:
+    """Fingerprint of one utterance and the settings it would be transcribed with"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{language}|{audio_format.to_session_value() if audio_format else ''}|{params}|".encode('utf-8'))
+    if detect_container(audio) == "webm":
+        try:
+            webm = demux_webm(audio)
+            if webm.frames and not webm.truncated:
+                digest.update(b"opus|")
+                for frame in webm.frames:
+                    digest.update(frame)
+                return digest.hexdigest()
+        except Exception:
+            pass
+    digest.update(audio)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Two-tier (memory LRU + Redis) store for transcripts"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, CachedTranscript]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'redis_hits': 0, 'misses': 0, 'stores': 0,
+                      'memory_evictions': 0, 'redis_errors': 0}
+
+    def _redis(self):
+        if REDIS_AVAILABLE and redis_manager is not None and redis_manager.is_available():
+            return redis_manager.redis_client
+        return None
+
+    def _put_memory(self, key: str, entry: CachedTranscript):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['memory_evictions'] += 1
+
+    def _read_redis(self, key: str) -> Optional[CachedTranscript]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(f"{REDIS_KEY_PREFIX}{key}")
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            return data.get('text'), data.get('provider', 'unknown')
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"⚠️ Transcription cache: Redis read failed: {e}")
+            return None
+
+    def _write_redis(self, key: str, entry: CachedTranscript):
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            client.setex(f"{REDIS_KEY_PREFIX}{key}", self.ttl_seconds,
+                         json.dumps({'text': entry[0], 'provider': entry[1]}))
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"⚠️ Transcription cache: Redis write failed: {e}")
+
+    def get(self, key: str) -> Optional[CachedTranscript]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry
+        entry = self._read_redis(key)
+        with self._lock:
+            if entry is not None:
+                self.stats['redis_hits'] += 1
+                self._put_memory(key, entry)
+            else:
+                self.stats['misses'] += 1
+        return entry
+
+    def put(self, key: str, text: Optional[str], provider: str):
+        entry = (text, provider)
+        with self._lock:
+            self.stats['stores'] += 1
+            self._put_memory(key, entry)
+        self._write_redis(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['redis_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['redis_hits']
+            return {
+                **self.stats,
+                'enabled': is_transcription_cache_enabled(),
+                'hit_rate': round(hits / lookups, 4) if lookups else None,
+                'memory_entries': len(self._memory),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'redis': self._redis() is not None,
+            }
+
+
+# Global transcription cache instance
+_transcription_cache = None
+_transcription_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Get or create the process-wide transcription cache (sized from TRANSCRIPTION_CACHE_* environment variables)"""
+    global _transcription_cache
+    if _transcription_cache is None:
+        with _transcription_cache_lock:
+            if _transcription_cache is None:
+                _transcription_cache = TranscriptionCache(
+                    max_entries=int(os.getenv('TRANSCRIPTION_CACHE_ENTRIES', '1024')),
+                    ttl_seconds=int(os.getenv('TRANSCRIPTION_CACHE_TTL_SECONDS', str(24 * 3600)))
+                )
+    return _transcription_cache
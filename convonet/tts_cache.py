@@ -0,0 +1,283 @@
+"""
+TTS Audio Cache for Convonet Voice Pipelines
+Content-addressed cache for synthesized speech with an in-memory LRU tier and a size-bounded disk tier
+
+Entries are keyed by sha256(voice | model | format | text), so the welcome greeting,
+transfer announcements and fallback replies are synthesized once and then served from
+memory (or from disk after a restart) instead of calling the OpenAI TTS API again.
+A configurable phrase list can be pre-warmed at startup.
+
+Static phrases (the pre-warm list) are admitted on first synthesis; any other text is
+only stored once it has been synthesized twice (a bounded "seen once" key set acts as
+the doorkeeper), so one-off LLM reply sentences do not push the stock phrases out.
+Disk reads and writes run outside the cache lock.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def is_tts_cache_enabled() -> bool:
+    """TTS audio cache (disable with TTS_CACHE=false)"""
+    return os.getenv('TTS_CACHE', 'true').lower() == 'true'
+
+
+def tts_cache_key(text: str, voice: str, model: str, response_format: str) -> str:
+    """Content address of one synthesized utterance"""
+    return hashlib.sha256(f"{voice}|{model}|{response_format}|{text}".encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) store for synthesized audio"""
+
+    def __init__(self, max_memory_bytes: int = 32 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 256 * 1024 * 1024, max_text_chars: int = 500,
+                 max_seen_keys: int = 4096):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_text_chars = max_text_chars
+        self.max_seen_keys = max_seen_keys
+        self.disk_dir = disk_dir
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest access first
+        self._disk_bytes = 0
+        self._writing = set()  # keys with a disk write in progress
+        self._static_texts = set()  # admitted on first synthesis
+        self._seen_once: "OrderedDict[str, None]" = OrderedDict()  # doorkeeper for everything else
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'not_admitted': 0,
+                      'memory_evictions': 0, 'disk_evictions': 0, 'disk_errors': 0}
+        if disk_dir:
+            self._load_disk_index()
+
+    # Disk tier
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.audio")
+
+    def _load_disk_index(self):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            entries = []
+            for name in os.listdir(self.disk_dir):
+                if name.endswith('.audio'):
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                    entries.append((stat.st_mtime, name[:-len('.audio')], stat.st_size))
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_bytes += size
+            self._remove_files(self._evict_disk())
+        except OSError as e:
+            print(f"⚠️ TTS cache: disk tier unavailable ({self.disk_dir}): {e}")
+            self.disk_dir = None
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        """Read an entry file (no lock held)"""
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                audio = f.read()
+            os.utime(self._disk_path(key))
+            return audio
+        except OSError:
+            with self._lock:
+                self.stats['disk_errors'] += 1
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        """Write an entry file (no lock held), then index it"""
+        try:
+            # Write to a temp file first so a crash never leaves a truncated entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            with self._lock:
+                self.stats['disk_errors'] += 1
+                self._writing.discard(key)
+            print(f"⚠️ TTS cache: failed to write disk entry: {e}")
+            return
+        with self._lock:
+            self._writing.discard(key)
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            evicted = self._evict_disk()
+        self._remove_files(evicted)
+
+    def _evict_disk(self) -> List[str]:
+        """Drop index entries over the size limit (caller holds the lock); returns keys to delete"""
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats['disk_evictions'] += 1
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    # Memory tier
+
+    def _put_memory(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats['memory_evictions'] += 1
+
+    # Admission
+
+    def add_static_phrases(self, phrases: Iterable[str]):
+        """Register fixed phrases (greetings, announcements) that are cached on first use"""
+        with self._lock:
+            self._static_texts.update(p for p in phrases if p)
+
+    def _admit(self, key: str, text: str) -> bool:
+        """Static phrases always; other text only on its second synthesis (caller holds the lock)"""
+        if text in self._static_texts or key in self._seen_once:
+            self._seen_once.pop(key, None)
+            return True
+        self._seen_once[key] = None
+        if len(self._seen_once) > self.max_seen_keys:
+            self._seen_once.popitem(last=False)
+        self.stats['not_admitted'] += 1
+        return False
+
+    # Public API
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return audio
+            on_disk = self.disk_dir is not None and key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+        audio = self._read_disk(key) if on_disk else None
+        with self._lock:
+            if audio is not None:
+                self.stats['disk_hits'] += 1
+                self._put_memory(key, audio)
+            else:
+                self.stats['misses'] += 1
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self.stats['stores'] += 1
+            self._put_memory(key, audio)
+            write = (self.disk_dir is not None and key not in self._disk and key not in self._writing
+                     and len(audio) <= self.max_disk_bytes)
+            if write:
+                self._writing.add(key)
+        if write:
+            self._write_disk(key, audio)
+
+    def is_cacheable(self, text: str) -> bool:
+        return bool(text) and len(text) <= self.max_text_chars
+
+    def get_or_synthesize(self, text: str, voice: str, model: str, response_format: str,
+                          synthesize: Callable[[], bytes]) -> bytes:
+        """Return cached audio for this utterance, synthesizing on a miss (stored if admitted)"""
+        if not self.is_cacheable(text):
+            return synthesize()
+        key = tts_cache_key(text, voice, model, response_format)
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize()
+            with self._lock:
+                admitted = self._admit(key, text)
+            if admitted:
+                self.put(key, audio)
+        return audio
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._seen_once.clear()
+            keys = list(self._disk)
+            self._disk.clear()
+            self._disk_bytes = 0
+        self._remove_files(keys)
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            return {
+                **self.stats,
+                'hit_rate': round(hits / lookups, 4) if lookups else None,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'disk_dir': self.disk_dir,
+                'static_phrases': len(self._static_texts)
+            }
+
+
+# Global TTS cache instance
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Get or create the process-wide TTS cache (sized from TTS_CACHE_* environment variables)"""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                disk_dir = os.getenv('TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'convonet_tts_cache'))
+                _tts_cache = TTSCache(
+                    max_memory_bytes=int(os.getenv('TTS_CACHE_MEMORY_MB', '32')) * 1024 * 1024,
+                    disk_dir=disk_dir or None,
+                    max_disk_bytes=int(os.getenv('TTS_CACHE_DISK_MB', '256')) * 1024 * 1024,
+                    max_text_chars=int(os.getenv('TTS_CACHE_MAX_CHARS', '500'))
+                )
+    return _tts_cache
+
+
+def get_prewarm_phrases(defaults: Iterable[str] = ()) -> list:
+    """Phrases to synthesize at startup: defaults plus TTS_PREWARM_PHRASES ('|'-separated)"""
+    phrases = [p for p in defaults if p]
+    phrases += [p.strip() for p in os.getenv('TTS_PREWARM_PHRASES', '').split('|') if p.strip()]
+    return list(dict.fromkeys(phrases))
+
+
+def prewarm_tts_cache(synthesize: Callable[[str], bytes], defaults: Iterable[str] = ()) -> str:
+    """Synthesize the pre-warm phrase list into the cache (run as a boot warm-up step)"""
+    if not is_tts_cache_enabled():
+        return "TTS cache disabled"
+    phrases = get_prewarm_phrases(defaults)
+    get_tts_cache().add_static_phrases(phrases)
+    warmed = 0
+    for phrase in phrases:
+        try:
+            synthesize(phrase)
+            warmed += 1
+        except Exception as e:
+            print(f"⚠️ TTS pre-warm failed for '{phrase[:40]}': {e}")
+    print(f"🔥 TTS cache pre-warmed {warmed}/{len(phrases)} phrases")
+    return f"{warmed}/{len(phrases)} phrases"
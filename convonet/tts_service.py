@@ -0,0 +1,228 @@
+"""
+Text-to-Speech Service for the WebRTC Voice Assistant
+OpenAI TTS helpers, including sentence-level streaming synthesis
+"""
+
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import openai
+
+from convonet.metrics import stage_timer, STAGE_TTS
+from convonet.tts_cache import get_tts_cache, is_tts_cache_enabled
+from convonet.http_clients import get_sync_client
+
+DEFAULT_TTS_MODEL = "tts-1"
+DEFAULT_TTS_VOICE = "nova"  # Options: alloy, echo, fable, onyx, nova, shimmer
+DEFAULT_TTS_FORMAT = "mp3"
+
+# Sentences shorter than this are merged with the next one to avoid tiny TTS requests
+MIN_SENTENCE_CHARS = 12
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+_openai_client = None
+_tts_executor = None
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Get or create the shared OpenAI client used for TTS"""
+    global _openai_client
+    if _openai_client is None:
+        # Keep-alive pool shared with the other OpenAI callers (see http_clients.py)
+        _openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=get_sync_client('openai'))
+    return _openai_client
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _tts_executor
+    if _tts_executor is None:
+        max_workers = int(os.getenv('TTS_STREAMING_WORKERS', '3'))
+        _tts_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+    return _tts_executor
+
+
+def is_streaming_tts_enabled() -> bool:
+    """Sentence-level streaming TTS (disable with STREAMING_TTS=false)"""
+    return os.getenv('STREAMING_TTS', 'true').lower() == 'true'
+
+
+def _synthesize_uncached(text: str, voice: str, model: str, response_format: str) -> bytes:
+    speech_response = get_openai_client().audio.speech.create(
+        model=model,
+        voice=voice,
+        input=text,
+        response_format=response_format
+    )
+    return speech_response.content
+
+
+def synthesize_speech(text: str, voice: str = DEFAULT_TTS_VOICE, model: str = DEFAULT_TTS_MODEL,
+                      response_format: str = DEFAULT_TTS_FORMAT) -> bytes:
+    """Synthesize text to audio bytes with OpenAI TTS (served from the TTS cache when possible)"""
+    with stage_timer(STAGE_TTS):
+        if not is_tts_cache_enabled():
+            return _synthesize_uncached(text, voice, model, response_format)
+        return get_tts_cache().get_or_synthesize(
+            text, voice, model, response_format,
+            lambda: _synthesize_uncached(text, voice, model, response_format)
+        )
+
+
+def split_sentences(text: str, min_chars: int = MIN_SENTENCE_CHARS) -> List[str]:
+    """Split a reply into sentences for incremental synthesis"""
+    sentences = []
+    pending = ""
+    for part in _SENTENCE_BOUNDARY.split(text.strip()):
+        part = part.strip()
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+
+class SentenceAccumulator:
+    """Collects streamed text deltas and releases complete sentences
+
+    A sentence is complete once its terminal punctuation is followed by whitespace,
+    so "3.5" or a trailing "." at the end of a delta is held until more text arrives.
+    """
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a text delta and return any sentences it completed"""
+        if not delta:
+            return []
+        self._buffer += delta
+        parts = _SENTENCE_BOUNDARY.split(self._buffer)
+        if len(parts) < 2:
+            return []
+
+        sentences = []
+        pending = ""
+        for part in parts[:-1]:
+            part = part.strip()
+            if not part:
+                continue
+            pending = f"{pending} {part}" if pending else part
+            if len(pending) >= self.min_chars:
+                sentences.append(pending)
+                pending = ""
+
+        # Keep short sentences and the unfinished tail for the next delta
+        tail = parts[-1]
+        self._buffer = f"{pending} {tail}" if pending else tail
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        remaining = self._buffer.strip()
+        self._buffer = ""
+        return remaining or None
+
+
+def iter_sentences(deltas: Iterable[str], min_chars: int = MIN_SENTENCE_CHARS) -> Iterator[str]:
+    """Turn a stream of text deltas (e.g. LLM tokens) into a stream of sentences"""
+    accumulator = SentenceAccumulator(min_chars)
+    for delta in deltas:
+        yield from accumulator.feed(delta)
+    remaining = accumulator.flush()
+    if remaining:
+        yield remaining
+
+
+def stream_sentences_audio(sentences: Iterable[str],
+                           on_chunk: Callable[[int, str, bytes], None],
+                           voice: str = DEFAULT_TTS_VOICE,
+                           model: str = DEFAULT_TTS_MODEL,
+                           response_format: str = DEFAULT_TTS_FORMAT,
+                           is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """Synthesize sentences as they arrive, delivering audio segments in order
+
+    A producer thread pulls sentences from the iterator (e.g. LLM token streaming)
+    and submits each to the TTS pool right away; this thread delivers segments in
+    order the moment each one's synthesis finishes, without waiting for the next
+    sentence, via on_chunk(index, sentence, audio). Whether a segment is the last one
+    is not known when it is delivered (the LLM may still be generating); the caller
+    signals the end once this returns. If is_cancelled() turns true
+    (barge-in), no further segments are submitted or delivered and pending synthesis
+    is cancelled. Errors from the iterator or from synthesis are re-raised.
+
+    Returns the number of segments delivered.
+    """
+    executor = _get_executor()
+    submitted = queue.Queue()
+    stop = threading.Event()
+    errors = []
+    delivered = 0
+    cancelled = is_cancelled or (lambda: False)
+
+    def produce():
+        try:
+            for sentence in sentences:
+                if stop.is_set() or cancelled():
+                    break
+                submitted.put((sentence, executor.submit(synthesize_speech, sentence, voice, model, response_format)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            submitted.put(None)
+
+    producer = threading.Thread(target=produce, name="tts-sentences", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = submitted.get()
+            if item is None:
+                producer.join()
+                break
+            sentence, future = item
+            audio = future.result()
+            if cancelled():
+                break
+            on_chunk(delivered, sentence, audio)
+            delivered += 1
+    finally:
+        stop.set()
+        while True:
+            try:
+                item = submitted.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].cancel()
+    if errors:
+        raise errors[0]
+    return delivered
+
+
+def stream_sentence_audio(text: str,
+                          on_chunk: Callable[[int, str, bytes], None],
+                          voice: str = DEFAULT_TTS_VOICE,
+                          model: str = DEFAULT_TTS_MODEL,
+                          response_format: str = DEFAULT_TTS_FORMAT,
+                          is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """Synthesize a complete reply sentence by sentence, delivering audio segments in order
+
+    All sentences are submitted concurrently; on_chunk(index, sentence, audio)
+    is called as soon as the next segment in order is ready, so playback can start
+    after the first sentence instead of the whole reply.
+
+    Returns the number of segments delivered.
+    """
+    return stream_sentences_audio(split_sentences(text), on_chunk, voice, model, response_format, is_cancelled)
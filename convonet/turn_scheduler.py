@@ -0,0 +1,142 @@
+"""
+Turn Scheduler for the WebRTC Voice Assistant
+Bounded worker pool with per-user fair queuing and admission control for reply pipelines
+
+Each finished recording used to start its own STT + agent + TTS background task, so a
+burst of callers ran an unbounded number of pipelines on the single eventlet worker and
+every turn slowed down together. Turns are now submitted here instead: at most
+max_concurrent run at once, waiting turns are served round-robin across users (one
+chatty caller cannot starve the others), and once the queue is full new turns are
+rejected immediately so the caller hears "busy, please hold" instead of a slow reply.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Optional
+
+from convonet.metrics import observe_stage, STAGE_QUEUE_WAIT
+
+ADMITTED = "admitted"   # will start right away
+QUEUED = "queued"       # waiting for a worker
+REJECTED = "rejected"   # queue full (or too many turns queued for this user)
+
+
+class _QueuedTurn:
+    __slots__ = ("user_key", "fn", "args", "enqueued_at")
+
+    def __init__(self, user_key: str, fn: Callable, args: tuple):
+        self.user_key = user_key
+        self.fn = fn
+        self.args = args
+        self.enqueued_at = time.perf_counter()
+
+
+class TurnScheduler:
+    """Runs turn callables on a fixed number of workers with per-user fairness"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue_depth: int = 16, max_queued_per_user: int = 2,
+                 spawn: Optional[Callable[..., Any]] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.max_queued_per_user = max(1, max_queued_per_user)
+        self._spawn = spawn or self._spawn_thread
+        self._ready: deque = deque()  # admitted turns already assigned to an idle worker
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()  # round-robin order of users with waiting turns
+        self._queued = 0
+        self._idle_workers = 0
+        self._workers_started = False
+        self._cond = threading.Condition()
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "completed": 0, "failed": 0, "running": 0}
+
+    @staticmethod
+    def _spawn_thread(target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True, name="turn-worker")
+        thread.start()
+        return thread
+
+    def _start_workers(self):
+        self._workers_started = True
+        for index in range(self.max_concurrent):
+            self._spawn(self._worker_loop, index)
+
+    def submit(self, user_key: str, fn: Callable, *args) -> str:
+        """Queue fn(*args) for user_key; returns ADMITTED, QUEUED or REJECTED"""
+        with self._cond:
+            if not self._workers_started:
+                self._start_workers()
+                self._idle_workers = self.max_concurrent
+
+            turn = _QueuedTurn(user_key, fn, args)
+            # Only bypass the fair queue when nobody is waiting in it
+            if self._idle_workers > len(self._ready) and not self._queued:
+                self._ready.append(turn)
+                self._cond.notify()
+                self.stats["admitted"] += 1
+                return ADMITTED
+
+            user_queue = self._queues.get(user_key)
+            if self._queued >= self.max_queue_depth or (user_queue and len(user_queue) >= self.max_queued_per_user):
+                self.stats["rejected"] += 1
+                return REJECTED
+
+            if user_queue is None:
+                user_queue = self._queues[user_key] = deque()
+            user_queue.append(turn)
+            self._queued += 1
+            self._cond.notify()
+            self.stats["queued"] += 1
+            return QUEUED
+
+    def _next_turn(self) -> _QueuedTurn:
+        # Round-robin: serve the user at the head, then move them to the back if they have more
+        user_key, user_queue = next(iter(self._queues.items()))
+        turn = user_queue.popleft()
+        del self._queues[user_key]
+        if user_queue:
+            self._queues[user_key] = user_queue
+        self._queued -= 1
+        return turn
+
+    def _worker_loop(self, index: int):
+        while True:
+            with self._cond:
+                while not self._ready and not self._queued:
+                    self._cond.wait()
+                turn = self._ready.popleft() if self._ready else self._next_turn()
+                self._idle_workers -= 1
+                self.stats["running"] += 1
+
+            observe_stage(STAGE_QUEUE_WAIT, (time.perf_counter() - turn.enqueued_at) * 1000)
+            try:
+                turn.fn(*turn.args)
+                self.stats["completed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"❌ Turn worker {index} error: {e}")
+            finally:
+                with self._cond:
+                    self._idle_workers += 1
+                    self.stats["running"] -= 1
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                **self.stats,
+                "waiting": self._queued,
+                "waiting_users": len(self._queues),
+                "max_concurrent": self.max_concurrent,
+                "max_queue_depth": self.max_queue_depth,
+                "max_queued_per_user": self.max_queued_per_user
+            }
+
+
+def create_turn_scheduler(spawn: Optional[Callable[..., Any]] = None) -> TurnScheduler:
+    """Build a scheduler sized from TURN_MAX_CONCURRENT / TURN_MAX_QUEUE / TURN_MAX_QUEUED_PER_USER"""
+    return TurnScheduler(
+        max_concurrent=int(os.getenv('TURN_MAX_CONCURRENT', '4')),
+        max_queue_depth=int(os.getenv('TURN_MAX_QUEUE', '16')),
+        max_queued_per_user=int(os.getenv('TURN_MAX_QUEUED_PER_USER', '2')),
+        spawn=spawn
+    )
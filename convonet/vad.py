@@ -0,0 +1,225 @@
+"""
+Voice Activity Detection for Convonet Voice Pipelines
+Server-side speech/silence classification and automatic endpointing over PCM16 or μ-law frames
+
+Each frame is scored with short-time energy (relative to an adaptive noise floor),
+zero-crossing rate and spectral flatness, all computed for a whole chunk of frames at
+once with NumPy. A small state machine with hangover turns frame decisions into
+speech_start / speech_end events, so a turn can be transcribed as soon as the caller
+stops talking instead of waiting for a button release or a Twilio stop event.
+"""
+
+import os
+from typing import Callable, List, Optional
+
+import numpy as np
+
+ENCODING_PCM16 = "pcm16"
+ENCODING_MULAW = "mulaw"
+SUPPORTED_ENCODINGS = (ENCODING_PCM16, ENCODING_MULAW)
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+
+def _build_mulaw_table() -> np.ndarray:
+    """G.711 μ-law to 16-bit linear lookup table"""
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
+
+
+MULAW_DECODE_TABLE = _build_mulaw_table()
+
+
+def mulaw_to_pcm16(data: bytes) -> np.ndarray:
+    """Decode μ-law bytes (e.g. Twilio Media Streams payloads) to int16 samples"""
+    return MULAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+
+def pcm16_from_bytes(data: bytes) -> np.ndarray:
+    """Interpret little-endian 16-bit PCM bytes as int16 samples (odd trailing byte dropped)"""
+    usable = len(data) - (len(data) % 2)
+    return np.frombuffer(data[:usable], dtype='<i2')
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class VADConfig:
+    """Tuning knobs for VoiceActivityDetector (all durations in milliseconds)"""
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20,
+                 hangover_ms: int = 700, min_speech_ms: int = 200, max_utterance_ms: int = 30000,
+                 energy_threshold_db: float = -45.0, noise_margin_db: float = 10.0,
+                 flatness_threshold: float = 0.55, max_zcr: float = 0.45, preroll_ms: int = 300):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+        self.max_utterance_ms = max_utterance_ms
+        self.energy_threshold_db = energy_threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.flatness_threshold = flatness_threshold
+        self.max_zcr = max_zcr
+        self.preroll_ms = preroll_ms
+
+    @property
+    def frame_samples(self) -> int:
+        return max(1, self.sample_rate * self.frame_ms // 1000)
+
+    @classmethod
+    def from_env(cls, sample_rate: int = 16000) -> "VADConfig":
+        """Build a config from VAD_* environment variables"""
+        return cls(
+            sample_rate=sample_rate,
+            frame_ms=int(_env_float('VAD_FRAME_MS', 20)),
+            hangover_ms=int(_env_float('VAD_HANGOVER_MS', 700)),
+            min_speech_ms=int(_env_float('VAD_MIN_SPEECH_MS', 200)),
+            max_utterance_ms=int(_env_float('VAD_MAX_UTTERANCE_MS', 30000)),
+            energy_threshold_db=_env_float('VAD_ENERGY_THRESHOLD_DB', -45.0),
+            noise_margin_db=_env_float('VAD_NOISE_MARGIN_DB', 10.0),
+            flatness_threshold=_env_float('VAD_FLATNESS_THRESHOLD', 0.55),
+            max_zcr=_env_float('VAD_MAX_ZCR', 0.45),
+            preroll_ms=int(_env_float('VAD_PREROLL_MS', 300)),
+        )
+
+
+def frame_features(frames: np.ndarray) -> tuple:
+    """Per-frame energy (dBFS), zero-crossing rate and spectral flatness
+
+    frames: float32 array of shape (n_frames, frame_samples) scaled to [-1, 1].
+    """
+    energy = np.mean(frames * frames, axis=1)
+    energy_db = 10.0 * np.log10(energy + 1e-10)
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frames.shape[1] - 1)
+
+    window = np.hanning(frames.shape[1]).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2 + 1e-12
+    flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return energy_db, zcr, flatness
+
+
+class VoiceActivityDetector:
+    """Streaming VAD with hangover-based endpointing for one audio stream
+
+    Feed raw chunks with process(); it returns the events detected in that chunk
+    (SPEECH_START / SPEECH_END) and also invokes the optional callbacks.
+    """
+
+    def __init__(self, config: Optional[VADConfig] = None, encoding: str = ENCODING_PCM16,
+                 on_speech_start: Optional[Callable[[], None]] = None,
+                 on_speech_end: Optional[Callable[[float], None]] = None):
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported VAD encoding: {encoding}")
+        self.config = config or VADConfig.from_env()
+        self.encoding = encoding
+        self.on_speech_start = on_speech_start
+        self.on_speech_end = on_speech_end
+
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._noise_floor_db = self.config.energy_threshold_db - self.config.noise_margin_db
+        self.reset()
+
+    def reset(self):
+        """Start a new utterance (keeps the learned noise floor)"""
+        self.in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._utterance_frames = 0
+        self.frames_processed = 0
+
+    @property
+    def noise_floor_db(self) -> float:
+        return self._noise_floor_db
+
+    def _frames_for(self, ms: int) -> int:
+        return max(1, ms // self.config.frame_ms)
+
+    def _decode(self, chunk: bytes) -> np.ndarray:
+        if self.encoding == ENCODING_MULAW:
+            return mulaw_to_pcm16(chunk)
+        return pcm16_from_bytes(chunk)
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """Speech/non-speech decision for each complete frame in samples"""
+        frame_samples = self.config.frame_samples
+        n_frames = len(samples) // frame_samples
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = samples[:n_frames * frame_samples].reshape(n_frames, frame_samples).astype(np.float32) / 32768.0
+        energy_db, zcr, flatness = frame_features(frames)
+
+        threshold_db = max(self.config.energy_threshold_db, self._noise_floor_db + self.config.noise_margin_db)
+        is_speech = (energy_db > threshold_db) & (flatness < self.config.flatness_threshold) & (zcr < self.config.max_zcr)
+
+        # Track the noise floor on frames that look like background
+        background = energy_db[~is_speech]
+        if background.size:
+            self._noise_floor_db = 0.95 * self._noise_floor_db + 0.05 * float(np.median(background))
+        return is_speech
+
+    def process(self, chunk: bytes) -> List[str]:
+        """Consume an audio chunk and return endpointing events it triggered"""
+        samples = self._decode(chunk)
+        if self._remainder.size:
+            samples = np.concatenate((self._remainder, samples))
+
+        frame_samples = self.config.frame_samples
+        usable = len(samples) - (len(samples) % frame_samples)
+        self._remainder = samples[usable:].copy()
+        decisions = self.classify(samples[:usable])
+
+        start_frames = self._frames_for(self.config.min_speech_ms)
+        hangover_frames = self._frames_for(self.config.hangover_ms)
+        max_frames = self._frames_for(self.config.max_utterance_ms)
+
+        events = []
+        for is_speech in decisions:
+            self.frames_processed += 1
+            if not self.in_speech:
+                self._speech_frames = self._speech_frames + 1 if is_speech else 0
+                if self._speech_frames >= start_frames:
+                    self.in_speech = True
+                    self._silence_frames = 0
+                    self._utterance_frames = self._speech_frames
+                    events.append(SPEECH_START)
+                    if self.on_speech_start:
+                        self.on_speech_start()
+                continue
+
+            self._utterance_frames += 1
+            self._silence_frames = 0 if is_speech else self._silence_frames + 1
+            if self._silence_frames >= hangover_frames or self._utterance_frames >= max_frames:
+                speech_ms = (self._utterance_frames - self._silence_frames) * self.config.frame_ms
+                events.append(SPEECH_END)
+                self.reset()
+                if self.on_speech_end:
+                    self.on_speech_end(speech_ms)
+        return events
+
+    def preroll_bytes(self) -> int:
+        """Bytes of audio to keep before speech_start so the first syllable is not clipped"""
+        bytes_per_sample = 1 if self.encoding == ENCODING_MULAW else 2
+        return self.config.sample_rate * self.config.preroll_ms // 1000 * bytes_per_sample
+
+
+def is_server_vad_enabled() -> bool:
+    """Server-side endpointing is opt-in via ENABLE_SERVER_VAD=true"""
+    return os.getenv('ENABLE_SERVER_VAD', 'false').lower() == 'true'
+
+
+def create_vad(encoding: str = ENCODING_PCM16, sample_rate: int = 16000, **callbacks) -> VoiceActivityDetector:
+    """Create a detector configured from the environment"""
+    return VoiceActivityDetector(VADConfig.from_env(sample_rate=sample_rate), encoding=encoding, **callbacks)
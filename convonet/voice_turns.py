@@ -0,0 +1,101 @@
+"""
+Voice Turn Control for the WebRTC Voice Assistant
+Cancellable per-session turns so a caller can barge in on an in-flight reply
+
+Every recording hands a VoiceTurn to process_audio_async. Starting a new recording
+(or an explicit `cancel` event) cancels the session's current turn: the STT/agent/TTS
+pipeline checks the turn between stages and while streaming, stops submitting TTS work
+and cancels the agent task on the runtime loop, and no stale audio is emitted.
+This mirrors barge_in=True on the Twilio phone path.
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TurnCancelled(Exception):
+    """Raised inside a turn's pipeline once the turn has been cancelled"""
+
+
+class VoiceTurn:
+    """One caller utterance and the reply pipeline it started"""
+
+    def __init__(self, session_id: str, turn_id: int):
+        self.session_id = session_id
+        self.turn_id = turn_id
+        self.started_at = time.time()
+        self.cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        return self._cancelled
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._cancelled.is_set():
+            self.cancel_reason = reason
+            self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        """Raise TurnCancelled if the turn was cancelled (call between pipeline stages)"""
+        if self._cancelled.is_set():
+            raise TurnCancelled(self.cancel_reason)
+
+
+class TurnRegistry:
+    """Current turn per session; beginning a new turn cancels the previous one"""
+
+    def __init__(self):
+        self._turns: Dict[str, VoiceTurn] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.cancelled_count = 0
+
+    def begin(self, session_id: str, reason: str = "barge_in") -> VoiceTurn:
+        with self._lock:
+            previous = self._turns.get(session_id)
+            turn = VoiceTurn(session_id, next(self._ids))
+            self._turns[session_id] = turn
+        if previous and not previous.is_cancelled():
+            previous.cancel(reason)
+            self.cancelled_count += 1
+        return turn
+
+    def current(self, session_id: str) -> Optional[VoiceTurn]:
+        return self._turns.get(session_id)
+
+    def cancel(self, session_id: str, reason: str = "cancelled") -> Optional[VoiceTurn]:
+        """Cancel the session's current turn; returns it if it was still running"""
+        with self._lock:
+            turn = self._turns.pop(session_id, None)
+        if turn and not turn.is_cancelled():
+            turn.cancel(reason)
+            self.cancelled_count += 1
+            return turn
+        return None
+
+    def finish(self, turn: VoiceTurn):
+        """Forget a completed turn (no-op if a newer turn replaced it)"""
+        with self._lock:
+            if self._turns.get(turn.session_id) is turn:
+                del self._turns[turn.session_id]
+
+    def get_stats(self) -> dict:
+        return {"active_turns": len(self._turns), "cancelled": self.cancelled_count}
+
+
+# Global turn registry
+_turn_registry = None
+
+
+def get_turn_registry() -> TurnRegistry:
+    """Get or create the process-wide turn registry"""
+    global _turn_registry
+    if _turn_registry is None:
+        _turn_registry = TurnRegistry()
+    return _turn_registry
@@ -0,0 +1,242 @@
+"""
+Boot Warm-up for Convonet Project
+Builds the agent graph/MCP session, opens DB pools and primes caches in the background at startup
+
+The first caller on a cold instance used to pay for spawning the db_todo MCP stdio
+subprocess, fetching tools and compiling the graph (5-10s, often past Twilio's 12s
+webhook timeout). create_app() now calls start_warmup(), which runs each registered
+step on its own background thread, and /readyz reports per-dependency state so the
+load balancer only routes to warm instances:
+
+    GET /readyz -> 200 {"ready": true, "dependencies": {"agent_graph": {"state": "ready", ...}, ...}}
+                   503 while a required dependency is still warming (or failed and retrying)
+
+A required step that fails (database not accepting connections yet, MCP subprocess
+crash) is retried on its thread with exponential backoff (WARMUP_RETRY_SECONDS doubling
+up to WARMUP_RETRY_MAX_SECONDS), so the instance becomes ready once the dependency
+recovers instead of failing /readyz for the life of the process.
+
+Other modules add steps with register_warmup_step(); init_socketio registers TTS cache
+priming this way. Disable with WARMUP_ON_BOOT=false (steps then run lazily as before).
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from flask import Blueprint, jsonify
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"  # dependency not configured on this instance
+
+
+class WarmupSkipped(Exception):
+    """Raised by a warm-up step whose dependency is not configured"""
+
+
+class WarmupStep:
+    """One dependency to warm; required steps gate readiness"""
+
+    def __init__(self, name: str, fn: Callable[[], Optional[str]], required: bool = True):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.state = PENDING
+        self.detail: Optional[str] = None
+        self.elapsed_ms: Optional[float] = None
+        self.attempts = 0
+        self.retry_in_s: Optional[float] = None
+
+    def run(self, app=None):
+        """One attempt at warming the dependency"""
+        self.state = WARMING
+        self.attempts += 1
+        self.retry_in_s = None
+        started = time.perf_counter()
+        try:
+            if app is not None:
+                with app.app_context():
+                    self.detail = self.fn()
+            else:
+                self.detail = self.fn()
+            self.state = READY
+        except WarmupSkipped as e:
+            self.state = SKIPPED
+            self.detail = str(e)
+        except Exception as e:
+            self.state = FAILED
+            self.detail = str(e)[:200]
+        self.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        icon = {READY: "🔥", SKIPPED: "⏭️", FAILED: "❌"}[self.state]
+        print(f"{icon} Warm-up {self.name}: {self.state} in {self.elapsed_ms}ms{f' ({self.detail})' if self.detail else ''}")
+
+    @property
+    def is_warm(self) -> bool:
+        return self.state in (READY, SKIPPED) or not self.required
+
+    def to_dict(self) -> dict:
+        return {"state": self.state, "required": self.required, "elapsed_ms": self.elapsed_ms, "detail": self.detail,
+                "attempts": self.attempts, "retry_in_s": self.retry_in_s}
+
+
+class Warmup:
+    """Registered warm-up steps and their progress (process-wide)"""
+
+    def __init__(self, retry_seconds: Optional[float] = None, retry_max_seconds: Optional[float] = None):
+        self.retry_seconds = retry_seconds if retry_seconds is not None else \
+            float(os.getenv('WARMUP_RETRY_SECONDS', '2'))
+        self.retry_max_seconds = retry_max_seconds if retry_max_seconds is not None else \
+            float(os.getenv('WARMUP_RETRY_MAX_SECONDS', '60'))
+        self._steps: Dict[str, WarmupStep] = {}
+        self._lock = threading.Lock()
+        self._app = None
+        self.started_at: Optional[float] = None
+
+    def register(self, name: str, fn: Callable[[], Optional[str]], required: bool = True) -> WarmupStep:
+        """Add (or replace a not-yet-started) step; steps registered after start() run immediately"""
+        with self._lock:
+            existing = self._steps.get(name)
+            if existing and existing.state != PENDING:
+                return existing
+            step = self._steps[name] = WarmupStep(name, fn, required)
+            started = self.started_at is not None
+        if started:
+            self._spawn(step)
+        return step
+
+    def _spawn(self, step: WarmupStep):
+        threading.Thread(target=self._run_step, args=(step,), name=f"warmup-{step.name}", daemon=True).start()
+
+    def _run_step(self, step: WarmupStep):
+        """Run a step, retrying a failed required one with exponential backoff until it is warm"""
+        delay = self.retry_seconds
+        step.run(self._app)
+        while step.state == FAILED and step.required:
+            step.retry_in_s = delay
+            print(f"🔁 Warm-up {step.name}: retrying in {delay:g}s (attempt {step.attempts + 1})")
+            time.sleep(delay)
+            step.run(self._app)
+            delay = min(delay * 2, self.retry_max_seconds)
+
+    def start(self, app=None) -> bool:
+        """Run every registered step on its own thread (idempotent; create_app may run twice)"""
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.time()
+            self._app = app
+            steps = list(self._steps.values())
+        print(f"🔥 Warm-up started: {', '.join(step.name for step in steps)}")
+        for step in steps:
+            self._spawn(step)
+        return True
+
+    @property
+    def enabled(self) -> bool:
+        return self.started_at is not None
+
+    def is_ready(self) -> bool:
+        # Without boot warm-up dependencies warm lazily on first use; don't hold traffic back
+        if not self.enabled:
+            return True
+        return all(step.is_warm for step in self._steps.values())
+
+    def status(self) -> dict:
+        return {
+            "ready": self.is_ready(),
+            "warmup_enabled": self.enabled,
+            "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else None,
+            "dependencies": {name: step.to_dict() for name, step in self._steps.items()}
+        }
+
+
+# Global warm-up registry
+warmup = Warmup()
+
+
+def get_warmup() -> Warmup:
+    return warmup
+
+
+def is_warmup_enabled() -> bool:
+    """Boot warm-up runs unless WARMUP_ON_BOOT=false"""
+    return os.getenv('WARMUP_ON_BOOT', 'true').lower() == 'true'
+
+
+def register_warmup_step(name: str, fn: Callable[[], Optional[str]], required: bool = True) -> WarmupStep:
+    return warmup.register(name, fn, required)
+
+
+def _warm_agent_graph() -> str:
+    """Spawn the MCP stdio session, load tools and compile the graph on the agent runtime loop"""
+    from convonet.agent_runtime import get_agent_runtime
+
+    runtime = get_agent_runtime()
+    graph = runtime.get_agent_graph(timeout=float(os.getenv('WARMUP_AGENT_TIMEOUT', '60')))
+    runtime.get_http_client()
+    return f"{len(graph.nodes)} nodes"
+
+
+def _warm_database() -> str:
+    """Open a connection in both pools used on the request path (Flask-SQLAlchemy and db_todo)"""
+    if not os.getenv('DB_URI'):
+        raise WarmupSkipped("DB_URI not set")
+    from sqlalchemy import text
+    from extensions import db
+
+    db.session.execute(text("SELECT 1"))
+    db.session.remove()
+
+    from convonet.mcps.local_servers import db_todo
+    db_todo._init_database()
+    if db_todo.engine is not None:
+        with db_todo.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    return "connected"
+
+
+def _warm_redis() -> str:
+    from convonet.redis_manager import redis_manager
+
+    if not redis_manager.is_available():
+        raise WarmupSkipped("Redis not configured (in-memory fallbacks)")
+    redis_manager.redis_client.ping()
+    return "ping ok"
+
+
+def _warm_http_pools() -> str:
+    """TLS handshakes to Deepgram/OpenAI/Twilio before the first caller needs them"""
+    from convonet.http_clients import prewarm_connections
+
+    warmed = prewarm_connections()
+    if not warmed:
+        raise WarmupSkipped("no providers reachable or configured")
+    return ", ".join(warmed)
+
+
+register_warmup_step("agent_graph", _warm_agent_graph)
+register_warmup_step("database", _warm_database)
+register_warmup_step("redis", _warm_redis, required=False)
+register_warmup_step("http_pools", _warm_http_pools, required=False)
+
+
+def start_warmup(app=None) -> bool:
+    """Start the boot warm-up in the background (call at the end of create_app)"""
+    if not is_warmup_enabled():
+        print("⏭️ Boot warm-up disabled (WARMUP_ON_BOOT=false)")
+        return False
+    return warmup.start(app)
+
+
+warmup_bp = Blueprint('warmup', __name__)
+
+
+@warmup_bp.route('/readyz')
+def readyz():
+    """Readiness probe: 200 once every required dependency is warm, 503 before"""
+    status = warmup.status()
+    return jsonify(status), 200 if status["ready"] else 503
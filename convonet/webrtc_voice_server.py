@@ -4,6 +4,7 @@ Provides high-quality audio streaming and real-time speech recognition
 """
 
 import asyncio
+import concurrent.futures
 import json
 import os
 import base64
@@ -12,31 +13,49 @@ import re
 from uuid import UUID
 from urllib.parse import quote
 from flask import Blueprint, render_template, request, jsonify
-from flask_socketio import SocketIO, emit, join_room, leave_room
-import openai
-from convonet.assistant_graph_todo import get_agent
-from convonet.state import AgentState
+from flask_socketio import SocketIO, emit, join_room
 from convonet.voice_intent_utils import has_transfer_intent
-from langchain_core.messages import HumanMessage
-from twilio.rest import Client
-
-# Deepgram WebRTC integration
-from deepgram_webrtc_integration import transcribe_audio_with_deepgram_webrtc, get_deepgram_webrtc_info
+from convonet.agent_runtime import get_agent_runtime
+from convonet.audio_transport import (
+    AUDIO_TRANSPORT_BASE64, AUDIO_TRANSPORT_BINARY, negotiate_audio_transport, payload_transport,
+    decode_audio_payload, encode_audio_payload, measure_outbound, transport_stats, get_transport_stats
+)
+from convonet.streaming_stt import open_streaming_transcriber, is_streaming_stt_enabled
+from convonet.stt_providers import get_stt_router, get_stt_stats, STTRequest
+from convonet.transcription_cache import get_transcription_cache
+from convonet.local_stt import is_local_stt_enabled, prewarm_local_stt
+from convonet.session_cache import get_session_cache
+from convonet.vad import create_vad, is_server_vad_enabled, SUPPORTED_ENCODINGS, SPEECH_START, SPEECH_END
+from convonet.tts_service import (
+    get_openai_client, synthesize_speech, stream_sentence_audio, stream_sentences_audio,
+    iter_sentences, is_streaming_tts_enabled
+)
+from convonet.tts_cache import get_tts_cache, prewarm_tts_cache
+from convonet.warmup import register_warmup_step
+from convonet.activity_log import get_activity_log
+from convonet.audio_codec import is_webm, demux_webm, detect_container, AudioFormat, AudioCodecError, DEFAULT_RAW_FORMAT
+from convonet.audio_stats import StreamingAudioStats, analyze_audio, can_analyze
+from convonet.instrumentation import get_instrumentation
+from convonet.http_clients import get_http_clients, get_twilio_client
+from convonet.session_resume import get_resumable_sessions, is_session_resume_enabled
+from convonet.scaling import WORKER_ID, claim_session, release_session, get_worker_bus, is_scale_out_enabled
+from convonet.speculation import Speculator, is_speculation_enabled, get_speculation_stats
+from convonet.voice_turns import get_turn_registry, TurnCancelled
+from convonet.turn_scheduler import create_turn_scheduler, QUEUED, REJECTED
+from convonet.metrics import (
+    get_metrics_registry, observe_stage, stage_timer,
+    STAGE_AUDIO_INGEST, STAGE_STT, STAGE_AGENT, STAGE_EMIT, STAGE_TURN
+)
 
 # Import the blueprint (optional - not used in this module)
 # from convonet.routes import convonet_todo_bp
 
-# Sentry integration for monitoring Redis interactions and errors
-try:
-    import sentry_sdk
-    from sentry_sdk.integrations.flask import FlaskIntegration
-    from sentry_sdk.integrations.socketio import SocketIOIntegration
-    SENTRY_AVAILABLE = True
-except ImportError:
-    SENTRY_AVAILABLE = False
 # Optional Redis imports - app should work without them
 try:
-    from convonet.redis_manager import redis_manager, create_session, get_session, update_session, delete_session
+    from convonet.redis_manager import (
+        redis_manager, create_session, get_session, update_session, delete_session,
+        append_audio_chunk, get_audio_buffer, set_audio_buffer, clear_audio_buffer
+    )
     REDIS_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ Redis not available: {e}")
@@ -54,6 +73,14 @@ except ImportError as e:
         return False
     def delete_session(*args, **kwargs):
         return False
+    def append_audio_chunk(*args, **kwargs):
+        return None
+    def get_audio_buffer(*args, **kwargs):
+        return None
+    def set_audio_buffer(*args, **kwargs):
+        return False
+    def clear_audio_buffer(*args, **kwargs):
+        return False
 
 # Optional test PIN support (disabled by default unless explicitly enabled)
 ENABLE_TEST_PIN = os.getenv('ENABLE_TEST_PIN', 'false').lower() == 'true'
@@ -61,15 +88,60 @@ TEST_VOICE_PIN = os.getenv('TEST_VOICE_PIN', '1234')
 
 webrtc_bp = Blueprint('webrtc_voice', __name__, url_prefix='/convonet_todo/webrtc')
 
-# Initialize OpenAI client for Whisper and TTS
-openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# Initialize OpenAI client for Whisper and TTS (shared with convonet.tts_service)
+openai_client = get_openai_client()
+
+# Per-process voice sessions keyed by request.sid (write-behind to Redis, or memory-only without it)
+session_cache = get_session_cache()
+
+# Live streaming STT connections per session (process-local, like the websocket itself)
+streaming_transcribers = {}
+
+# Negotiated audio transport per session ('binary' or 'base64'), set at authenticate
+audio_transports = {}
+
+# Server-side VAD/endpointing per session (only for raw PCM/μ-law recordings)
+vad_detectors = {}
+
+# Running audio-quality statistics per session (only for raw PCM/μ-law recordings)
+audio_analyzers = {}
+
+# Speculative agent runs on stable interim transcripts, per session (rides on streaming STT)
+speculators = {}
+
+# Current (cancellable) reply turn per session, for barge-in
+turn_registry = get_turn_registry()
+
+# Sampled/aggregated Sentry reporting (see instrumentation.py)
+instrumentation = get_instrumentation()
+
+# Resume tokens, parked sessions and reconnect aliases (see session_resume.py)
+resumable_sessions = get_resumable_sessions()
+
+# Routes stop_recording/cancel to the worker that owns the session when scaled out
+worker_bus = get_worker_bus()
+
+# Fixed fallback replies (spoken often enough to pre-warm in the TTS cache)
+AGENT_TIMEOUT_REPLY = "I'm sorry, I'm taking too long to process that request. Please try again."
+AGENT_ERROR_REPLY = "I'm sorry, I encountered an error. Please try again."
+# Name-free part of the welcome greeting (cached and pre-warmed; the name segment is synthesized per user)
+WELCOME_GREETING_BODY = "I'm your Convonet productivity assistant. How can I help you today?"
+BUSY_MESSAGE = "All assistants are busy right now. Please hold on a moment and try again."
+HOLD_MESSAGE = "Busy, please hold - your request is queued."
 
-# Active sessions storage (fallback for when Redis is unavailable)
-active_sessions = {}
+
+def speakable_reply(response: str) -> str:
+    """Replace an AGENT_TIMEOUT / AGENT_ERROR marker from the agent with the reply the caller hears"""
+    if response.startswith("AGENT_TIMEOUT"):
+        return AGENT_TIMEOUT_REPLY
+    if response.startswith("AGENT_ERROR"):
+        return AGENT_ERROR_REPLY
+    return response
 
 # Global references for background tasks
 socketio = None
 flask_app = None
+turn_scheduler = None  # bounded STT/agent/TTS worker pool, created in init_socketio
 
 
 def build_customer_profile_from_session(session_data: dict | None) -> dict | None:
@@ -109,203 +181,25 @@ def build_customer_profile_from_session(session_data: dict | None) -> dict | Non
         except Exception as e:
             print(f"⚠️ Unable to load customer profile for call center: {e}")
     
-    # Retrieve conversation history and activities from LangGraph
-    try:
-        from convonet.routes import _get_agent_graph
-        from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-        import asyncio
-        
-        # Generate thread_id from user_id (same format as used in _run_agent_async)
-        thread_id = f"user-{user_id}" if user_id else None
-        
-        if thread_id:
-            try:
-                # Get agent graph
-                agent_graph = asyncio.run(_get_agent_graph())
-                config = {"configurable": {"thread_id": thread_id}}
-                
-                # Get conversation state
-                state = agent_graph.get_state(config=config)
-                
+    # Conversation history and activities are recorded incrementally by the agent graph
+    thread_id = f"user-{user_id}" if user_id else None  # same format as used in _run_agent_async
+    if thread_id:
+        try:
+            log = get_activity_log()
+            profile_data = log.get_profile_data(thread_id)
+            if profile_data is None:
+                # Thread predates the log, or its log was evicted (e.g. after a restart) - backfill once in a single pass
+                state = get_agent_runtime().get_agent_state(thread_id)
                 if state and state.values:
-                    messages = state.values.get("messages", [])
-                    
-                    # Extract conversation history (user and assistant messages)
-                    conversation = []
-                    activities = []
-                    
-                    for msg in messages:
-                        if isinstance(msg, HumanMessage):
-                            conversation.append({
-                                "type": "user",
-                                "content": str(msg.content),
-                                "timestamp": None  # LangGraph doesn't store timestamps by default
-                            })
-                        elif isinstance(msg, AIMessage):
-                            # Check if this AI message has tool calls
-                            tool_calls_info = []
-                            if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                                for tc in msg.tool_calls:
-                                    tool_calls_info.append({
-                                        "name": tc.get('name', ''),
-                                        "args": tc.get('args', {})
-                                    })
-                            
-                            conversation.append({
-                                "type": "assistant",
-                                "content": str(msg.content),
-                                "timestamp": None,
-                                "tool_calls": tool_calls_info if tool_calls_info else None
-                            })
-                        elif isinstance(msg, ToolMessage):
-                            # Extract tool execution results (calendar events, todos, etc.)
-                            tool_name = getattr(msg, 'name', '') or ''
-                            tool_call_id = getattr(msg, 'tool_call_id', '')
-                            tool_content = str(msg.content)
-                            
-                            # Also check previous AIMessage for tool_calls to get tool name
-                            # Look for the AIMessage that has this tool_call_id
-                            tool_name_from_ai = ''
-                            for prev_msg in messages:
-                                if isinstance(prev_msg, AIMessage) and hasattr(prev_msg, 'tool_calls'):
-                                    for tc in prev_msg.tool_calls or []:
-                                        if tc.get('id') == tool_call_id:
-                                            tool_name_from_ai = tc.get('name', '')
-                                            break
-                                    if tool_name_from_ai:
-                                        break
-                            
-                            # Use tool name from AI message if available, otherwise use ToolMessage name
-                            effective_tool_name = tool_name_from_ai or tool_name
-                            
-                            # Get tool call arguments from the corresponding AIMessage
-                            tool_args = {}
-                            for prev_msg in messages:
-                                if isinstance(prev_msg, AIMessage) and hasattr(prev_msg, 'tool_calls'):
-                                    for tc in prev_msg.tool_calls or []:
-                                        if tc.get('id') == tool_call_id:
-                                            tool_args = tc.get('args', {})
-                                            break
-                                    if tool_args:
-                                        break
-                            
-                            # Parse tool results to extract activities
-                            if 'create_calendar_event' in effective_tool_name.lower() or 'calendar' in tool_content.lower():
-                                # Extract calendar event details from tool args or response
-                                try:
-                                    import json
-                                    title = tool_args.get('title', '')
-                                    event_from = tool_args.get('event_from', '')
-                                    event_to = tool_args.get('event_to', '')
-                                    description = tool_args.get('description', '')
-                                    
-                                    # If tool_content is JSON, parse it
-                                    if tool_content.startswith('{'):
-                                        try:
-                                            event_data = json.loads(tool_content)
-                                            title = title or event_data.get('title', '')
-                                            event_from = event_from or event_data.get('event_from', '')
-                                            event_to = event_to or event_data.get('event_to', '')
-                                            description = description or event_data.get('description', '')
-                                        except:
-                                            pass
-                                    
-                                    # Extract from text response if args not available
-                                    if not title and tool_content:
-                                        # Try to extract from response like "Calendar event 'title' created..."
-                                        import re
-                                        match = re.search(r"Calendar event '([^']+)'", tool_content)
-                                        if match:
-                                            title = match.group(1)
-                                    
-                                    activities.append({
-                                        "type": "calendar_event",
-                                        "action": "created",
-                                        "title": title or "Calendar Event",
-                                        "start": event_from or "",
-                                        "end": event_to or "",
-                                        "description": description or "",
-                                        "raw": tool_content
-                                    })
-                                except Exception as e:
-                                    print(f"⚠️ Error parsing calendar event: {e}")
-                                    activities.append({
-                                        "type": "calendar_event",
-                                        "action": "created",
-                                        "raw": tool_content
-                                    })
-                            
-                            elif 'create_todo' in effective_tool_name.lower() or ('todo' in tool_content.lower() and 'create' in effective_tool_name.lower()):
-                                # Extract todo details from tool args or response
-                                try:
-                                    import json
-                                    title = tool_args.get('title', '')
-                                    priority = tool_args.get('priority', '')
-                                    due_date = tool_args.get('due_date', '')
-                                    description = tool_args.get('description', '')
-                                    
-                                    # If tool_content is JSON, parse it
-                                    if tool_content.startswith('{'):
-                                        try:
-                                            todo_data = json.loads(tool_content)
-                                            title = title or todo_data.get('title', '')
-                                            priority = priority or todo_data.get('priority', '')
-                                            due_date = due_date or todo_data.get('due_date', '')
-                                            description = description or todo_data.get('description', '')
-                                        except:
-                                            pass
-                                    
-                                    activities.append({
-                                        "type": "todo",
-                                        "action": "created",
-                                        "title": title or "Todo",
-                                        "priority": priority or "",
-                                        "due_date": due_date or "",
-                                        "description": description or "",
-                                        "raw": tool_content
-                                    })
-                                except Exception as e:
-                                    print(f"⚠️ Error parsing todo: {e}")
-                                    activities.append({
-                                        "type": "todo",
-                                        "action": "created",
-                                        "raw": tool_content
-                                    })
-                            
-                            elif 'complete_todo' in effective_tool_name.lower():
-                                activities.append({
-                                    "type": "todo",
-                                    "action": "completed",
-                                    "raw": tool_content
-                                })
-                            
-                            elif 'update_todo' in effective_tool_name.lower():
-                                activities.append({
-                                    "type": "todo",
-                                    "action": "updated",
-                                    "raw": tool_content
-                                })
-                            
-                            elif 'delete_todo' in effective_tool_name.lower():
-                                activities.append({
-                                    "type": "todo",
-                                    "action": "deleted",
-                                    "raw": tool_content
-                                })
-                    
-                    profile["conversation_history"] = conversation
-                    profile["activities"] = activities
-                    
-                    print(f"📋 Retrieved conversation history: {len(conversation)} messages, {len(activities)} activities")
-                    
-            except Exception as e:
-                print(f"⚠️ Unable to retrieve conversation history: {e}")
-                import traceback
-                traceback.print_exc()
-    except Exception as e:
-        print(f"⚠️ Error setting up conversation history retrieval: {e}")
-        import traceback
-        traceback.print_exc()
+                    log.backfill_from_messages(thread_id, state.values.get("messages", []))
+                profile_data = log.get_profile_data(thread_id, allow_partial=True)
+            if profile_data:
+                profile.update(profile_data)
+                print(f"📋 Retrieved conversation history: {len(profile['conversation_history'])} messages, {len(profile['activities'])} activities")
+        except Exception as e:
+            print(f"⚠️ Unable to retrieve conversation history: {e}")
+            import traceback
+            traceback.print_exc()
     
     return profile
 
@@ -358,37 +252,134 @@ def cache_call_center_profile(extension: str, session_data: dict | None, call_si
         print(f"⚠️ Failed to cache call center profile: {e}")
 
 
-def is_transfer_in_progress(session_id: str, session_record: dict | None = None) -> bool:
-    """Check whether a transfer is already in progress for this WebRTC session."""
+def append_session_audio(session_id: str, audio_chunk: bytes) -> int | None:
+    """Append an incoming audio chunk to the session's append-only buffer.
+    
+    Redis uses binary APPEND on a dedicated raw key; the in-memory fallback uses a
+    bytearray. Either way each chunk costs O(chunk) instead of re-encoding the
+    whole accumulated buffer.
+    """
+    if redis_manager.is_available():
+        return append_audio_chunk(session_id, audio_chunk)
+    
+    session = session_cache.get(session_id)
+    if session is None:
+        return None
+    session.audio_chunks.extend(audio_chunk)
+    return len(session.audio_chunks)
+
+
+def get_session_audio(session_id: str) -> bytes:
+    """Return the audio accumulated from audio_data chunks for this session."""
+    if redis_manager.is_available():
+        return get_audio_buffer(session_id) or b''
+    session = session_cache.get(session_id)
+    return bytes(session.audio_chunks) if session else b''
+
+
+def clear_session_audio(session_id: str):
+    """Reset the chunk buffer at the start of a new utterance."""
+    if redis_manager.is_available():
+        clear_audio_buffer(session_id)
+    else:
+        session = session_cache.get(session_id)
+        if session:
+            session.audio_chunks = bytearray()
+
+
+def store_session_audio(session_id: str, audio: bytes) -> bool:
+    """Replace the chunk buffer with the complete recorded blob (binary transport)."""
+    if redis_manager.is_available():
+        return set_audio_buffer(session_id, audio)
+    session = session_cache.get(session_id)
+    if session is None:
+        return False
+    session.audio_chunks = bytearray(audio)
+    return True
+
+
+def emit_to_room(event: str, data: dict, session_id: str):
+    """Emit to the session's room; while the caller is reconnecting, turn results are held for replay"""
+    if resumable_sessions.buffer_if_parked(session_id, event, data):
+        return
+    socketio.emit(event, data, namespace='/voice', room=session_id)
+
+
+def emit_session_audio(event: str, data: dict, audio_bytes: bytes, session_id: str):
+    """Emit an event carrying audio in the session's negotiated transport.
+    
+    Binary sessions get a raw Socket.IO attachment; others get the base64 string.
+    """
+    transport = audio_transports.get(session_id, AUDIO_TRANSPORT_BASE64)
+    with stage_timer(STAGE_EMIT), measure_outbound(transport, audio_bytes):
+        data['audio'] = encode_audio_payload(audio_bytes, transport)
+        emit_to_room(event, data, session_id)
+
+
+def issue_resume_token(session_id: str) -> str | None:
+    """Rotate the session's resume token (sent to the client with authenticated/resumed)"""
+    if not is_session_resume_enabled():
+        return None
+    session = session_cache.get(session_id)
+    token = resumable_sessions.issue_token(session_id, previous=session.resume_token if session else None)
+    session_cache.update(session_id, resume_token=token)
+    return token or None
+
+
+def end_voice_session(session_id: str):
+    """Tear down a session for good (disconnect without resume, or grace period over)"""
+    instrumentation.end_session(session_id)
+    turn_registry.cancel(session_id, "disconnected")
+    close_streaming_transcriber(session_id)
+    audio_transports.pop(session_id, None)
+    vad_detectors.pop(session_id, None)
+    audio_analyzers.pop(session_id, None)
+    
     try:
-        if session_record and 'transfer_in_progress' in session_record:
-            return str(session_record['transfer_in_progress']).lower() == 'true'
-        
+        storage = session_cache.storage
+        session = session_cache.get(session_id)
+        if session and session.resume_token:
+            resumable_sessions.revoke_token(session.resume_token)
         if redis_manager.is_available():
-            value = redis_manager.redis_client.hget(f"session:{session_id}", "transfer_in_progress")
-            if value is not None:
-                return str(value).lower() == 'true'
-        else:
-            if session_id in active_sessions:
-                return bool(active_sessions[session_id].get('transfer_in_progress'))
+            clear_session_audio(session_id)
+        session_cache.evict(session_id)
+        release_session(session_id)
+        print(f"✅ Session deleted ({storage}): {session_id}")
+        sentry_capture_voice_event("session_deleted", session_id, details={"storage": storage})
     except Exception as e:
-        print(f"⚠️ Unable to read transfer flag for session {session_id}: {e}")
-    return False
+        print(f"❌ Error deleting session: {e}")
+        sentry_capture_redis_operation("delete_session", session_id, False, str(e))
+
+
+def cancel_session_turn(session_id: str, reason: str = "cancelled"):
+    """Abort the session's in-flight turn and tell the client to halt playback."""
+    turn = turn_registry.cancel(session_id, reason)
+    if turn is not None:
+        print(f"🛑 Cancelled turn {turn.turn_id} for session {session_id} ({reason})")
+        emit_to_room('stop_playback', {'turn_id': turn.turn_id, 'reason': reason}, session_id)
+    return turn
+
+
+def close_streaming_transcriber(session_id: str):
+    """Abort any live transcription stream still open for this session."""
+    transcriber = streaming_transcribers.pop(session_id, None)
+    if transcriber:
+        transcriber.close()
+    speculator = speculators.pop(session_id, None)
+    if speculator:
+        speculator.discard()
+
+
+def is_transfer_in_progress(session_id: str) -> bool:
+    """Check whether a transfer is already in progress for this WebRTC session."""
+    session = session_cache.get(session_id)
+    return session.transfer_in_progress if session else False
 
 
-def set_transfer_flag(session_id: str, value: bool, session_record: dict | None = None):
-    """Persist the transfer_in_progress flag for this WebRTC session."""
-    str_value = 'True' if value else 'False'
+def set_transfer_flag(session_id: str, value: bool):
+    """Set the transfer_in_progress flag for this WebRTC session (written back to Redis)."""
     try:
-        if session_record is not None:
-            session_record['transfer_in_progress'] = str_value
-        
-        if redis_manager.is_available():
-            redis_manager.redis_client.hset(f"session:{session_id}", "transfer_in_progress", str_value)
-        else:
-            if session_id not in active_sessions:
-                active_sessions[session_id] = {}
-            active_sessions[session_id]['transfer_in_progress'] = value
+        session_cache.update(session_id, transfer_in_progress=value)
     except Exception as e:
         print(f"⚠️ Unable to set transfer flag for session {session_id}: {e}")
 
@@ -428,7 +419,7 @@ def initiate_agent_transfer(session_id: str, extension: str, department: str, re
     # Pass extension parameter to transfer_bridge endpoint
     conference_url = f"{base_url.rstrip('/')}/convonet_todo/twilio/voice_assistant/transfer_bridge?extension={quote(extension)}"
 
-    client = Client(account_sid, auth_token)
+    client = get_twilio_client(account_sid, auth_token)
     response_details = {
         'conference': conference_name,
         'conference_url': conference_url,
@@ -489,51 +480,25 @@ def initiate_agent_transfer(session_id: str, extension: str, department: str, re
 
     return True, response_details
 
-# Sentry helper functions
+# Sentry helper functions (counted and sampled; failures reported asynchronously)
 def sentry_capture_redis_operation(operation: str, session_id: str, success: bool, error: str = None):
     """Capture Redis operations in Sentry for monitoring"""
-    if SENTRY_AVAILABLE:
-        with sentry_sdk.configure_scope() as scope:
-            scope.set_tag("component", "webrtc_voice_server")
-            scope.set_tag("operation", f"redis_{operation}")
-            scope.set_context("redis_operation", {
-                "session_id": session_id,
-                "operation": operation,
-                "success": success,
-                "error": error
-            })
-            if success:
-                sentry_sdk.add_breadcrumb(
-                    message=f"Redis {operation} successful",
-                    category="redis",
-                    level="info"
-                )
-            else:
-                sentry_sdk.capture_message(f"Redis {operation} failed: {error}", level="error")
+    if success:
+        instrumentation.event(f"redis_{operation}", session_id)
+    else:
+        instrumentation.error(f"redis_{operation}", session_id, message=f"Redis {operation} failed: {error}",
+                              details={"operation": operation, "error": error})
 
 def sentry_capture_voice_event(event: str, session_id: str, user_id: str = None, details: dict = None):
     """Capture voice assistant events in Sentry"""
-    if SENTRY_AVAILABLE:
-        with sentry_sdk.configure_scope() as scope:
-            scope.set_tag("component", "webrtc_voice_server")
-            scope.set_tag("event", event)
-            scope.set_context("voice_event", {
-                "session_id": session_id,
-                "user_id": user_id,
-                "event": event,
-                "details": details or {}
-            })
-            sentry_sdk.add_breadcrumb(
-                message=f"Voice event: {event}",
-                category="voice_assistant",
-                level="info"
-            )
+    instrumentation.event(event, session_id, user_id=user_id, details=details)
 
 
 @webrtc_bp.route('/voice-assistant')
 def voice_assistant():
     """Render the WebRTC voice assistant interface"""
-    return render_template('webrtc_voice_assistant.html')
+    transports = ['websocket'] if is_scale_out_enabled() else ['websocket', 'polling']
+    return render_template('webrtc_voice_assistant.html', socketio_transports=transports)
 
 
 @webrtc_bp.route('/debug-session/<session_id>')
@@ -541,6 +506,8 @@ def debug_session(session_id):
     """Debug endpoint to check Redis session data"""
     try:
         if redis_manager.is_available():
+            # Write pending cached changes first so the hash reflects the live session
+            session_cache.flush()
             session_data = get_session(session_id)
             if session_data:
                 # Convert bytes to strings for JSON serialization
@@ -551,6 +518,9 @@ def debug_session(session_id):
                     else:
                         debug_data[key] = str(value)
                 
+                # Raw chunk buffer (binary key, filled by audio_data events)
+                debug_data['chunk_buffer_length'] = len(get_session_audio(session_id))
+                
                 # Add audio buffer info
                 audio_buffer = session_data.get('audio_buffer', '')
                 debug_data['audio_buffer_length'] = len(audio_buffer)
@@ -583,14 +553,14 @@ def debug_session(session_id):
                 })
         else:
             # Check in-memory storage
-            if session_id in active_sessions:
-                session_data = active_sessions[session_id]
+            session = session_cache.get(session_id)
+            if session:
                 debug_data = {
-                    'authenticated': session_data.get('authenticated', False),
-                    'user_id': session_data.get('user_id'),
-                    'user_name': session_data.get('user_name'),
-                    'is_recording': session_data.get('is_recording', False),
-                    'audio_buffer_length': len(session_data.get('audio_buffer', b'')),
+                    'authenticated': session.authenticated,
+                    'user_id': session.user_id,
+                    'user_name': session.user_name,
+                    'is_recording': session.is_recording,
+                    'audio_buffer_length': len(session.audio_blob) or len(session.audio_chunks),
                     'storage': 'memory'
                 }
                 return jsonify({
@@ -613,21 +583,106 @@ def debug_session(session_id):
         })
 
 
+@webrtc_bp.route('/audio-transport-stats')
+def audio_transport_stats():
+    """Bytes on the wire and codec CPU per turn for binary vs. base64 audio transport"""
+    stats = get_transport_stats()
+    stats['active_sessions'] = {
+        transport: sum(1 for t in audio_transports.values() if t == transport)
+        for transport in (AUDIO_TRANSPORT_BINARY, AUDIO_TRANSPORT_BASE64)
+    }
+    return jsonify({'success': True, 'stats': stats})
+
+
+@webrtc_bp.route('/metrics')
+def voice_metrics():
+    """Per-stage latency percentiles (JSON), or Prometheus text with ?format=prometheus"""
+    registry = get_metrics_registry()
+    if request.args.get('format') == 'prometheus':
+        return registry.prometheus_text(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    return jsonify({'success': True, 'metrics': registry.snapshot(), 'stt': get_stt_stats(), 'prometheus': registry.prometheus_text()})
+
+
+@webrtc_bp.route('/stt-provider-stats')
+def stt_provider_stats():
+    """Per-provider STT latency, hedge and circuit breaker state"""
+    return jsonify({'success': True, 'stats': get_stt_stats()})
+
+
+@webrtc_bp.route('/transcription-cache-stats')
+def transcription_cache_stats():
+    """Memory/Redis hit counters for transcripts cached by audio fingerprint"""
+    return jsonify({'success': True, 'stats': get_transcription_cache().get_stats()})
+
+
+@webrtc_bp.route('/speculation-stats')
+def speculation_stats():
+    """Started/committed/discarded counts for speculative agent runs"""
+    return jsonify({'success': True, 'enabled': is_speculation_enabled(), 'stats': get_speculation_stats(), 'pending': len(speculators)})
+
+
+@webrtc_bp.route('/turn-scheduler-stats')
+def turn_scheduler_stats():
+    """Running/queued/rejected turn counts for the bounded audio processing pool"""
+    if turn_scheduler is None:
+        return jsonify({'success': False, 'message': 'Socket.IO not initialized'})
+    return jsonify({'success': True, 'stats': turn_scheduler.get_stats(), 'turns': turn_registry.get_stats()})
+
+
+@webrtc_bp.route('/tts-cache-stats')
+def tts_cache_stats():
+    """Hit/miss counters and tier sizes for the TTS audio cache"""
+    return jsonify({'success': True, 'stats': get_tts_cache().get_stats()})
+
+
+@webrtc_bp.route('/instrumentation-stats')
+def instrumentation_stats():
+    """Event counters and sampling/report counts for the Sentry instrumentation facade"""
+    return jsonify({'success': True, 'stats': instrumentation.get_stats()})
+
+
+@webrtc_bp.route('/session-resume-stats')
+def session_resume_stats():
+    """Issued/parked/resumed/expired counts for resumable voice sessions"""
+    return jsonify({'success': True, 'stats': resumable_sessions.get_stats()})
+
+
+@webrtc_bp.route('/http-pool-stats')
+def http_pool_stats():
+    """Open provider pools, HTTP/2 status and DNS cache hits for outbound HTTP clients"""
+    return jsonify({'success': True, 'stats': get_http_clients().get_stats()})
+
+
+@webrtc_bp.route('/scaling-stats')
+def scaling_stats():
+    """This worker's id and cross-worker forwarding counters"""
+    return jsonify({'success': True, 'stats': worker_bus.get_stats()})
+
+
+@webrtc_bp.route('/session-cache-stats')
+def session_cache_stats():
+    """Hit/miss counts and write-behind flush statistics for the voice session cache"""
+    return jsonify({'success': True, 'stats': session_cache.get_stats()})
+
+
 @webrtc_bp.route('/clear-session/<session_id>')
 def clear_session(session_id):
     """Clear Redis session data for testing"""
     try:
+        # The in-flight turn (if any) lives on the worker that owns the socket
+        worker_bus.dispatch(session_id, 'cancel', {'reason': 'cleared'})
         if redis_manager.is_available():
             # Clear the session
-            delete_session(session_id)
+            clear_session_audio(session_id)
+            session_cache.evict(session_id)
             return jsonify({
                 'success': True,
                 'message': f'Session {session_id} cleared from Redis'
             })
         else:
             # Clear from memory
-            if session_id in active_sessions:
-                del active_sessions[session_id]
+            if session_id in session_cache:
+                session_cache.evict(session_id)
                 return jsonify({
                     'success': True,
                     'message': f'Session {session_id} cleared from memory'
@@ -649,9 +704,25 @@ def init_socketio(socketio_instance: SocketIO, app):
     """Initialize Socket.IO event handlers"""
     
     # Store socketio instance and Flask app for background tasks
-    global socketio, flask_app
+    global socketio, flask_app, turn_scheduler
     socketio = socketio_instance
     flask_app = app  # Store Flask app directly (passed as parameter)
+    turn_scheduler = create_turn_scheduler(spawn=socketio.start_background_task)
+    instrumentation.start()
+    
+    # Synthesize fixed phrases (plus TTS_PREWARM_PHRASES) into the TTS cache during boot warm-up
+    static_phrases = [WELCOME_GREETING_BODY, AGENT_TIMEOUT_REPLY, AGENT_ERROR_REPLY]
+    get_tts_cache().add_static_phrases(static_phrases)
+    if os.getenv('OPENAI_API_KEY'):
+        register_warmup_step(
+            "tts_cache",
+            lambda: prewarm_tts_cache(synthesize_speech, defaults=static_phrases),
+            required=False
+        )
+    
+    # Load the local CPU STT model during boot warm-up when it is in the provider chain
+    if is_local_stt_enabled():
+        register_warmup_step("local_stt", prewarm_local_stt, required=False)
     
     @socketio.on('connect', namespace='/voice')
     def handle_connect():
@@ -662,87 +733,109 @@ def init_socketio(socketio_instance: SocketIO, app):
         # Capture connection event in Sentry
         sentry_capture_voice_event("client_connected", session_id)
         
-        # Initialize session in Redis (with fallback to in-memory)
-        session_data = {
-            'authenticated': 'False',
-            'user_id': '',
-            'user_name': '',
-            'audio_buffer': '',
-            'is_recording': 'False',
-            'connected_at': str(time.time())
-        }
-        
-        try:
-            if redis_manager.is_available():
-                success = create_session(session_id, session_data, ttl=3600)  # 1 hour TTL
-                if success:
-                    print(f"✅ Session stored in Redis: {session_id}")
-                    sentry_capture_redis_operation("create_session", session_id, True)
-                else:
-                    print(f"❌ Failed to store session in Redis: {session_id}")
-                    sentry_capture_redis_operation("create_session", session_id, False, "Redis create_session returned False")
-            else:
-                # Fallback to in-memory storage
-                active_sessions[session_id] = {
-                    'authenticated': False,
-                    'user_id': None,
-                    'user_name': None,
-                    'audio_buffer': b'',
-                    'is_recording': False
-                }
-                print(f"⚠️ Using in-memory storage (Redis unavailable): {session_id}")
-                sentry_capture_voice_event("redis_fallback", session_id, details={"storage": "in_memory"})
-        except Exception as e:
-            print(f"❌ Error creating session: {e}")
-            sentry_capture_redis_operation("create_session", session_id, False, str(e))
-            # Fallback to in-memory storage on error
-            active_sessions[session_id] = {
-                'authenticated': False,
-                'user_id': None,
-                'user_name': None,
-                'audio_buffer': b'',
-                'is_recording': False
-            }
+        # Initialize the cached session (written behind to Redis when available)
+        session_cache.create(session_id)
+        claim_session(session_id)
+        if redis_manager.is_available():
+            print(f"✅ Session cached (write-behind to Redis): {session_id}")
+        else:
+            print(f"⚠️ Using in-memory storage (Redis unavailable): {session_id}")
+            sentry_capture_voice_event("redis_fallback", session_id, details={"storage": "in_memory"})
         
         emit('connected', {'session_id': session_id})
     
     
     @socketio.on('disconnect', namespace='/voice')
     def handle_disconnect():
-        """Handle client disconnection"""
-        session_id = request.sid
-        print(f"❌ WebRTC client disconnected: {session_id}")
+        """Handle client disconnection
+        
+        Authenticated sessions are parked for the resume grace period: the in-flight
+        turn keeps running and its results are held until the client resumes.
+        """
+        session_id = resumable_sessions.unbind(request.sid)
+        print(f"❌ WebRTC client disconnected: {request.sid}")
         
         # Capture disconnection event in Sentry
         sentry_capture_voice_event("client_disconnected", session_id)
-        set_transfer_flag(session_id, False)
         
-        try:
-            if redis_manager.is_available():
-                success = delete_session(session_id)
-                if success:
-                    print(f"✅ Session deleted from Redis: {session_id}")
-                    sentry_capture_redis_operation("delete_session", session_id, True)
-                else:
-                    print(f"❌ Failed to delete session from Redis: {session_id}")
-                    sentry_capture_redis_operation("delete_session", session_id, False, "Redis delete_session returned False")
-            else:
-                if session_id in active_sessions:
-                    del active_sessions[session_id]
-                    print(f"✅ Session deleted from memory: {session_id}")
-                    sentry_capture_voice_event("session_deleted_memory", session_id)
-        except Exception as e:
-            print(f"❌ Error deleting session: {e}")
-            sentry_capture_redis_operation("delete_session", session_id, False, str(e))
+        session = session_cache.get(session_id)
+        if not (is_session_resume_enabled() and session and session.authenticated and session.resume_token):
+            end_voice_session(session_id)
+            return
+        
+        # The recording cannot continue on a new socket; the pending turn can
+        close_streaming_transcriber(session_id)
+        vad_detectors.pop(session_id, None)
+        audio_analyzers.pop(session_id, None)
+        if session.is_recording:
+            session_cache.update(session_id, is_recording=False)
+        resumable_sessions.park(session_id, end_voice_session)
+        session_cache.expire(session_id, resumable_sessions.grace_seconds)
+        sentry_capture_voice_event("session_parked", session_id, session.user_id, {"grace_seconds": resumable_sessions.grace_seconds})
+    
+    
+    @socketio.on('resume', namespace='/voice')
+    def handle_resume(data=None):
+        """Re-bind a reconnecting socket to its parked session (skips PIN and welcome greeting)"""
+        sid = request.sid
+        data = data if isinstance(data, dict) else {}
+        session_id = resumable_sessions.redeem_token(data.get('token', ''))
+        session = session_cache.adopt(session_id) if session_id else None
+        if session is None or not session.authenticated:
+            resumable_sessions.stats['rejected'] += 1
+            sentry_capture_voice_event("session_resume_rejected", sid)
+            emit('resumed', {'success': False, 'message': 'Session expired. Please enter your PIN.'})
+            return
+        
+        # Drop the blank session created for this socket on connect; the resumed one is canonical
+        session_cache.evict(sid)
+        release_session(sid)
+        resumable_sessions.bind(sid, session_id)
+        join_room(session_id)
+        audio_transports[session_id] = negotiate_audio_transport(data.get('audio_transport'))
+        
+        # Replay held events on the worker where the session was parked, then take ownership
+        worker_bus.dispatch(session_id, 'resume', {'sid': sid, 'worker': WORKER_ID})
+        claim_session(session_id)
+        pending_turn = turn_registry.current(session_id)
+        print(f"▶️ Session resumed: {session_id} (socket {sid}, user {session.user_id})")
+        sentry_capture_voice_event("session_resumed", session_id, session.user_id, {"pending_turn": pending_turn is not None})
+        
+        emit('resumed', {
+            'success': True,
+            'user_name': session.user_name,
+            'message': f"Welcome back, {session.user_name}!",
+            'resume_token': issue_resume_token(session_id),
+            'pending_turn': pending_turn.turn_id if pending_turn else None,
+            'streaming_stt': is_streaming_stt_enabled(),
+            'server_vad': is_server_vad_enabled(),
+            'audio_transport': audio_transports[session_id]
+        })
+    
+    
+    def replay_parked_session(session_id, payload):
+        """Bus action on the parking worker: stop the grace timer and replay held turn results"""
+        held = resumable_sessions.unpark(session_id)
+        if payload.get('worker') != WORKER_ID:
+            # The session moved to another worker; stop caching it here
+            session_cache.invalidate(session_id)
+        for event, event_data in held or []:
+            socketio.emit(event, event_data, namespace='/voice', room=session_id)
+        if held:
+            print(f"▶️ Replayed {len(held)} held event(s) to resumed session {session_id}")
     
     
     @socketio.on('authenticate', namespace='/voice')
     def handle_authenticate(data):
         """Handle user authentication"""
-        session_id = request.sid
+        session_id = resumable_sessions.resolve(request.sid)
         pin = data.get('pin', '')
         
-        print(f"🔐 Authentication request for session {session_id}: PIN={pin}")
+        # Clients advertise binary audio support; older clients fall back to base64
+        audio_transport = negotiate_audio_transport(data.get('audio_transport'))
+        audio_transports[session_id] = audio_transport
+        
+        print(f"🔐 Authentication request for session {session_id}: PIN={pin} (audio transport: {audio_transport})")
         
         # Capture authentication attempt in Sentry
         sentry_capture_voice_event("authentication_attempt", session_id, details={"pin_provided": bool(pin)})
@@ -751,50 +844,24 @@ def init_socketio(socketio_instance: SocketIO, app):
             # TEST MODE (optional): allow a configurable PIN when explicitly enabled
             if ENABLE_TEST_PIN and pin == TEST_VOICE_PIN:
                 print(f"✅ Test authentication successful with PIN: {pin}")
-                auth_updates = {
-                    'authenticated': 'True',
-                    'user_id': 'test_user',
-                    'user_name': 'Test User',
-                    'authenticated_at': str(time.time())
-                }
-                
-                try:
-                    if redis_manager.is_available():
-                        success = update_session(session_id, auth_updates)
-                        if success:
-                            print(f"✅ Test authentication stored in Redis")
-                            sentry_capture_redis_operation("update_session", session_id, True)
-                            sentry_capture_voice_event("authentication_success", session_id, "test_user", {"user_name": "Test User", "storage": "redis", "mode": "test"})
-                        else:
-                            print(f"❌ Failed to update session in Redis")
-                            sentry_capture_redis_operation("update_session", session_id, False, "Redis update_session returned False")
-                            # Fallback to in-memory
-                            active_sessions[session_id]['authenticated'] = True
-                            active_sessions[session_id]['user_id'] = 'test_user'
-                            active_sessions[session_id]['user_name'] = 'Test User'
-                            print(f"✅ Test authentication stored in memory (Redis fallback)")
-                            sentry_capture_voice_event("authentication_success", session_id, "test_user", {"user_name": "Test User", "storage": "memory_fallback", "mode": "test"})
-                    else:
-                        # Fallback to in-memory
-                        active_sessions[session_id]['authenticated'] = True
-                        active_sessions[session_id]['user_id'] = 'test_user'
-                        active_sessions[session_id]['user_name'] = 'Test User'
-                        print(f"✅ Test authentication stored in memory")
-                        sentry_capture_voice_event("authentication_success", session_id, "test_user", {"user_name": "Test User", "storage": "memory", "mode": "test"})
-                except Exception as redis_error:
-                    print(f"❌ Redis error during test authentication: {redis_error}")
-                    sentry_capture_redis_operation("update_session", session_id, False, str(redis_error))
-                    # Fallback to in-memory storage
-                    active_sessions[session_id]['authenticated'] = True
-                    active_sessions[session_id]['user_id'] = 'test_user'
-                    active_sessions[session_id]['user_name'] = 'Test User'
-                    print(f"✅ Test authentication stored in memory (Redis error fallback)")
-                    sentry_capture_voice_event("authentication_success", session_id, "test_user", {"user_name": "Test User", "storage": "memory_error_fallback", "mode": "test"})
+                session_cache.update(
+                    session_id,
+                    authenticated=True,
+                    user_id='test_user',
+                    user_name='Test User',
+                    authenticated_at=time.time()
+                )
+                print(f"✅ Test authentication stored ({session_cache.storage})")
+                sentry_capture_voice_event("authentication_success", session_id, "test_user", {"user_name": "Test User", "storage": session_cache.storage, "mode": "test"})
                 
                 emit('authenticated', {
                     'success': True,
                     'user_name': 'Test User',
-                    'message': "Welcome! You're in test mode."
+                    'message': "Welcome! You're in test mode.",
+                    'streaming_stt': is_streaming_stt_enabled(),
+                    'server_vad': is_server_vad_enabled(),
+                    'audio_transport': audio_transport,
+                    'resume_token': issue_resume_token(session_id)
                 })
                 
                 # Send welcome greeting with audio (background task)
@@ -819,50 +886,24 @@ def init_socketio(socketio_instance: SocketIO, app):
                 
                 if user:
                     # Authentication successful
-                    auth_updates = {
-                        'authenticated': 'True',
-                        'user_id': str(user.id),
-                        'user_name': user.first_name,
-                        'authenticated_at': str(time.time())
-                    }
-                    
-                    try:
-                        if redis_manager.is_available():
-                            success = update_session(session_id, auth_updates)
-                            if success:
-                                print(f"✅ Authentication stored in Redis: {user.email}")
-                                sentry_capture_redis_operation("update_session", session_id, True)
-                                sentry_capture_voice_event("authentication_success", session_id, str(user.id), {"user_name": user.first_name, "storage": "redis"})
-                            else:
-                                print(f"❌ Failed to update session in Redis: {user.email}")
-                                sentry_capture_redis_operation("update_session", session_id, False, "Redis update_session returned False")
-                                # Fallback to in-memory
-                                active_sessions[session_id]['authenticated'] = True
-                                active_sessions[session_id]['user_id'] = str(user.id)
-                                active_sessions[session_id]['user_name'] = user.first_name
-                                print(f"✅ Authentication stored in memory (Redis fallback): {user.email}")
-                                sentry_capture_voice_event("authentication_success", session_id, str(user.id), {"user_name": user.first_name, "storage": "memory_fallback"})
-                        else:
-                            # Fallback to in-memory
-                            active_sessions[session_id]['authenticated'] = True
-                            active_sessions[session_id]['user_id'] = str(user.id)
-                            active_sessions[session_id]['user_name'] = user.first_name
-                            print(f"✅ Authentication stored in memory: {user.email}")
-                            sentry_capture_voice_event("authentication_success", session_id, str(user.id), {"user_name": user.first_name, "storage": "memory"})
-                    except Exception as redis_error:
-                        print(f"❌ Redis error during authentication: {redis_error}")
-                        sentry_capture_redis_operation("update_session", session_id, False, str(redis_error))
-                        # Fallback to in-memory storage
-                        active_sessions[session_id]['authenticated'] = True
-                        active_sessions[session_id]['user_id'] = str(user.id)
-                        active_sessions[session_id]['user_name'] = user.first_name
-                        print(f"✅ Authentication stored in memory (Redis error fallback): {user.email}")
-                        sentry_capture_voice_event("authentication_success", session_id, str(user.id), {"user_name": user.first_name, "storage": "memory_error_fallback"})
+                    session_cache.update(
+                        session_id,
+                        authenticated=True,
+                        user_id=str(user.id),
+                        user_name=user.first_name,
+                        authenticated_at=time.time()
+                    )
+                    print(f"✅ Authentication stored ({session_cache.storage}): {user.email}")
+                    sentry_capture_voice_event("authentication_success", session_id, str(user.id), {"user_name": user.first_name, "storage": session_cache.storage})
                     
                     emit('authenticated', {
                         'success': True,
                         'user_name': user.first_name,
-                        'message': f"Welcome back, {user.first_name}!"
+                        'message': f"Welcome back, {user.first_name}!",
+                        'streaming_stt': is_streaming_stt_enabled(),
+                        'server_vad': is_server_vad_enabled(),
+                        'audio_transport': audio_transport,
+                        'resume_token': issue_resume_token(session_id)
                     })
                     
                     # Send welcome greeting with audio (background task)
@@ -873,7 +914,7 @@ def init_socketio(socketio_instance: SocketIO, app):
                     )
                 else:
                     # Authentication failed
-                    print(f"❌ Authentication failed: Invalid PIN")
+                    print("❌ Authentication failed: Invalid PIN")
                     sentry_capture_voice_event("authentication_failed", session_id, details={"reason": "invalid_pin"})
                     emit('authenticated', {
                         'success': False,
@@ -882,9 +923,7 @@ def init_socketio(socketio_instance: SocketIO, app):
         
         except Exception as e:
             print(f"❌ Authentication error: {e}")
-            sentry_capture_voice_event("authentication_error", session_id, details={"error": str(e)})
-            if SENTRY_AVAILABLE:
-                sentry_sdk.capture_exception(e)
+            instrumentation.error("authentication_error", session_id, exception=e, details={"error": str(e)})
             emit('authenticated', {
                 'success': False,
                 'message': "Authentication error. Please try again."
@@ -892,272 +931,248 @@ def init_socketio(socketio_instance: SocketIO, app):
     
     
     @socketio.on('start_recording', namespace='/voice')
-    def handle_start_recording():
-        """Start audio recording"""
-        session_id = request.sid
+    def handle_start_recording(data=None):
+        """Start audio recording
         
-        # Get session data
-        session_data = None
-        if redis_manager.is_available():
-            session_data = get_session(session_id)
-            if not session_data:
-                emit('error', {'message': 'Session not found'})
-                return
-        else:
-            if session_id not in active_sessions:
-                emit('error', {'message': 'Session not found'})
-                return
-            session_data = active_sessions[session_id]
+        Clients declare the recording format, e.g. {'codec': 'pcm16', 'sample_rate': 16000,
+        'channels': 1, 'sample_width': 2} or {'codec': 'opus'} for MediaRecorder WebM; it is
+        stored on the session so raw samples get exactly one correct WAV header. With
+        ENABLE_SERVER_VAD=true and raw PCM/μ-law the server also detects the end of speech.
+        """
+        session_id = resumable_sessions.resolve(request.sid)
         
-        # Check authentication
-        is_authenticated = session_data.get('authenticated') == 'True' if redis_manager.is_available() else session_data.get('authenticated', False)
-        if not is_authenticated:
+        session = session_cache.get(session_id)
+        if not session:
+            emit('error', {'message': 'Session not found'})
+            return
+        
+        if not session.authenticated:
             emit('error', {'message': 'Please authenticate first'})
             return
         
+        try:
+            audio_format = AudioFormat.from_client(data)
+        except AudioCodecError as e:
+            emit('error', {'message': f'Unsupported audio format: {e}'})
+            return
+        
         print(f"🎤 Recording started: {session_id}")
         
-        # Update recording state and clear audio buffer
-        if redis_manager.is_available():
-            # Clear the audio buffer completely
-            redis_client = redis_manager.redis_client
-            if redis_client:
-                redis_client.hset(f"session:{session_id}", "audio_buffer", "")
-                redis_client.hset(f"session:{session_id}", "is_recording", "True")
-                print(f"🔍 Debug: cleared Redis audio buffer for session: {session_id}")
-            else:
-                update_session(session_id, {
-                    'is_recording': 'True',
-                    'audio_buffer': ''  # Start with empty string for base64 concatenation
-                })
+        # The caller is talking again: abort any reply still being generated or played
+        cancel_session_turn(session_id, "barge_in")
+        
+        # Update recording state and clear the stored blob (audio player) and the raw chunk buffer
+        clear_session_audio(session_id)
+        session_cache.update(session_id, is_recording=True, audio_blob='',
+                             audio_format=audio_format.to_session_value() if audio_format else '')
+        print(f"🔍 Debug: cleared {session_cache.storage} audio buffer for session: {session_id}")
+        
+        # Open a live transcription stream so chunks are transcribed while the caller talks
+        close_streaming_transcriber(session_id)
+        speculator = Speculator(session.user_id, session.user_name) if is_speculation_enabled() else None
+        
+        def on_interim(text):
+            socketio.emit('transcript_interim', {'text': text}, namespace='/voice', room=session_id)
+            if speculator:
+                speculator.on_interim(text)
+        
+        transcriber = open_streaming_transcriber(
+            on_interim=on_interim,
+            on_final=lambda text: socketio.emit('transcript_final', {'text': text}, namespace='/voice', room=session_id),
+            audio_format=audio_format
+        )
+        if transcriber:
+            streaming_transcribers[session_id] = transcriber
+            if speculator:
+                speculators[session_id] = speculator
+            print(f"📡 Streaming STT opened for session: {session_id}")
+        
+        # Server-side endpointing needs raw samples (WebM/Opus chunks cannot be analyzed)
+        vad_detectors.pop(session_id, None)
+        if is_server_vad_enabled() and audio_format and audio_format.codec in SUPPORTED_ENCODINGS:
+            vad_detectors[session_id] = create_vad(encoding=audio_format.codec, sample_rate=audio_format.sample_rate)
+            print(f"🎙️ Server VAD enabled for session {session_id} ({audio_format.codec} @ {audio_format.sample_rate}Hz)")
+        
+        # Quality stats are accumulated per chunk so silence is rejected instantly at stop
+        if can_analyze(audio_format):
+            audio_analyzers[session_id] = StreamingAudioStats(audio_format)
         else:
-            active_sessions[session_id]['is_recording'] = True
-            active_sessions[session_id]['audio_buffer'] = b''  # Start with empty bytes for binary concatenation
-            print(f"🔍 Debug: cleared in-memory audio buffer for session: {session_id}")
+            audio_analyzers.pop(session_id, None)
         
-        emit('recording_started', {'success': True})
+        emit('recording_started', {
+            'success': True,
+            'streaming': transcriber is not None,
+            'server_vad': session_id in vad_detectors
+        })
     
     
     @socketio.on('audio_data', namespace='/voice')
     def handle_audio_data(data):
         """Receive audio data chunks from client"""
-        session_id = request.sid
+        session_id = resumable_sessions.resolve(request.sid)
         
-        # Get session data
-        session_data = None
-        if redis_manager.is_available():
-            session_data = get_session(session_id)
-            if not session_data:
-                sentry_capture_voice_event("session_not_found", session_id, details={"operation": "audio_data"})
-                return
-        else:
-            if session_id not in active_sessions:
-                sentry_capture_voice_event("session_not_found", session_id, details={"operation": "audio_data", "storage": "memory"})
-                return
-            session_data = active_sessions[session_id]
-        
-        # Check if recording
-        is_recording = session_data.get('is_recording') == 'True' if redis_manager.is_available() else session_data.get('is_recording', False)
-        if not is_recording:
-            sentry_capture_voice_event("audio_received_not_recording", session_id, details={"is_recording": is_recording})
+        # Check recording state from the local session cache (no Redis round trip per chunk)
+        session = session_cache.get(session_id)
+        if session is None:
+            sentry_capture_voice_event("session_not_found", session_id, details={"operation": "audio_data", "storage": session_cache.storage})
             return
         
-        # Append audio chunk to buffer
-        audio_chunk = base64.b64decode(data['audio'])
-        print(f"🔍 Debug: received audio chunk: {len(audio_chunk)} bytes")
+        if not session.is_recording:
+            sentry_capture_voice_event("audio_received_not_recording", session_id, details={"is_recording": False})
+            return
         
+        # Append audio chunk to the append-only buffer
         try:
-            if redis_manager.is_available():
-                # For Redis, we need to handle binary data differently
-                # Store as base64 string in Redis
-                current_buffer = session_data.get('audio_buffer', '')
-                
-                # Decode current buffer to binary, append new chunk, then re-encode
-                if current_buffer:
-                    try:
-                        # Decode current buffer to binary
-                        current_binary = base64.b64decode(current_buffer)
-                        print(f"🔍 Debug: current buffer decoded to binary, length: {len(current_binary)} bytes")
-                        
-                        # Append new chunk to binary data
-                        combined_binary = current_binary + audio_chunk
-                        print(f"🔍 Debug: combined binary length: {len(combined_binary)} bytes")
-                        
-                        # Re-encode to base64
-                        updated_buffer = base64.b64encode(combined_binary).decode('utf-8')
-                        print(f"🔍 Debug: re-encoded to base64, length: {len(updated_buffer)} chars")
-                        
-                    except Exception as e:
-                        print(f"⚠️ Error processing current buffer, using only new chunk: {e}")
-                        # If current buffer is corrupted, use only new chunk
-                        updated_buffer = base64.b64encode(audio_chunk).decode('utf-8')
-                        print(f"🔍 Debug: using only new chunk, base64 length: {len(updated_buffer)} chars")
-                else:
-                    # No current buffer, just encode new chunk
-                    updated_buffer = base64.b64encode(audio_chunk).decode('utf-8')
-                    print(f"🔍 Debug: new chunk encoded to base64, length: {len(updated_buffer)} chars")
-                
-                # Validate the final buffer
-                try:
-                    test_decode = base64.b64decode(updated_buffer)
-                    print(f"🔍 Debug: final buffer validation - decoded length: {len(test_decode)} bytes")
-                except Exception as e:
-                    print(f"❌ Final buffer validation failed: {e}")
-                    # This should not happen, but if it does, use only new chunk
-                    updated_buffer = base64.b64encode(audio_chunk).decode('utf-8')
-                    print(f"🔍 Debug: fallback to new chunk only, length: {len(updated_buffer)} chars")
-                
-                # Use Redis append operation for better performance
-                try:
-                    # Get the Redis client directly for append operation
-                    redis_client = redis_manager.redis_client
-                    if redis_client:
-                        # Use Redis HSET to update the audio buffer
-                        redis_client.hset(f"session:{session_id}", "audio_buffer", updated_buffer)
-                        print(f"🔍 Debug: updated Redis audio buffer: {len(updated_buffer)} chars")
-                        sentry_capture_redis_operation("update_audio_buffer", session_id, True)
-                    else:
-                        # Fallback to update_session method
-                        success = update_session(session_id, {'audio_buffer': updated_buffer})
-                        if success:
-                            print(f"🔍 Debug: updated Redis audio buffer (fallback): {len(updated_buffer)} chars")
-                            sentry_capture_redis_operation("update_audio_buffer", session_id, True)
-                        else:
-                            print(f"❌ Failed to update Redis audio buffer")
-                            sentry_capture_redis_operation("update_audio_buffer", session_id, False, "Redis update_session returned False")
-                except Exception as redis_error:
-                    print(f"❌ Redis direct operation failed: {redis_error}")
-                    # Fallback to update_session method
-                    success = update_session(session_id, {'audio_buffer': updated_buffer})
-                    if success:
-                        print(f"🔍 Debug: updated Redis audio buffer (error fallback): {len(updated_buffer)} chars")
-                        sentry_capture_redis_operation("update_audio_buffer", session_id, True)
-                    else:
-                        print(f"❌ Failed to update Redis audio buffer (error fallback)")
-                        sentry_capture_redis_operation("update_audio_buffer", session_id, False, f"Redis error: {redis_error}")
-            else:
-                # In-memory storage
-                active_sessions[session_id]['audio_buffer'] += audio_chunk
-                print(f"🔍 Debug: updated in-memory audio buffer: {len(active_sessions[session_id]['audio_buffer'])} bytes")
-                sentry_capture_voice_event("audio_buffer_updated", session_id, details={"storage": "memory", "buffer_size": len(active_sessions[session_id]['audio_buffer'])})
+            ingest_started = time.perf_counter()
+            audio_chunk = decode_audio_payload(data['audio'])
+            buffer_size = append_session_audio(session_id, audio_chunk)
+            if buffer_size is None:
+                print(f"❌ Failed to append audio chunk for session {session_id}")
+                sentry_capture_redis_operation("append_audio_chunk", session_id, False, "append returned None")
+                return
+            print(f"🔍 Debug: appended audio chunk: {len(audio_chunk)} bytes (buffer: {buffer_size} bytes)")
+            sentry_capture_redis_operation("append_audio_chunk", session_id, True)
+            
+            analyzer = audio_analyzers.get(session_id)
+            if analyzer:
+                analyzer.update(audio_chunk)
+            
+            # Forward to the live transcription stream, if one is open
+            transcriber = streaming_transcribers.get(session_id)
+            if transcriber and not transcriber.send(audio_chunk):
+                print(f"⚠️ Streaming STT dropped for session {session_id}, will fall back to batch")
+                close_streaming_transcriber(session_id)
+            
+            # Server-side endpointing: finish the turn as soon as the caller stops talking
+            detector = vad_detectors.get(session_id)
+            vad_events = detector.process(audio_chunk) if detector else []
+            observe_stage(STAGE_AUDIO_INGEST, (time.perf_counter() - ingest_started) * 1000)
+            if vad_events:
+                if SPEECH_START in vad_events:
+                    emit('speech_started', {})
+                if SPEECH_END in vad_events:
+                    print(f"🔇 End of speech detected by server VAD: {session_id}")
+                    vad_detectors.pop(session_id, None)
+                    emit('speech_ended', {'trigger': 'vad'})
+                    finalize_recording(session_id, trigger="vad")
         except Exception as e:
             print(f"❌ Error updating audio buffer: {e}")
-            sentry_capture_redis_operation("update_audio_buffer", session_id, False, str(e))
-            if SENTRY_AVAILABLE:
-                sentry_sdk.capture_exception(e)
+            instrumentation.error("redis_append_audio_chunk", session_id, exception=e, details={"error": str(e)})
+    
+    
+    @socketio.on('cancel', namespace='/voice')
+    def handle_cancel(data=None):
+        """Abort the in-flight STT/agent/TTS turn (and any recording) for this session"""
+        worker_bus.dispatch(resumable_sessions.resolve(request.sid), 'cancel', {'reason': 'client_cancel'})
+    
+    
+    def cancel_session(session_id, reason="client_cancel"):
+        """Stop recording and abort the turn on the worker holding the session's turn state"""
+        sentry_capture_voice_event("turn_cancel_requested", session_id, details={"reason": reason})
+        vad_detectors.pop(session_id, None)
+        audio_analyzers.pop(session_id, None)
+        close_streaming_transcriber(session_id)
+        session = session_cache.get(session_id)
+        if session and session.is_recording:
+            session_cache.update(session_id, is_recording=False)
+        turn = cancel_session_turn(session_id, reason)
+        socketio.emit('cancelled', {'turn_id': turn.turn_id if turn else None}, namespace='/voice', room=session_id)
     
     
     @socketio.on('stop_recording', namespace='/voice')
     def handle_stop_recording(data=None):
-        """Stop recording and process audio"""
-        session_id = request.sid
+        """Stop recording and process audio (on the worker that owns the session)"""
+        worker_bus.dispatch(resumable_sessions.resolve(request.sid), 'finalize', {'data': data, 'trigger': 'client'})
+    
+    
+    def finalize_recording(session_id, data=None, trigger="client"):
+        """End the current utterance and hand its audio to process_audio_async
+        
+        Shared by the client's stop_recording event and server-side endpointing (VAD),
+        so it emits by room instead of relying on the request context.
+        """
+        def emit_to_session(event, payload):
+            emit_to_room(event, payload, session_id)
         
         # Capture stop recording event in Sentry
-        sentry_capture_voice_event("stop_recording", session_id)
+        sentry_capture_voice_event("stop_recording", session_id, details={"trigger": trigger})
         
-        # Get session data
-        session_data = None
-        if redis_manager.is_available():
-            session_data = get_session(session_id)
-            if not session_data:
-                sentry_capture_voice_event("session_not_found", session_id, details={"operation": "stop_recording"})
-                emit('error', {'message': 'Session not found'})
-                return
-        else:
-            if session_id not in active_sessions:
-                sentry_capture_voice_event("session_not_found", session_id, details={"operation": "stop_recording", "storage": "memory"})
-                emit('error', {'message': 'Session not found'})
-                return
-            session_data = active_sessions[session_id]
+        session = session_cache.get(session_id)
+        if session is None:
+            sentry_capture_voice_event("session_not_found", session_id, details={"operation": "stop_recording", "storage": session_cache.storage})
+            emit_to_session('error', {'message': 'Session not found'})
+            return
         
-        # Check if recording
-        is_recording = session_data.get('is_recording') == 'True' if redis_manager.is_available() else session_data.get('is_recording', False)
-        if not is_recording:
-            sentry_capture_voice_event("stop_recording_not_recording", session_id, details={"is_recording": is_recording})
-            emit('error', {'message': 'Not recording'})
+        if not session.is_recording:
+            sentry_capture_voice_event("stop_recording_not_recording", session_id, details={"is_recording": False})
+            emit_to_session('error', {'message': 'Not recording'})
             return
         
-        print(f"🛑 Recording stopped: {session_id}")
+        print(f"🛑 Recording stopped ({trigger}): {session_id}")
+        vad_detectors.pop(session_id, None)
+        analyzer = audio_analyzers.pop(session_id, None)
         
         # Update recording state
-        try:
-            if redis_manager.is_available():
-                success = update_session(session_id, {'is_recording': 'False'})
-                if success:
-                    sentry_capture_redis_operation("update_recording_state", session_id, True)
-                else:
-                    sentry_capture_redis_operation("update_recording_state", session_id, False, "Redis update_session returned False")
-            else:
-                session_data['is_recording'] = False
-                sentry_capture_voice_event("recording_state_updated", session_id, details={"storage": "memory"})
-        except Exception as e:
-            print(f"❌ Error updating recording state: {e}")
-            sentry_capture_redis_operation("update_recording_state", session_id, False, str(e))
+        session_cache.update(session_id, is_recording=False)
+        sentry_capture_voice_event("recording_state_updated", session_id, details={"storage": session_cache.storage})
         
         # Get audio buffer - now from client data or session
         audio_buffer = None
         
         # Check if audio data is provided directly from client
-        if data and 'audio' in data:
+        if data and 'audio' in data and payload_transport(data['audio']) == AUDIO_TRANSPORT_BINARY:
+            # Binary attachment: no decode pass; keep the raw blob in the binary buffer for the audio player
+            with stage_timer(STAGE_AUDIO_INGEST):
+                audio_buffer = decode_audio_payload(data['audio'])
+            print(f"🎵 Received complete WebM blob from client (binary): {len(audio_buffer)} bytes")
+            sentry_capture_voice_event("audio_blob_received", session_id, details={"buffer_size": len(audio_buffer), "source": "client", "transport": AUDIO_TRANSPORT_BINARY})
+            if not store_session_audio(session_id, audio_buffer):
+                print("⚠️ Failed to store binary audio blob for audio player")
+                sentry_capture_redis_operation("store_audio_blob_on_stop", session_id, False, "store_session_audio returned False")
+        elif data and 'audio' in data:
             try:
                 # Preserve base64 for Redis audio player, and decode for processing
                 audio_buffer_b64_from_client = data['audio']
-                audio_buffer = base64.b64decode(audio_buffer_b64_from_client)
+                with stage_timer(STAGE_AUDIO_INGEST):
+                    audio_buffer = decode_audio_payload(audio_buffer_b64_from_client)
                 print(f"🎵 Received complete WebM blob from client: {len(audio_buffer)} bytes")
                 sentry_capture_voice_event("audio_blob_received", session_id, details={"buffer_size": len(audio_buffer), "source": "client"})
 
-                # Store the complete base64 blob into Redis/in-memory for the audio player tool
+                # Store the complete base64 blob (written behind to Redis) for the audio player tool
                 try:
-                    if redis_manager.is_available():
-                        stored = update_session(session_id, {'audio_buffer': audio_buffer_b64_from_client})
-                        if stored:
-                            print(f"💾 Stored complete audio blob in Redis for session {session_id}: {len(audio_buffer_b64_from_client)} chars")
-                            sentry_capture_redis_operation("store_audio_blob_on_stop", session_id, True)
-                        else:
-                            print("⚠️ Redis update_session returned False while storing audio blob")
-                            sentry_capture_redis_operation("store_audio_blob_on_stop", session_id, False, "update_session returned False")
-                    else:
-                        session_data['audio_buffer'] = audio_buffer_b64_from_client
-                        print(f"💾 Stored complete audio blob in memory for session {session_id}: {len(audio_buffer_b64_from_client)} chars")
-                        sentry_capture_voice_event("audio_blob_stored_memory", session_id, details={"length": len(audio_buffer_b64_from_client)})
+                    session_cache.update(session_id, audio_blob=audio_buffer_b64_from_client)
+                    print(f"💾 Stored complete audio blob ({session_cache.storage}) for session {session_id}: {len(audio_buffer_b64_from_client)} chars")
+                    sentry_capture_voice_event("audio_blob_stored", session_id, details={"length": len(audio_buffer_b64_from_client), "storage": session_cache.storage})
                 except Exception as store_err:
                     print(f"⚠️ Failed to store audio blob for audio player: {store_err}")
                     sentry_capture_redis_operation("store_audio_blob_on_stop", session_id, False, str(store_err))
             except Exception as decode_error:
                 print(f"❌ Error decoding client audio blob: {decode_error}")
                 sentry_capture_voice_event("audio_decode_error", session_id, details={"error": str(decode_error), "source": "client"})
-                emit('transcription', {
+                emit_to_session('transcription', {
                     'success': False,
                     'message': 'Error decoding audio data.'
                 })
                 return
         else:
-            # Fallback to session buffer (legacy)
+            # Fallback to the chunk buffer filled by audio_data events
             try:
-                if redis_manager.is_available():
-                    audio_buffer_b64 = session_data.get('audio_buffer', '')
-                    if not audio_buffer_b64:
-                        print("❌ No audio data in Redis session")
-                        sentry_capture_voice_event("no_audio_data", session_id, details={"storage": "redis"})
-                        emit('transcription', {
-                            'success': False,
-                            'message': 'No audio data received.'
-                        })
-                        return
-                    
-                    audio_buffer = base64.b64decode(audio_buffer_b64)
-                    print(f"🔍 Debug: decoded session audio_buffer length: {len(audio_buffer)}")
-                    sentry_capture_voice_event("audio_buffer_retrieved", session_id, details={"storage": "redis", "buffer_size": len(audio_buffer)})
-                else:
-                    audio_buffer = session_data['audio_buffer']
-                    print(f"🔍 Debug: in-memory audio_buffer length: {len(audio_buffer)}")
-                    sentry_capture_voice_event("audio_buffer_retrieved", session_id, details={"storage": "memory", "buffer_size": len(audio_buffer)})
+                storage = "redis" if redis_manager.is_available() else "memory"
+                audio_buffer = get_session_audio(session_id)
+                if not audio_buffer:
+                    print(f"❌ No audio data in {storage} chunk buffer")
+                    sentry_capture_voice_event("no_audio_data", session_id, details={"storage": storage})
+                    emit_to_session('transcription', {
+                        'success': False,
+                        'message': 'No audio data received.'
+                    })
+                    return
+                print(f"🔍 Debug: session chunk buffer length: {len(audio_buffer)}")
+                sentry_capture_voice_event("audio_buffer_retrieved", session_id, details={"storage": storage, "buffer_size": len(audio_buffer)})
             except Exception as e:
                 print(f"❌ Error retrieving session audio buffer: {e}")
-                sentry_capture_voice_event("audio_buffer_error", session_id, details={"error": str(e)})
-                if SENTRY_AVAILABLE:
-                    sentry_sdk.capture_exception(e)
-                emit('error', {'message': 'Error retrieving audio data'})
+                instrumentation.error("audio_buffer_error", session_id, exception=e, details={"error": str(e)})
+                emit_to_session('error', {'message': 'Error retrieving audio data'})
                 return
         
         # Check minimum audio length for meaningful speech recognition
@@ -1165,44 +1180,48 @@ def init_socketio(socketio_instance: SocketIO, app):
         min_audio_length = 10000  # Much lower threshold for WebRTC
         if len(audio_buffer) < min_audio_length:
             sentry_capture_voice_event("audio_too_short", session_id, details={"buffer_size": len(audio_buffer), "threshold": min_audio_length})
-            emit('transcription', {
+            emit_to_session('transcription', {
                 'success': False,
                 'message': f'Audio too short ({len(audio_buffer)} bytes). Please speak longer. Try saying "Create a todo task to buy groceries" and hold the button much longer.'
             })
             return
         
         # Analyze audio buffer to understand what's in it (do not mutate original buffer)
+        quality = None
         try:
-            # If this is WebM (EBML header), skip PCM-based analysis
-            is_webm = len(audio_buffer) >= 4 and audio_buffer[:4] == b"\x1a\x45\xdf\xa3"
-            if not is_webm:
-                import numpy as np
-                analysis_buffer = audio_buffer
-                if len(analysis_buffer) % 2 != 0:
-                    analysis_buffer = analysis_buffer[:-1]
-                
-                if len(analysis_buffer) > 0:
-                    audio_data = np.frombuffer(analysis_buffer, dtype=np.int16)
-                    rms = np.sqrt(np.mean(audio_data.astype(np.float32) ** 2))
-                    unique_values = len(np.unique(audio_data))
-                    max_val = np.max(audio_data)
-                    min_val = np.min(audio_data)
-                    
-                    print(f"🔍 Audio Analysis: RMS={rms:.2f}, Unique={unique_values}, Range=[{min_val}, {max_val}], Samples={len(audio_data)}")
+            # WebM (EBML header): inspect the demuxed Opus frames instead of PCM samples
+            if is_webm(audio_buffer):
+                webm_info = demux_webm(audio_buffer).info()
+                print(f"🔍 WebM Analysis: {webm_info}")
+                if not webm_info['frames']:
+                    print("⚠️ WebM recording contains no audio frames")
+                    emit_to_session('transcription', {
+                        'success': False,
+                        'message': 'No speech detected. Please speak clearly into your microphone.'
+                    })
+                    return
+            elif detect_container(audio_buffer) == "raw":
+                audio_format = AudioFormat.parse(session.audio_format) or DEFAULT_RAW_FORMAT
+                if can_analyze(audio_format):
+                    # Streamed chunks were analyzed on arrival; a blob sent only at stop is analyzed once here
+                    if analyzer is not None and analyzer.bytes_seen == len(audio_buffer):
+                        quality = analyzer.summary()
+                    else:
+                        quality = analyze_audio(audio_buffer, audio_format)
+                    print(f"🔍 Audio Analysis: {quality}")
+                    sentry_capture_voice_event("audio_quality", session_id, details=quality)
                     
-                    # Check for silence
-                    if rms < 100:
+                    if quality['is_silence']:
                         print("⚠️ Audio appears to be silence")
-                        emit('transcription', {
+                        emit_to_session('transcription', {
                             'success': False,
                             'message': 'No speech detected. Please speak clearly into your microphone.'
                         })
                         return
                     
-                    # Check for constant values
-                    if unique_values < 10:
+                    if quality['is_constant']:
                         print("⚠️ Audio has very few unique values - might be constant signal")
-                        emit('transcription', {
+                        emit_to_session('transcription', {
                             'success': False,
                             'message': 'Audio appears to be constant signal. Please check your microphone.'
                         })
@@ -1212,7 +1231,34 @@ def init_socketio(socketio_instance: SocketIO, app):
         
         # Process audio asynchronously
         sentry_capture_voice_event("audio_processing_started", session_id, details={"buffer_size": len(audio_buffer)})
-        socketio.start_background_task(process_audio_async, session_id, audio_buffer)
+        transcriber = streaming_transcribers.pop(session_id, None)
+        speculator = speculators.pop(session_id, None)
+        transport_stats.record_turn(audio_transports.get(session_id, AUDIO_TRANSPORT_BASE64))
+        turn = turn_registry.begin(session_id)
+        
+        # Bounded worker pool: queue fairly per user, or turn the caller away fast when saturated
+        admission = turn_scheduler.submit(session.user_id or session_id, process_audio_async, session_id, audio_buffer, transcriber, turn, speculator, quality)
+        if admission == REJECTED:
+            print(f"🚦 Turn rejected (scheduler saturated): {session_id}")
+            sentry_capture_voice_event("turn_rejected_busy", session_id, details=turn_scheduler.get_stats())
+            turn_registry.finish(turn)
+            if transcriber:
+                transcriber.close()
+            if speculator:
+                speculator.discard()
+            emit_to_session('busy', {'queued': False, 'message': BUSY_MESSAGE})
+        elif admission == QUEUED:
+            waiting = turn_scheduler.get_stats()['waiting']
+            print(f"⏳ Turn queued for session {session_id} ({waiting} waiting)")
+            emit_to_session('busy', {'queued': True, 'waiting': waiting, 'message': HOLD_MESSAGE})
+    
+    
+    worker_bus.register('finalize', lambda session_id, payload: finalize_recording(
+        session_id, payload.get('data'), trigger=payload.get('trigger', 'client')))
+    worker_bus.register('cancel', lambda session_id, payload: cancel_session(
+        session_id, (payload or {}).get('reason', 'client_cancel')))
+    worker_bus.register('resume', replay_parked_session)
+    worker_bus.start(spawn=socketio.start_background_task)
     
     
     def send_welcome_greeting(session_id, user_name):
@@ -1221,25 +1267,15 @@ def init_socketio(socketio_instance: SocketIO, app):
             try:
                 print(f"🎤 Generating welcome greeting for {user_name}")
                 
-                # Generate welcome message
-                welcome_text = f"Welcome back, {user_name}! I'm your Convonet productivity assistant. How can I help you today?"
-                
-                # Generate TTS audio
-                speech_response = openai_client.audio.speech.create(
-                    model="tts-1",
-                    voice="nova",
-                    input=welcome_text,
-                    response_format="mp3"  # Explicitly specify MP3 format
-                )
+                # Generate welcome message: a short per-user name segment plus the cached fixed body
+                name_segment = f"Welcome back, {user_name}!"
+                welcome_text = f"{name_segment} {WELCOME_GREETING_BODY}"
                 
-                # Convert to base64
-                audio_base64 = base64.b64encode(speech_response.content).decode('utf-8')
+                # Generate TTS audio (MP3 segments concatenate into one playable stream)
+                audio_bytes = synthesize_speech(name_segment) + synthesize_speech(WELCOME_GREETING_BODY)
                 
-                # Send to client
-                socketio.emit('welcome_greeting', {
-                    'text': welcome_text,
-                    'audio': audio_base64
-                }, namespace='/voice', room=session_id)
+                # Send to client (binary attachment or base64, per negotiated transport)
+                emit_session_audio('welcome_greeting', {'text': welcome_text}, audio_bytes, session_id)
                 
                 print(f"✅ Welcome greeting sent to {user_name}")
                 
@@ -1247,78 +1283,83 @@ def init_socketio(socketio_instance: SocketIO, app):
                 print(f"❌ Error generating welcome greeting: {e}")
     
     
-    def process_audio_async(session_id, audio_buffer):
-        """Process audio in background task"""
+    def process_audio_async(session_id, audio_buffer, streaming_transcriber=None, turn=None, speculator=None, audio_quality=None):
+        """Process audio in background task
+        
+        If a live transcription stream was open during recording, its final transcript is
+        used directly and the batch Deepgram request is only a fallback. A speculative agent
+        run started on a matching interim transcript is committed instead of running the
+        agent again. The turn is checked between stages so a barge-in or cancel event stops
+        the pipeline without emitting stale results.
+        """
+        turn = turn or turn_registry.begin(session_id)
         # Use the stored Flask app instance for application context
         with flask_app.app_context():
             try:
-                # Get session data
-                session = None
-                session_record = None
-                if redis_manager.is_available():
-                    session_data = get_session(session_id)
-                    if not session_data:
-                        sentry_capture_voice_event("session_not_found_processing", session_id, details={"operation": "audio_processing"})
-                        return
-                    session_record = session_data
-                    # Convert Redis session data to expected format
-                    session = {
-                        'user_id': session_data.get('user_id'),
-                        'user_name': session_data.get('user_name')
-                    }
-                else:
-                    session = active_sessions.get(session_id)
-                    if not session:
-                        sentry_capture_voice_event("session_not_found_processing", session_id, details={"operation": "audio_processing", "storage": "memory"})
-                        return
-                    session_record = session
+                # A barge-in may have cancelled this turn while it waited for a worker
+                turn.check()
+                voice_session = session_cache.get(session_id)
+                if not voice_session:
+                    sentry_capture_voice_event("session_not_found_processing", session_id, details={"operation": "audio_processing", "storage": session_cache.storage})
+                    return
+                session = voice_session.to_dict()
                 
                 print(f"🎧 Processing audio: {len(audio_buffer)} bytes")
                 sentry_capture_voice_event("audio_processing_started", session_id, session.get('user_id'), details={"buffer_size": len(audio_buffer)})
                 
-                # Step 1: Transcribe audio using AssemblyAI
-                socketio.emit('status', {'message': 'Transcribing with Deepgram...'}, namespace='/voice', room=session_id)
-                sentry_capture_voice_event("transcription_started", session_id, session.get('user_id'), details={"method": "deepgram"})
-                
-                # Use Deepgram for transcription (WebRTC-optimized solution)
-                print(f"🎧 Deepgram: Processing audio buffer: {len(audio_buffer)} bytes")
+                # Step 1: Transcribe audio (live stream result first, then the batch provider chain
+                # with hedging and circuit breakers, see stt_providers.py)
+                stt_started = time.perf_counter()
+                if streaming_transcriber is None:
+                    emit_to_room('status', {'message': 'Transcribing...'}, session_id)
+                sentry_capture_voice_event("transcription_started", session_id, session.get('user_id'), details={"streaming": streaming_transcriber is not None})
+                print(f"🎧 STT: Processing audio buffer: {len(audio_buffer)} bytes")
                 
-                # Use Deepgram integration
-                try:
-                    transcribed_text = transcribe_audio_with_deepgram_webrtc(audio_buffer, language="en")
-                except Exception as e:
-                    print(f"❌ Deepgram integration failed: {e}")
-                    socketio.emit('error', {'message': 'Deepgram service not available. Please check configuration.'}, namespace='/voice', room=session_id)
-                    sentry_capture_voice_event("transcription_failed", session_id, session.get('user_id'), details={"method": "deepgram", "error": str(e)})
+                stt_result = get_stt_router().transcribe(STTRequest(
+                    audio_buffer,
+                    language="en",
+                    audio_format=AudioFormat.parse(voice_session.audio_format),
+                    streaming_transcriber=streaming_transcriber,
+                    audio_quality=audio_quality
+                ))
+                if stt_result is None:
+                    print("❌ All STT providers failed")
+                    emit_to_room('error', {'message': 'Speech recognition service not available. Please try again.'}, session_id)
+                    sentry_capture_voice_event("transcription_failed", session_id, session.get('user_id'), details={"error": "all providers failed"})
                     return
+                transcribed_text = stt_result.text
+                transcription_method = stt_result.provider
                 
                 if not transcribed_text:
-                    print("❌ Deepgram transcription failed")
-                    socketio.emit('error', {
+                    print(f"❌ No speech recognized ({transcription_method})")
+                    emit_to_room('error', {
                         'message': 'Transcription failed. Please try speaking more clearly or check your microphone.',
                         'details': 'The audio was captured but no speech was detected. Make sure you are speaking clearly into your microphone.'
-                    }, namespace='/voice', room=session_id)
-                    sentry_capture_voice_event("transcription_failed", session_id, session.get('user_id'), details={"method": "deepgram"})
+                    }, session_id)
+                    sentry_capture_voice_event("transcription_failed", session_id, session.get('user_id'), details={"method": transcription_method})
                     return
                 
-                print(f"✅ Deepgram transcription successful: {transcribed_text}")
-                sentry_capture_voice_event("transcription_completed", session_id, session.get('user_id'), details={"text_length": len(transcribed_text), "method": "deepgram"})
+                observe_stage(STAGE_STT, (time.perf_counter() - stt_started) * 1000)
+                turn.check()
+                print(f"✅ Transcription successful ({transcription_method}{', hedged' if stt_result.hedged else ''}{', cached' if stt_result.cached else ''}): {transcribed_text}")
+                sentry_capture_voice_event("transcription_completed", session_id, session.get('user_id'), details={"text_length": len(transcribed_text), "method": transcription_method, "hedged": stt_result.hedged, "cached": stt_result.cached})
                 
                 # Send transcription to client
-                socketio.emit('transcription', {
+                emit_to_room('transcription', {
                     'success': True,
                     'text': transcribed_text,
-                    'method': 'assemblyai'
-                }, namespace='/voice', room=session_id)
+                    'method': transcription_method,
+                    'turn_id': turn.turn_id
+                }, session_id)
                 
                 transfer_requested = has_transfer_intent(transcribed_text)
                 
                 def start_transfer_flow(target_extension: str, department: str, reason: str, source: str = "agent"):
                     print(f"🔄 Transfer requested: Extension={target_extension}, Department={department}, Reason={reason}")
-                    if is_transfer_in_progress(session_id, session_record):
+                    if is_transfer_in_progress(session_id):
                         print(f"⚠️ Transfer already in progress for session {session_id}, skipping duplicate request")
                         return
-                    set_transfer_flag(session_id, True, session_record)
+                    set_transfer_flag(session_id, True)
                     sentry_capture_voice_event("transfer_initiated", session_id, session.get('user_id'), details={
                         "extension": target_extension,
                         "department": department,
@@ -1328,7 +1369,7 @@ def init_socketio(socketio_instance: SocketIO, app):
                     })
                     
                     # For WebRTC calls, we don't have Call SID yet, but we can use session_id as call_id
-                    cache_call_center_profile(target_extension, session_record, call_id=session_id)
+                    cache_call_center_profile(target_extension, session, call_id=session_id)
                     
                     transfer_instructions = {
                         'extension': target_extension,
@@ -1341,14 +1382,14 @@ def init_socketio(socketio_instance: SocketIO, app):
                         extension=target_extension,
                         department=department,
                         reason=reason,
-                        session_data=session_record
+                        session_data=session
                     )
                     if not transfer_success:
-                        set_transfer_flag(session_id, False, session_record)
+                        set_transfer_flag(session_id, False)
 
                     transfer_message_text = f"I'm transferring you to {department} (extension {target_extension})."
 
-                    socketio.emit('transfer_initiated', {
+                    emit_to_room('transfer_initiated', {
                         'success': True,
                         'extension': target_extension,
                         'department': department,
@@ -1357,31 +1398,24 @@ def init_socketio(socketio_instance: SocketIO, app):
                         'message': transfer_message_text,
                         'call_started': transfer_success,
                         'call_details': transfer_details
-                    }, namespace='/voice', room=session_id)
+                    }, session_id)
 
-                    socketio.emit('transfer_status', {
+                    emit_to_room('transfer_status', {
                         'success': transfer_success,
                         'details': transfer_details
-                    }, namespace='/voice', room=session_id)
+                    }, session_id)
 
                     print(f"🔄 Transfer instructions sent to WebRTC client for extension {target_extension}")
 
                     transfer_message = f"I'm transferring you to {department}. Extension {target_extension}."
                     try:
-                        speech_response = openai_client.audio.speech.create(
-                            model="tts-1",
-                            voice="nova",
-                            input=transfer_message,
-                            response_format="mp3"
-                        )
-                        audio_base64 = base64.b64encode(speech_response.content).decode('utf-8')
+                        audio_bytes = synthesize_speech(transfer_message)
                         
-                        socketio.emit('agent_response', {
+                        emit_session_audio('agent_response', {
                             'success': True,
                             'text': transfer_message,
-                            'audio': audio_base64,
                             'transfer': True
-                        }, namespace='/voice', room=session_id)
+                        }, audio_bytes, session_id)
                     except Exception as e:
                         print(f"❌ Error generating TTS for transfer: {e}")
                 
@@ -1390,14 +1424,70 @@ def init_socketio(socketio_instance: SocketIO, app):
                     return
 
                 # Step 2: Process with agent
-                socketio.emit('status', {'message': 'Processing request...'}, namespace='/voice', room=session_id)
+                emit_to_room('status', {'message': 'Processing request...'}, session_id)
                 sentry_capture_voice_event("agent_processing_started", session_id, session.get('user_id'), details={"transcribed_text": transcribed_text})
                 
-                agent_response, transfer_marker = asyncio.run(process_with_agent(
-                    transcribed_text,
-                    session['user_id'],
-                    session['user_name']
-                ))
+                def send_audio_chunk(index, sentence, audio_bytes):
+                    if turn.is_cancelled():
+                        return
+                    emit_session_audio('agent_response_chunk', {
+                        'index': index,
+                        'text': sentence,
+                        'turn_id': turn.turn_id
+                    }, audio_bytes, session_id)
+                    print(f"🔊 TTS chunk {index} sent: {len(audio_bytes)} bytes")
+                
+                speculative = None
+                if speculator is not None:
+                    # Only the part of the agent run not hidden behind the caller's trailing silence
+                    agent_started = time.perf_counter()
+                    speculative = speculator.take(transcribed_text, cancel_event=turn.cancel_event)
+                    if speculative is not None:
+                        observe_stage(STAGE_AGENT, (time.perf_counter() - agent_started) * 1000)
+                
+                from convonet.routes import is_streaming_agent_enabled
+                if speculative is None and is_streaming_tts_enabled() and is_streaming_agent_enabled():
+                    # Token streaming: each sentence goes to TTS while the LLM is still generating the rest
+                    agent_response, chunk_count = stream_agent_response_audio(
+                        transcribed_text,
+                        session['user_id'],
+                        session['user_name'],
+                        send_audio_chunk,
+                        is_cancelled=turn.is_cancelled
+                    )
+                    turn.check()
+                    print(f"🤖 Agent response (streamed): {agent_response}")
+                    sentry_capture_voice_event("agent_processing_completed", session_id, session.get('user_id'), details={"response_length": len(agent_response), "streamed": True})
+                    
+                    if chunk_count == 0 and agent_response:
+                        # Nothing was token-streamed (fallback or error replies); synthesize the full text
+                        chunk_count = stream_sentence_audio(agent_response, send_audio_chunk, is_cancelled=turn.is_cancelled)
+                    turn.check()
+                    sentry_capture_voice_event("tts_generation_completed", session_id, session.get('user_id'), details={"chunks": chunk_count, "streamed": True})
+                    
+                    emit_to_room('agent_response', {
+                        'success': True,
+                        'text': agent_response,
+                        'streamed': True,
+                        'chunks': chunk_count,
+                        'turn_id': turn.turn_id
+                    }, session_id)
+                    turn_ms = (time.time() - turn.started_at) * 1000
+                    observe_stage(STAGE_TURN, turn_ms)
+                    instrumentation.turn_completed(session_id, turn_ms, session.get('user_id'))
+                    sentry_capture_voice_event("audio_processing_completed", session_id, session.get('user_id'), details={"success": True})
+                    return
+                
+                if speculative is not None:
+                    agent_response, transfer_marker = speculative
+                    agent_response = speakable_reply(agent_response)
+                else:
+                    with stage_timer(STAGE_AGENT):
+                        agent_response, transfer_marker = get_agent_runtime().run(process_with_agent(
+                            transcribed_text,
+                            session['user_id'],
+                            session['user_name']
+                        ), cancel_event=turn.cancel_event)
                 
                 print(f"🤖 Agent response: {agent_response}")
                 sentry_capture_voice_event("agent_processing_completed", session_id, session.get('user_id'), details={"response_length": len(agent_response)})
@@ -1417,64 +1507,110 @@ def init_socketio(socketio_instance: SocketIO, app):
                         agent_response = agent_response if not isinstance(agent_response, str) or not agent_response.startswith("TRANSFER_INITIATED:") else "Let me know how else I can help."
                 
                 # Step 3: Convert response to speech using OpenAI TTS (normal response)
-                socketio.emit('status', {'message': 'Generating speech...'}, namespace='/voice', room=session_id)
+                emit_to_room('status', {'message': 'Generating speech...'}, session_id)
                 sentry_capture_voice_event("tts_generation_started", session_id, session.get('user_id'))
                 
-                speech_response = openai_client.audio.speech.create(
-                    model="tts-1",
-                    voice="nova",  # Options: alloy, echo, fable, onyx, nova, shimmer
-                    input=agent_response,
-                    response_format="mp3"  # Explicitly specify MP3 format
-                )
-                
-                # Convert speech to base64 for transmission
-                audio_base64 = base64.b64encode(speech_response.content).decode('utf-8')
-                print(f"🔊 TTS generated: {len(speech_response.content)} bytes, base64: {len(audio_base64)} chars")
-                print(f"🔊 TTS audio preview: {audio_base64[:100]}...")
-                sentry_capture_voice_event("tts_generation_completed", session_id, session.get('user_id'), details={"audio_size": len(audio_base64)})
-                
-                # Send response to client
-                socketio.emit('agent_response', {
-                    'success': True,
-                    'text': agent_response,
-                    'audio': audio_base64
-                }, namespace='/voice', room=session_id)
+                if is_streaming_tts_enabled():
+                    # Sentence-level streaming: playback starts after the first sentence
+                    chunk_count = stream_sentence_audio(agent_response, send_audio_chunk, is_cancelled=turn.is_cancelled)
+                    turn.check()
+                    sentry_capture_voice_event("tts_generation_completed", session_id, session.get('user_id'), details={"chunks": chunk_count, "streamed": True})
+                    
+                    # Final event carries the full text; audio was already delivered in chunks
+                    emit_to_room('agent_response', {
+                        'success': True,
+                        'text': agent_response,
+                        'streamed': True,
+                        'chunks': chunk_count,
+                        'turn_id': turn.turn_id
+                    }, session_id)
+                else:
+                    audio_bytes = synthesize_speech(agent_response)
+                    turn.check()
+                    print(f"🔊 TTS generated: {len(audio_bytes)} bytes")
+                    sentry_capture_voice_event("tts_generation_completed", session_id, session.get('user_id'), details={"audio_size": len(audio_bytes)})
+                    
+                    # Send response to client
+                    emit_session_audio('agent_response', {
+                        'success': True,
+                        'text': agent_response,
+                        'turn_id': turn.turn_id
+                    }, audio_bytes, session_id)
                 
+                turn_ms = (time.time() - turn.started_at) * 1000
+                observe_stage(STAGE_TURN, turn_ms)
+                instrumentation.turn_completed(session_id, turn_ms, session.get('user_id'))
                 sentry_capture_voice_event("audio_processing_completed", session_id, session.get('user_id'), details={"success": True})
             
+            except (TurnCancelled, concurrent.futures.CancelledError):
+                print(f"🛑 Turn {turn.turn_id} aborted for session {session_id} ({turn.cancel_reason or 'cancelled'})")
+                sentry_capture_voice_event("turn_cancelled", session_id, details={"turn_id": turn.turn_id, "reason": turn.cancel_reason})
             except Exception as e:
                 print(f"❌ Error processing audio: {e}")
                 import traceback
                 traceback.print_exc()
                 
-                sentry_capture_voice_event("audio_processing_error", session_id, session.get('user_id') if 'session' in locals() else None, details={"error": str(e)})
-                if SENTRY_AVAILABLE:
-                    sentry_sdk.capture_exception(e)
+                instrumentation.error("audio_processing_error", session_id, exception=e,
+                                      user_id=session.get('user_id') if 'session' in locals() else None, details={"error": str(e)})
                 
-                socketio.emit('error', {
+                emit_to_room('error', {
                     'message': f"Error processing audio: {str(e)}"
-                }, namespace='/voice', room=session_id)
+                }, session_id)
+            finally:
+                if streaming_transcriber is not None and turn.is_cancelled():
+                    streaming_transcriber.close()
+                if speculator is not None:
+                    speculator.discard()
+                turn_registry.finish(turn)
+
+
+def stream_agent_response_audio(text: str, user_id: str, user_name: str, on_chunk, is_cancelled=None) -> tuple:
+    """Pipe the agent's token stream straight into sentence-level TTS
+    
+    Sentences are synthesized as soon as the LLM finishes them, so the first audio
+    chunk goes out before the completion is done. Internal markers (transfer, timeout,
+    error) are never spoken. is_cancelled() stops both the LLM stream and TTS.
+    
+    Returns (response_text, chunks_delivered).
+    """
+    from convonet.routes import iter_agent_stream
+    
+    result = {}
+    spoken = []
+    
+    def agent_deltas():
+        agent_started = time.perf_counter()
+        for event in iter_agent_stream(text, user_id=user_id, user_name=user_name, is_cancelled=is_cancelled):
+            if event['type'] == 'delta':
+                yield event['text']
+            else:
+                result.update(event)
+                observe_stage(STAGE_AGENT, (time.perf_counter() - agent_started) * 1000)
+    
+    def speakable(sentences):
+        for sentence in sentences:
+            if 'TRANSFER_INITIATED:' in sentence or sentence.startswith(('AGENT_TIMEOUT', 'AGENT_ERROR')):
+                continue
+            spoken.append(sentence)
+            yield sentence
+    
+    chunk_count = stream_sentences_audio(speakable(iter_sentences(agent_deltas())), on_chunk, is_cancelled=is_cancelled)
+    
+    response = result.get('response') or ""
+    if response.startswith("TRANSFER_INITIATED:"):
+        # The caller did not ask for a human (that path returns before the agent runs)
+        print("Transfer marker detected but caller did not request a human. Ignoring marker.")
+        response = " ".join(spoken) or "Let me know how else I can help."
+    elif response.startswith(("AGENT_TIMEOUT", "AGENT_ERROR")):
+        # Part of the reply may already have played; report what the caller heard
+        response = " ".join(spoken) if spoken else speakable_reply(response)
+    return response, chunk_count
 
 
 async def process_with_agent(text: str, user_id: str, user_name: str) -> str:
     """Process user input with the agent"""
     try:
-        # Capture agent processing start in Sentry
-        if SENTRY_AVAILABLE:
-            with sentry_sdk.configure_scope() as scope:
-                scope.set_tag("component", "webrtc_voice_server")
-                scope.set_tag("operation", "agent_processing")
-                scope.set_context("agent_processing", {
-                    "user_id": user_id,
-                    "user_name": user_name,
-                    "text_length": len(text),
-                    "text_preview": text[:100] + "..." if len(text) > 100 else text
-                })
-                sentry_sdk.add_breadcrumb(
-                    message="Agent processing started",
-                    category="agent",
-                    level="info"
-                )
+        instrumentation.event("agent_processing_started", user_id=user_id, details={"text_length": len(text)})
         
         # Use the same agent processing as Twilio for consistency
         from convonet.routes import _run_agent_async
@@ -1489,18 +1625,14 @@ async def process_with_agent(text: str, user_id: str, user_name: str) -> str:
         )
         
         if isinstance(result, dict):
-            return result.get("response", ""), result.get("transfer_marker")
-        return result, None
+            return speakable_reply(result.get("response", "")), result.get("transfer_marker")
+        return speakable_reply(result), None
     
     except asyncio.TimeoutError:
-        # Capture timeout in Sentry
-        if SENTRY_AVAILABLE:
-            sentry_sdk.capture_message("Agent processing timeout", level="warning")
-        return "I'm sorry, I'm taking too long to process that request. Please try again.", None
+        instrumentation.error("agent_timeout", message="Agent processing timeout", user_id=user_id, level="warning")
+        return AGENT_TIMEOUT_REPLY, None
     except Exception as e:
         print(f"❌ Agent error: {e}")
-        # Capture agent error in Sentry
-        if SENTRY_AVAILABLE:
-            sentry_sdk.capture_exception(e)
-        return "I'm sorry, I encountered an error. Please try again.", None
+        instrumentation.error("agent_error", exception=e, user_id=user_id)
+        return AGENT_ERROR_REPLY, None
 
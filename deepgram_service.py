@@ -1,15 +1,13 @@
 from deepgram import DeepgramClient
 import logging
 import os
-import asyncio
-from typing import Optional, Dict, Any, Callable
-import base64
+from typing import Optional, Dict, Any
 from dotenv import load_dotenv
-import tempfile
-import wave
-import struct
-import requests
-import numpy as np
+from convonet.audio_codec import (
+    is_webm, demux_webm, detect_container, encode_audio, AudioFormat, AudioCodecError, DEFAULT_RAW_FORMAT
+)
+from convonet.audio_stats import analyze_audio, can_analyze
+from convonet.http_clients import get_sync_client
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,13 +32,18 @@ class DeepgramService:
         
         logger.info("✅ Deepgram service initialized for real-time streaming")
     
-    def transcribe_audio_buffer(self, audio_buffer: bytes, language: str = "en") -> Optional[str]:
+    def transcribe_audio_buffer(self, audio_buffer: bytes, language: str = "en",
+                                audio_format: Optional[AudioFormat] = None, strict: bool = False,
+                                audio_quality: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
         Transcribe audio buffer using Deepgram's streaming API
         
         Args:
             audio_buffer: Raw audio data bytes from WebRTC
             language: Language code (default: "en")
+            audio_format: Format declared by the client at start_recording (for headerless samples)
+            strict: Raise on request/API errors instead of returning None (None then means no speech)
+            audio_quality: audio_stats summary already computed for this utterance (skips the re-scan)
             
         Returns:
             Transcribed text string or None if failed
@@ -55,95 +58,44 @@ class DeepgramService:
                        return None
                    
                    # Detect WebM/EBML header (Opus in WebM from MediaRecorder)
-                   is_webm = len(audio_buffer) >= 4 and audio_buffer[:4] == b"\x1a\x45\xdf\xa3"
-                   if is_webm:
+                   if is_webm(audio_buffer):
                        logger.info("🧭 Detected WebM/EBML header - sending as audio/webm to Deepgram")
-                       with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                           webm_path = temp_file.name
-                           temp_file.write(audio_buffer)
                        try:
-                           result = self._transcribe_file(webm_path, language)
-                           return result
-                       finally:
-                           if os.path.exists(webm_path):
-                               os.unlink(webm_path)
+                           webm_info = demux_webm(audio_buffer).info()
+                           logger.info(f"🧭 WebM audio: {webm_info}")
+                           if not webm_info['frames']:
+                               logger.warning("⚠️ WebM recording contains no audio frames, skipping transcription")
+                               return None
+                       except AudioCodecError as e:
+                           logger.warning(f"⚠️ WebM demux failed ({e}), uploading as-is")
+                       return self._transcribe_bytes(audio_buffer, "audio/webm", language, strict)
                    
-                   # Analyze audio quality before PCM processing
-                   audio_quality = self._analyze_audio_quality(audio_buffer)
-                   logger.info(f"🔍 Audio quality analysis: {audio_quality}")
+                   # Headerless samples: wrap them in a WAV header built from the declared format
+                   audio_format = audio_format or DEFAULT_RAW_FORMAT
+                   if detect_container(audio_buffer) == "raw" and can_analyze(audio_format):
+                       audio_quality = audio_quality or self._analyze_audio_quality(audio_buffer, audio_format)
+                       logger.info(f"🔍 Audio quality analysis: {audio_quality}")
+                       
+                       if audio_quality.get('is_silence', False):
+                           logger.warning("⚠️ Audio appears to be silence, skipping transcription")
+                           return None
+                       
+                       if audio_quality.get('clipping_percentage', 0) > 10:
+                           logger.warning(f"⚠️ Audio has severe clipping ({audio_quality.get('clipping_percentage', 0):.1f}%), may affect transcription quality")
                    
-                   if audio_quality.get('is_silence', False):
-                       logger.warning("⚠️ Audio appears to be silence, skipping transcription")
-                       return None
-                   
-                   if audio_quality.get('clipping_percentage', 0) > 10:
-                       logger.warning(f"⚠️ Audio has severe clipping ({audio_quality.get('clipping_percentage', 0):.1f}%), may affect transcription quality")
-                   
-                   # Fallback: treat as raw PCM and create WAV
-                   wav_file_path = self._create_wav_from_pcm(audio_buffer)
-                   if not wav_file_path:
-                       logger.error("❌ Failed to create WAV file from PCM data")
-                       return None
-                   try:
-                       result = self._transcribe_file(wav_file_path, language)
-                       return result
-                   finally:
-                       if os.path.exists(wav_file_path):
-                           os.unlink(wav_file_path)
+                   payload, content_type = encode_audio(audio_buffer, audio_format)
+                   logger.info(f"✅ Prepared {content_type} upload ({audio_format.to_session_value()}): {len(payload)} bytes")
+                   return self._transcribe_bytes(payload, content_type, language, strict)
         except Exception as e:
             logger.error(f"❌ Deepgram transcription failed: {e}")
+            if strict:
+                raise
             return None
     
-    def _create_wav_from_pcm(self, pcm_data: bytes) -> Optional[str]:
-        """Create a WAV file from raw PCM data optimized for Deepgram"""
-        try:
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                wav_path = temp_file.name
-            
-            # Try different PCM configurations optimized for Deepgram
-            # Start with WebRTC standard format first, then Deepgram's preferred format
-            pcm_configs = [
-                {"sample_rate": 48000, "channels": 1, "sample_width": 2, "desc": "48kHz, mono, 16-bit (WebRTC standard)"},
-                {"sample_rate": 16000, "channels": 1, "sample_width": 2, "desc": "16kHz, mono, 16-bit (Deepgram optimized)"},
-                {"sample_rate": 44100, "channels": 1, "sample_width": 2, "desc": "44.1kHz, mono, 16-bit (CD quality)"},
-                {"sample_rate": 8000, "channels": 1, "sample_width": 2, "desc": "8kHz, mono, 16-bit (telephone quality)"},
-            ]
-            
-            for config in pcm_configs:
-                try:
-                    logger.info(f"🔍 Trying PCM config: {config['desc']}")
-                    
-                    # Write WAV file with proper headers
-                    with wave.open(wav_path, 'wb') as wav_file:
-                        wav_file.setnchannels(config['channels'])
-                        wav_file.setsampwidth(config['sample_width'])
-                        wav_file.setframerate(config['sample_rate'])
-                        wav_file.writeframes(pcm_data)
-                    
-                    # Test if the file is valid
-                    with wave.open(wav_path, 'rb') as test_file:
-                        frames = test_file.getnframes()
-                        if frames > 0:
-                            logger.info(f"✅ Created valid WAV file: {config['desc']}, {frames} frames")
-                            return wav_path
-                    
-                except Exception as e:
-                    logger.warning(f"⚠️ PCM config {config['desc']} failed: {e}")
-                    continue
-            
-            logger.error("❌ All PCM configurations failed")
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to create WAV file: {e}")
-            return None
-    
-    def _transcribe_file(self, file_path: str, language: str) -> Optional[str]:
-        """Transcribe a file using Deepgram's HTTP API"""
+    def _transcribe_bytes(self, audio_data, content_type: str, language: str, strict: bool = False) -> Optional[str]:
+        """Transcribe an in-memory audio buffer using Deepgram's HTTP API"""
         try:
-            logger.info(f"📤 Uploading file to Deepgram: {file_path}")
-            logger.info(f"📊 File size: {os.path.getsize(file_path)} bytes")
+            logger.info(f"📤 Uploading {content_type} to Deepgram: {len(audio_data)} bytes")
             
             # Use Deepgram's HTTP API directly
             url = "https://api.deepgram.com/v1/listen"
@@ -158,22 +110,13 @@ class DeepgramService:
                 "detect_language": "false",  # Use specified language
             }
             
-            # Read the file
-            with open(file_path, 'rb') as audio_file:
-                buffer_data = audio_file.read()
-            
-            # Choose content type by extension
-            content_type = "audio/wav"
-            if file_path.lower().endswith('.webm'):
-                content_type = "audio/webm"
-            
             # Make the request
             headers = {
                 "Authorization": f"Token {self.api_key}",
                 "Content-Type": content_type
             }
             
-            response = requests.post(url, params=params, headers=headers, data=buffer_data, timeout=30)
+            response = get_sync_client('deepgram').post(url, params=params, headers=headers, content=audio_data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -193,7 +136,7 @@ class DeepgramService:
                         logger.info(f"🎯 Confidence: {confidence:.2f}")
                         
                         if transcription_text and transcription_text.strip():
-                            logger.info(f"✅ Deepgram transcription successful")
+                            logger.info("✅ Deepgram transcription successful")
                             logger.info(f"📝 Text: {transcription_text}")
                             
                             return transcription_text.strip()
@@ -211,68 +154,20 @@ class DeepgramService:
                     return None
             else:
                 logger.error(f"❌ Deepgram API error: {response.status_code} - {response.text}")
+                if strict:
+                    raise RuntimeError(f"Deepgram API error {response.status_code}")
                 return None
                 
         except Exception as e:
-            logger.error(f"❌ Deepgram file transcription failed: {e}")
+            logger.error(f"❌ Deepgram buffer transcription failed: {e}")
+            if strict:
+                raise
             return None
     
-    def _analyze_audio_quality(self, audio_buffer: bytes) -> Dict[str, Any]:
-        """Analyze audio quality to help with transcription decisions"""
+    def _analyze_audio_quality(self, audio_buffer: bytes, audio_format: Optional[AudioFormat] = None) -> Dict[str, Any]:
+        """Full-buffer quality scan (see audio_stats.py), for callers without a stop-time verdict"""
         try:
-            # Convert bytes to numpy array for analysis
-            # Assume 16-bit signed little-endian PCM
-            # Ensure buffer size is even (multiple of 2 bytes for 16-bit samples)
-            if len(audio_buffer) % 2 != 0:
-                # Remove the last byte if odd length
-                audio_buffer = audio_buffer[:-1]
-                logger.debug(f"🔧 Trimmed audio buffer to even length: {len(audio_buffer)} bytes")
-            
-            if len(audio_buffer) == 0:
-                return {"is_silence": True, "rms": 0, "clipping_percentage": 0}
-            
-            audio_data = np.frombuffer(audio_buffer, dtype=np.int16)
-            
-            # Calculate RMS (Root Mean Square) - indicates volume level
-            rms = np.sqrt(np.mean(audio_data.astype(np.float32) ** 2))
-            
-            # Detect clipping (values at or near maximum/minimum)
-            max_val = np.max(np.abs(audio_data))
-            clipping_threshold = 0.95 * 32767  # 95% of max 16-bit value
-            clipped_samples = np.sum(np.abs(audio_data) > clipping_threshold)
-            clipping_percentage = (clipped_samples / len(audio_data)) * 100
-            
-            # Detect silence (very low RMS)
-            silence_threshold = 100  # Adjust based on testing
-            is_silence = rms < silence_threshold
-            
-            # Detect noise (high frequency content without clear speech patterns)
-            # Simple heuristic: check for consistent patterns vs random noise
-            if len(audio_data) > 1000:
-                # Calculate spectral characteristics
-                fft = np.fft.fft(audio_data[:1000])  # Use first 1000 samples
-                freqs = np.fft.fftfreq(1000)
-                power_spectrum = np.abs(fft) ** 2
-                
-                # Check for speech-like frequency distribution (rough heuristic)
-                speech_freq_range = (freqs >= 0.1) & (freqs <= 0.4)  # Roughly 1.6-6.4 kHz at 16kHz sample rate
-                speech_power = np.sum(power_spectrum[speech_freq_range])
-                total_power = np.sum(power_spectrum[freqs > 0])
-                
-                speech_ratio = speech_power / total_power if total_power > 0 else 0
-                is_likely_speech = speech_ratio > 0.1  # At least 10% power in speech range
-            else:
-                is_likely_speech = True  # Assume speech for short samples
-            
-            return {
-                "is_silence": is_silence,
-                "rms": float(rms),
-                "clipping_percentage": float(clipping_percentage),
-                "max_amplitude": int(max_val),
-                "is_likely_speech": is_likely_speech,
-                "sample_count": len(audio_data)
-            }
-            
+            return analyze_audio(audio_buffer, audio_format)
         except Exception as e:
             logger.warning(f"⚠️ Audio quality analysis failed: {e}")
             return {"is_silence": False, "rms": 0, "clipping_percentage": 0}
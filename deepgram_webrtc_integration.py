@@ -2,16 +2,19 @@ import os
 import logging
 from typing import Dict, Any, Optional
 from deepgram_service import get_deepgram_service
+from convonet.audio_codec import AudioFormat
 
 logger = logging.getLogger(__name__)
 
-def transcribe_audio_with_deepgram_webrtc(audio_buffer: bytes, language: str = "en") -> Optional[str]:
+def transcribe_audio_with_deepgram_webrtc(audio_buffer: bytes, language: str = "en",
+                                          audio_format: Optional[AudioFormat] = None) -> Optional[str]:
     """
     Transcribe audio buffer using Deepgram, specifically for WebRTC chunks.
     
     Args:
         audio_buffer: Raw audio data bytes from WebRTC.
         language: Language code (default: "en").
+        audio_format: Format the client declared at start_recording (raw samples only).
         
     Returns:
         Transcribed text string or None if failed.
@@ -21,7 +24,7 @@ def transcribe_audio_with_deepgram_webrtc(audio_buffer: bytes, language: str = "
         
         # Deepgram is designed for real-time streaming and handles WebRTC chunks well
         # It can process smaller audio buffers more effectively than AssemblyAI
-        transcribed_text = service.transcribe_audio_buffer(audio_buffer, language)
+        transcribed_text = service.transcribe_audio_buffer(audio_buffer, language, audio_format)
         
         if transcribed_text:
             logger.info(f"✅ Deepgram WebRTC transcription successful: {transcribed_text}")
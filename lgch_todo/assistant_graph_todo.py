@@ -1,6 +1,7 @@
 import logging
 from langchain_core.tools import BaseTool
 from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph import StateGraph
@@ -87,7 +88,7 @@ class TodoAgent:
     def build_graph(self,) -> CompiledStateGraph:
         builder = StateGraph(AgentState)
 
-        def assistant(state: AgentState):
+        def assistant(state: AgentState, config: RunnableConfig):
             """The main assistant node that uses the LLM to generate responses."""
             # inject todo priorities and reminder importance into the system prompt
             system_prompt = self.system_prompt.format(
@@ -95,7 +96,7 @@ class TodoAgent:
                 reminder_importance=", ".join([i.value for i in ReminderImportance])
                 )
 
-            response = self.llm.invoke([SystemMessage(content=system_prompt)] + state.messages)
+            response = self.llm.invoke([SystemMessage(content=system_prompt)] + state.messages, config=config)
             state.messages.append(response)
             return state
 
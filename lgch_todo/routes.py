@@ -9,6 +9,7 @@ import requests
 from twilio.twiml.voice_response import VoiceResponse, Connect, Gather
 from .state import AgentState
 from .assistant_graph_todo import TodoAgent
+from convonet.agent_runtime import run_agent_coroutine
 from langchain_mcp_adapters.client import MultiServerMCPClient
 
 
@@ -158,7 +159,7 @@ def process_audio_webhook():
             return Response(str(response), mimetype='text/xml')
         
         # Process with the agent
-        agent_response = asyncio.run(_run_agent_async(transcribed_text))
+        agent_response = run_agent_coroutine(_run_agent_async(transcribed_text))
         
         # Return TwiML with the agent's response and barge-in capability
         response = VoiceResponse()
@@ -278,7 +279,7 @@ def run_agent():
         return jsonify({"error": "Missing 'prompt' in JSON body"}), 400
 
     try:
-        result = asyncio.run(_run_agent_async(prompt))
+        result = run_agent_coroutine(_run_agent_async(prompt))
         return jsonify({"result": result})
     except Exception as e:
         # Log the full error for debugging
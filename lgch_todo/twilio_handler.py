@@ -4,16 +4,25 @@ import json
 import logging
 import websockets
 import os
+import re
 import wave
 from datetime import datetime
 from typing import AsyncGenerator
 import numpy as np
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessageChunk, HumanMessage
 from langgraph.graph import StateGraph
 
 from .assistant_graph_todo import TodoAgent
 from .voice_utils import play_audio_async_generator
+from convonet.agent_runtime import run_agent_coroutine
+
+# Optional server-side VAD/endpointing (shared with the convonet voice pipeline)
+try:
+    from convonet.vad import create_vad, is_server_vad_enabled, ENCODING_MULAW, SPEECH_START, SPEECH_END
+    VAD_AVAILABLE = True
+except ImportError:
+    VAD_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -128,22 +137,48 @@ async def save_call_recording(audio_data: bytes, call_sid: str, from_number: str
         return None
 
 
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
 async def stream_graph_response(
     input_data: dict, graph: StateGraph, config: dict
 ) -> AsyncGenerator[str, None]:
     """
-    Streams the text response from the LangGraph agent.
-    This is a simplified version for text-only streaming to the console.
+    Streams the text response from the LangGraph agent token by token.
+    Only deltas from the assistant node are yielded; turns that end in a tool
+    call stop yielding once the call starts.
+    """
+    tool_call_message_ids = set()
+    async for chunk, metadata in graph.astream(input=input_data, config=config, stream_mode="messages"):
+        if metadata.get("langgraph_node") != "assistant" or not isinstance(chunk, AIMessageChunk):
+            continue
+        if chunk.tool_call_chunks:
+            tool_call_message_ids.add(chunk.id)
+        if chunk.id in tool_call_message_ids:
+            continue
+        if isinstance(chunk.content, str) and chunk.content:
+            yield chunk.content
+
+
+async def stream_graph_sentences(
+    input_data: dict, graph: StateGraph, config: dict
+) -> AsyncGenerator[str, None]:
+    """
+    Groups the agent's token stream into complete sentences so each one can be
+    sent to TTS while the rest of the reply is still being generated.
     """
-    full_response = ""
-    async for chunk in graph.astream(input=input_data, config=config, stream_mode="values"):
-        if "messages" in chunk:
-            message = chunk["messages"][-1]
-            if isinstance(message, AIMessage) and message.content:
-                # Yield the new content
-                new_content = message.content.replace(full_response, "")
-                yield new_content
-                full_response = message.content
+    buffer = ""
+    async for text_chunk in stream_graph_response(input_data, graph, config):
+        print(text_chunk, end="", flush=True)
+        buffer += text_chunk
+        parts = _SENTENCE_BOUNDARY.split(buffer)
+        buffer = parts.pop()
+        for sentence in parts:
+            if sentence.strip():
+                yield sentence.strip()
+    if buffer.strip():
+        yield buffer.strip()
+    print("\n")
 
 
 async def twilio_handler(websocket):
@@ -202,17 +237,11 @@ async def twilio_handler(websocket):
             ]
         }
 
-        # Stream the intro message text to console and get audio for Twilio
-        async for text_chunk in stream_graph_response(initial_input, agent_graph, config):
-            intro_text += text_chunk
-            print(text_chunk, end="", flush=True)
-
-        print("\n")
-
-        # Generate the audio for the intro and stream it to Twilio
-        if intro_text:
-            logger.info("Streaming intro audio to Twilio...")
-            audio_generator = play_audio_async_generator(intro_text, stream=True)
+        # Stream the intro to Twilio sentence by sentence as the agent generates it
+        logger.info("Streaming intro audio to Twilio...")
+        async for sentence in stream_graph_sentences(initial_input, agent_graph, config):
+            intro_text = f"{intro_text} {sentence}".strip()
+            audio_generator = play_audio_async_generator(sentence, stream=True)
             await stream_audio_to_twilio(websocket, call_sid, audio_generator)
     except Exception as e:
         logger.error(f"❌ Error generating intro: {e}")
@@ -225,6 +254,74 @@ async def twilio_handler(websocket):
     full_call_audio = bytearray()  # Store entire call audio for recording
     from_number = None
     to_number = None
+    
+    # Twilio Media Streams carry 8kHz μ-law frames
+    vad = create_vad(encoding=ENCODING_MULAW, sample_rate=8000) if VAD_AVAILABLE and is_server_vad_enabled() else None
+    if vad:
+        logger.info("🎙️ Server-side VAD enabled for this call")
+
+    async def respond_to_utterance(stream_sid):
+        """Transcribe the buffered utterance, run the agent and speak the reply"""
+        if not audio_buffer:
+            logger.warning("No audio in buffer to process.")
+            return
+
+        # 1. Transcribe the buffered audio
+        from .voice_utils import transcribe_audio_bytes
+        transcribed_text = await transcribe_audio_bytes(bytes(audio_buffer))
+        audio_buffer.clear() # Clear buffer for next turn
+
+        if not transcribed_text or len(transcribed_text.strip()) < 2:
+            logger.info(f"Skipping transcription (too short): '{transcribed_text}'")
+            return
+
+        logger.info(f"--- You --- \n{transcribed_text}\n")
+
+        # 2. Get response from the agent
+        agent_input = {"messages": [HumanMessage(content=transcribed_text)]}
+        agent_response_text = ""
+        
+        print("--- Assistant ---\n")
+        async for sentence in stream_graph_sentences(agent_input, agent_graph, config):
+            agent_response_text = f"{agent_response_text} {sentence}".strip()
+            # Speak each sentence as soon as it is complete
+            if websocket.close_code is None:
+                audio_generator = play_audio_async_generator(sentence, stream=True)
+                await stream_audio_to_twilio(websocket, call_sid, audio_generator)
+
+        # 3. Send the agent's response back to Twilio
+        if agent_response_text:
+            logger.info("Sending agent response to Twilio...")
+            
+            # Check if WebSocket is still open before sending response
+            if websocket.close_code is not None:
+                logger.warning("WebSocket connection closed before sending response")
+                return
+            
+            try:
+                # Send a simple text response
+                logger.info("Sending text response to Twilio...")
+                await websocket.send(json.dumps({
+                    "event": "response",
+                    "streamSid": call_sid,
+                    "text": agent_response_text
+                }))
+                logger.info("Successfully sent text response to Twilio")
+                
+            except websockets.exceptions.ConnectionClosed:
+                logger.warning("WebSocket connection closed during response sending")
+            except Exception as e:
+                logger.error(f"Error sending response: {e}")
+                import traceback
+                logger.error(f"Traceback: {traceback.format_exc()}")
+
+        # After responding, send a "mark" message to signal completion
+        await websocket.send(json.dumps({
+            "event": "mark",
+            "streamSid": stream_sid,
+            "mark": { "name": "agent_turn_complete" }
+        }))
+
     # https://www.twilio.com/docs/voice/media-streams/websocket-messages#start-message
     async for message in websocket:
         try:
@@ -249,6 +346,18 @@ async def twilio_handler(websocket):
                     audio_buffer.extend(audio_chunk)
                     full_call_audio.extend(audio_chunk)  # Store for full call recording
                     
+                    # Server-side endpointing: answer as soon as the caller stops talking
+                    if vad:
+                        vad_events = vad.process(audio_chunk)
+                        if SPEECH_START in vad_events:
+                            logger.info("🗣️ Speech started")
+                        if SPEECH_END in vad_events:
+                            logger.info("🔇 End of speech detected, processing utterance")
+                            await respond_to_utterance(data.get("streamSid", call_sid))
+                        elif not vad.in_speech and len(audio_buffer) > vad.preroll_bytes():
+                            # Only keep a short pre-roll of background audio between utterances
+                            del audio_buffer[:len(audio_buffer) - vad.preroll_bytes()]
+                    
                     # Periodic save every 10KB of audio to prevent data loss
                     if len(full_call_audio) % 10240 == 0 and len(full_call_audio) > 0:
                         logger.info(f"Periodic audio checkpoint: {len(full_call_audio)} bytes collected")
@@ -259,63 +368,7 @@ async def twilio_handler(websocket):
             elif event == "stop":
                 try:
                     logger.info("Stop event received. Processing accumulated audio.")
-                    if not audio_buffer:
-                        logger.warning("No audio in buffer to process.")
-                        continue
-
-                    # 1. Transcribe the buffered audio
-                    from .voice_utils import transcribe_audio_bytes
-                    transcribed_text = await transcribe_audio_bytes(bytes(audio_buffer))
-                    audio_buffer.clear() # Clear buffer for next turn
-
-                    if not transcribed_text or len(transcribed_text.strip()) < 2:
-                        logger.info(f"Skipping transcription (too short): '{transcribed_text}'")
-                        continue
-
-                    logger.info(f"--- You --- \n{transcribed_text}\n")
-
-                    # 2. Get response from the agent
-                    agent_input = {"messages": [HumanMessage(content=transcribed_text)]}
-                    agent_response_text = ""
-                    
-                    print("--- Assistant ---\n")
-                    async for text_chunk in stream_graph_response(agent_input, agent_graph, config):
-                        agent_response_text += text_chunk
-                        print(text_chunk, end="", flush=True)
-                    print("\n")
-
-                    # 3. Send the agent's response back to Twilio
-                    if agent_response_text:
-                        logger.info("Sending agent response to Twilio...")
-                        
-                        # Check if WebSocket is still open before sending response
-                        if websocket.close_code is not None:
-                            logger.warning("WebSocket connection closed before sending response")
-                            return
-                        
-                        try:
-                            # Send a simple text response
-                            logger.info("Sending text response to Twilio...")
-                            await websocket.send(json.dumps({
-                                "event": "response",
-                                "streamSid": call_sid,
-                                "text": agent_response_text
-                            }))
-                            logger.info("Successfully sent text response to Twilio")
-                            
-                        except websockets.exceptions.ConnectionClosed:
-                            logger.warning("WebSocket connection closed during response sending")
-                        except Exception as e:
-                            logger.error(f"Error sending response: {e}")
-                            import traceback
-                            logger.error(f"Traceback: {traceback.format_exc()}")
-
-                    # After responding, send a "mark" message to signal completion
-                    await websocket.send(json.dumps({
-                        "event": "mark",
-                        "streamSid": data.get("streamSid", call_sid),
-                        "mark": { "name": "agent_turn_complete" }
-                    }))
+                    await respond_to_utterance(data.get("streamSid", call_sid))
                 except Exception as e:
                     logger.error(f"Error processing stop event: {e}")
                     import traceback
@@ -409,8 +462,8 @@ async def stream_audio_to_twilio(websocket, stream_sid: str, audio_generator: As
 
 
 def run_async_handler(websocket):
-    """Runs the async handler in a new event loop."""
+    """Runs the async handler on the shared agent runtime loop."""
     try:
-        asyncio.run(twilio_handler(websocket))
+        run_agent_coroutine(twilio_handler(websocket))
     except Exception as e:
         logger.error(f"Error running async handler: {e}")
\ No newline at end of file
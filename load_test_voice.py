@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Load Test for the WebRTC Voice Server
+Drives concurrent /voice Socket.IO clients through full record -> STT -> agent -> TTS turns
+
+Each virtual caller connects over websocket, authenticates with the test PIN
+(ENABLE_TEST_PIN=true on the server), then repeatedly streams an audio file as
+audio_data chunks, sends stop_recording and waits for the turn's agent_response
+(or its failure event). Reports completed turns/s and turn latency percentiles.
+
+Against a running server:
+
+    python load_test_voice.py --url http://localhost:10000 --clients 16 --turns 5 --audio sample.webm
+
+Scaling run: start gunicorn locally with 1, 2 and 4 workers (SCALE_OUT=true, Redis
+required) and print throughput per worker count:
+
+    python load_test_voice.py --workers 1,2,4 --clients 16 --turns 5 --audio sample.webm
+
+Use a recording with speech in --audio to exercise the agent; without it a short
+generated tone is sent, which only exercises ingest and STT.
+"""
+
+import argparse
+import base64
+import math
+import os
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+from convonet.audio_codec import pcm_to_wav
+from convonet.metrics import LatencyHistogram
+
+NAMESPACE = '/voice'
+CHUNK_BYTES = 4096
+TERMINAL_FAILURES = ('transcription', 'busy', 'error')
+
+
+def default_audio() -> bytes:
+    """1.5s 440Hz tone as 16kHz mono WAV"""
+    rate = 16000
+    samples = (int(8000 * math.sin(2 * math.pi * 440 * n / rate)) for n in range(int(rate * 1.5)))
+    return pcm_to_wav(b''.join(struct.pack('<h', s) for s in samples), sample_rate=rate)
+
+
+class VoiceCaller:
+    """One simulated browser session"""
+
+    def __init__(self, url: str, pin: str, audio: bytes, turn_timeout: float):
+        self.url = url
+        self.pin = pin
+        self.chunks = [base64.b64encode(audio[i:i + CHUNK_BYTES]).decode('ascii') for i in range(0, len(audio), CHUNK_BYTES)]
+        self.turn_timeout = turn_timeout
+        self.client = socketio.Client(reconnection=False)
+        self._authenticated = threading.Event()
+        self._recording = threading.Event()
+        self._done = threading.Event()
+        self._outcome = None
+        self._register()
+
+    def _register(self):
+        on = lambda event: self.client.on(event, namespace=NAMESPACE)
+
+        @on('authenticated')
+        def _authenticated(data):
+            if data.get('success'):
+                self._authenticated.set()
+
+        @on('recording_started')
+        def _recording_started(data):
+            self._recording.set()
+
+        @on('agent_response')
+        def _agent_response(data):
+            self._finish('ok')
+
+        @on('transcription')
+        def _transcription(data):
+            if not data.get('success', True):
+                self._finish('no_transcript')
+
+        @on('busy')
+        def _busy(data):
+            if not data.get('queued'):
+                self._finish('rejected')
+
+        @on('error')
+        def _error(data):
+            self._finish('error')
+
+    def _finish(self, outcome: str):
+        if not self._done.is_set():
+            self._outcome = outcome
+            self._done.set()
+
+    def connect(self):
+        # Websocket only: polling requests are not pinned to the worker that owns the session
+        self.client.connect(self.url, namespaces=[NAMESPACE], transports=['websocket'], wait_timeout=10)
+        self.client.emit('authenticate', {'pin': self.pin}, namespace=NAMESPACE)
+        if not self._authenticated.wait(10):
+            raise RuntimeError("authentication timed out (is ENABLE_TEST_PIN=true on the server?)")
+
+    def turn(self):
+        """Run one turn; returns (outcome, latency_ms from stop_recording to the reply)"""
+        self._recording.clear()
+        self._done.clear()
+        self._outcome = None
+        self.client.emit('start_recording', {}, namespace=NAMESPACE)
+        if not self._recording.wait(10):
+            return 'error', None
+        for chunk in self.chunks:
+            self.client.emit('audio_data', {'audio': chunk}, namespace=NAMESPACE)
+        started = time.perf_counter()
+        self.client.emit('stop_recording', {}, namespace=NAMESPACE)
+        if not self._done.wait(self.turn_timeout):
+            return 'timeout', None
+        return self._outcome, (time.perf_counter() - started) * 1000
+
+    def close(self):
+        try:
+            self.client.disconnect()
+        except Exception:
+            pass
+
+
+def run_load(url: str, clients: int, turns: int, pin: str, audio: bytes, turn_timeout: float) -> dict:
+    """Run `clients` concurrent callers for `turns` turns each against one server"""
+    histogram = LatencyHistogram()
+    outcomes = {}
+    lock = threading.Lock()
+
+    def caller(index: int):
+        caller = VoiceCaller(url, pin, audio, turn_timeout)
+        try:
+            caller.connect()
+        except Exception as e:
+            print(f"❌ Caller {index} failed to connect: {e}")
+            with lock:
+                outcomes['connect_failed'] = outcomes.get('connect_failed', 0) + 1
+            return
+        try:
+            for _ in range(turns):
+                outcome, latency_ms = caller.turn()
+                with lock:
+                    outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                if latency_ms is not None:
+                    histogram.record(latency_ms)
+        finally:
+            caller.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(caller, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    completed = sum(count for outcome, count in outcomes.items() if outcome in ('ok', 'no_transcript'))
+    percentiles = histogram.percentiles((0.5, 0.95, 0.99))
+    return {
+        'elapsed_s': elapsed,
+        'completed': completed,
+        'turns_per_s': completed / elapsed if elapsed else 0.0,
+        'outcomes': outcomes,
+        'p50_ms': percentiles[0.5],
+        'p95_ms': percentiles[0.95],
+        'p99_ms': percentiles[0.99],
+    }
+
+
+def wait_ready(url: str, timeout: float) -> bool:
+    """Poll /readyz until the server's warm-up finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/readyz", timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1.0)
+    return False
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    """gunicorn with `workers` eventlet workers sharing state through Redis"""
+    env = {
+        **os.environ,
+        'SCALE_OUT': 'true',
+        'ENABLE_TEST_PIN': 'true',
+        # Every load-test caller is 'test_user'; don't let per-user fairness reject them
+        'TURN_MAX_QUEUED_PER_USER': os.getenv('TURN_MAX_QUEUED_PER_USER', '1000'),
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--worker-class', 'eventlet', '-w', str(workers),
+         '--bind', f'127.0.0.1:{port}', 'passenger_wsgi:application'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
+    )
+
+
+def print_result(label: str, result: dict):
+    fmt = lambda value: f"{value:.0f}" if value is not None else "-"
+    print(f"{label:>10} | {result['completed']:>6} turns | {result['turns_per_s']:>7.2f} turns/s | "
+          f"p50 {fmt(result['p50_ms']):>6}ms | p95 {fmt(result['p95_ms']):>6}ms | p99 {fmt(result['p99_ms']):>6}ms | "
+          f"{result['outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:10000', help='Server base URL (ignored with --workers)')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent callers')
+    parser.add_argument('--turns', type=int, default=5, help='Turns per caller')
+    parser.add_argument('--pin', default=os.getenv('TEST_VOICE_PIN', '1234'), help='Test PIN (ENABLE_TEST_PIN=true)')
+    parser.add_argument('--audio', help='Audio file sent each turn (WebM/WAV); default is a generated tone')
+    parser.add_argument('--turn-timeout', type=float, default=60.0, help='Seconds to wait for each reply')
+    parser.add_argument('--workers', help='Comma-separated gunicorn worker counts to start and compare, e.g. 1,2,4')
+    parser.add_argument('--port', type=int, default=10100, help='Port for servers started with --workers')
+    parser.add_argument('--ready-timeout', type=float, default=120.0, help='Seconds to wait for /readyz')
+    args = parser.parse_args()
+
+    if args.audio:
+        with open(args.audio, 'rb') as f:
+            audio = f.read()
+    else:
+        audio = default_audio()
+    print(f"🎧 {args.clients} callers x {args.turns} turns, {len(audio)} bytes of audio per turn")
+
+    if not args.workers:
+        print_result('server', run_load(args.url, args.clients, args.turns, args.pin, audio, args.turn_timeout))
+        return
+
+    results = {}
+    for workers in (int(count) for count in args.workers.split(',')):
+        url = f"http://127.0.0.1:{args.port}"
+        print(f"🚀 Starting gunicorn with {workers} worker(s) on {url}")
+        server = start_server(workers, args.port)
+        try:
+            if not wait_ready(url, args.ready_timeout):
+                print(f"❌ Server with {workers} worker(s) not ready after {args.ready_timeout}s")
+                continue
+            results[workers] = run_load(url, args.clients, args.turns, args.pin, audio, args.turn_timeout)
+            print_result(f"{workers} worker", results[workers])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if results:
+        baseline = results[min(results)]['turns_per_s'] or None
+        print("\n📈 Throughput scaling")
+        for workers, result in results.items():
+            speedup = f"{result['turns_per_s'] / baseline:.2f}x" if baseline else "-"
+            print_result(f"{workers} worker", result)
+            print(f"{'':>10}   speedup vs {min(results)} worker(s): {speedup}")
+
+
+if __name__ == '__main__':
+    main()
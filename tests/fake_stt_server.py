@@ -0,0 +1,124 @@
+"""
+Fake Streaming STT Server
+Local Deepgram-compatible websocket for offline tests and streaming pipeline benchmarks
+
+Test-only: lives under tests/ so it does not ship with the convonet package.
+
+Usage:
+    server = FakeStreamingSTTServer(transcript="create a todo to buy groceries").start()
+    provider = DeepgramStreamingProvider(api_key="test", url=server.url)
+    ...
+    server.stop()
+
+Run `python -m tests.fake_stt_server` for a quick latency benchmark.
+"""
+
+import json
+import threading
+import time
+from typing import Optional
+
+
+class FakeStreamingSTTServer:
+    """Replays a fixed transcript word by word as audio bytes arrive"""
+
+    def __init__(self, transcript: str = "create a todo to buy groceries", host: str = "127.0.0.1",
+                 port: int = 0, bytes_per_word: int = 4000, interim_every: int = 4):
+        self.transcript = transcript
+        self.host = host
+        self.port = port
+        self.bytes_per_word = bytes_per_word
+        self.interim_every = interim_every
+        self.connections = 0
+        self.bytes_received = 0
+        self.request_paths = []  # path and query string of each connection
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v1/listen"
+
+    def start(self) -> "FakeStreamingSTTServer":
+        from websockets.sync.server import serve
+
+        self._server = serve(self._handle, self.host, self.port)
+        self.port = self._server.socket.getsockname()[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+    def _results(self, text: str, is_final: bool) -> str:
+        return json.dumps({
+            "type": "Results",
+            "is_final": is_final,
+            "speech_final": is_final,
+            "channel": {"alternatives": [{"transcript": text, "confidence": 0.99}]}
+        })
+
+    def _handle(self, websocket):
+        self.connections += 1
+        self.request_paths.append(websocket.request.path)
+        words = self.transcript.split()
+        received = 0
+        frames = 0
+
+        for message in websocket:
+            if isinstance(message, bytes):
+                received += len(message)
+                self.bytes_received += len(message)
+                frames += 1
+                if frames % self.interim_every == 0:
+                    heard = min(len(words), received // self.bytes_per_word + 1)
+                    websocket.send(self._results(" ".join(words[:heard]), is_final=False))
+                continue
+
+            try:
+                control = json.loads(message)
+            except ValueError:
+                continue
+            if control.get("type") == "CloseStream":
+                websocket.send(self._results(self.transcript, is_final=True))
+                websocket.send(json.dumps({"type": "Metadata", "duration": received}))
+                break
+
+        websocket.close()
+
+
+def run_benchmark(chunks: int = 50, chunk_size: int = 1600, chunk_interval: float = 0.02):
+    """Stream synthetic chunks through the provider and report stop-to-final-transcript latency"""
+    from convonet.streaming_stt import DeepgramStreamingProvider
+
+    server = FakeStreamingSTTServer().start()
+    try:
+        interim_count = 0
+
+        def on_interim(text):
+            nonlocal interim_count
+            interim_count += 1
+
+        provider = DeepgramStreamingProvider(api_key="test", url=server.url)
+        transcriber = provider.open(on_interim=on_interim)
+        for _ in range(chunks):
+            transcriber.send(b"\x00" * chunk_size)
+            time.sleep(chunk_interval)
+
+        stop_started = time.perf_counter()
+        transcript = transcriber.finish(timeout=5.0)
+        stop_latency_ms = (time.perf_counter() - stop_started) * 1000
+
+        print(f"📝 Final transcript: {transcript}")
+        print(f"📊 Interim results: {interim_count}, bytes streamed: {server.bytes_received}")
+        print(f"⏱️ stop_recording → final transcript: {stop_latency_ms:.2f} ms")
+        return stop_latency_ms
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    run_benchmark()
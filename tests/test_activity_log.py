@@ -0,0 +1,118 @@
+"""Activity log: eviction, Redis mirror and backfill keep the full thread history in the profile"""
+
+import unittest
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from convonet import activity_log
+from convonet.activity_log import ActivityLog
+
+
+class FakeRedis:
+    """Just the list/hash commands the activity log mirrors to"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        pass
+
+    def rpush(self, key, value):
+        self.data.setdefault(key, []).append(value)
+
+    def ltrim(self, key, start, end):
+        self.data[key] = self.data.get(key, [])[start:] if end == -1 else self.data.get(key, [])[start:end + 1]
+
+    def lrange(self, key, start, end):
+        return list(self.data.get(key, []))
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def user(text):
+    return {"type": "user", "content": text, "timestamp": None}
+
+
+def contents(profile):
+    return [entry["content"] for entry in profile["conversation_history"]]
+
+
+class ActivityLogTestCase(unittest.TestCase):
+    redis = None
+
+    def setUp(self):
+        manager = mock.Mock(is_available=mock.Mock(return_value=self.redis is not None), redis_client=self.redis)
+        for patcher in (mock.patch.object(activity_log, 'REDIS_AVAILABLE', self.redis is not None),
+                        mock.patch.object(activity_log, 'redis_manager', manager)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.log = ActivityLog(max_threads=1)
+
+    def record_then_evict(self):
+        self.log.record_message("t1", user("m1"), "id1")
+        self.log.record_message("t1", user("m2"), "id2")
+        self.log.record_message("t2", user("other"), "id-other")  # evicts t1
+        self.log.record_message("t1", user("m3"), "id3")
+
+
+class EvictionWithoutRedisTest(ActivityLogTestCase):
+    def test_partial_log_after_eviction_is_not_served_as_the_profile(self):
+        self.record_then_evict()
+        self.assertEqual(self.log.get_stats()["evicted"], 2)
+        self.assertIsNone(self.log.get_profile_data("t1"))
+        self.assertEqual(contents(self.log.get_profile_data("t1", allow_partial=True)), ["m3"])
+
+    def test_backfill_replaces_partial_log_with_full_history(self):
+        self.record_then_evict()
+        messages = [HumanMessage("m1", id="id1"), AIMessage("a1", id="ida"),
+                    HumanMessage("m2", id="id2"), HumanMessage("m3", id="id3")]
+        self.log.backfill_from_messages("t1", messages)
+        self.assertEqual(contents(self.log.get_profile_data("t1")), ["m1", "a1", "m2", "m3"])
+
+    def test_incremental_backfill_appends(self):
+        self.log.backfill_from_messages("t1", [HumanMessage("m1", id="id1")])
+        self.log.backfill_from_messages("t1", [AIMessage("a1", id="ida")], complete=False)
+        self.assertEqual(contents(self.log.get_profile_data("t1")), ["m1", "a1"])
+
+
+class EvictionWithRedisTest(ActivityLogTestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        super().setUp()
+
+    def test_evicted_thread_is_completed_from_redis(self):
+        self.record_then_evict()
+        self.assertEqual(contents(self.log.get_profile_data("t1")), ["m1", "m2", "m3"])
+
+        # Recording continues on the merged log without duplicating seen messages
+        self.log.record_message("t1", user("m3"), "id3")
+        self.log.record_message("t1", user("m4"), "id4")
+        self.assertEqual(contents(self.log.get_profile_data("t1")), ["m1", "m2", "m3", "m4"])
+
+    def test_full_backfill_rewrites_the_redis_mirror(self):
+        self.log.record_message("t1", user("m2"), "id2")
+        self.log.flush()
+        self.redis.delete("thread_conversation:t1")  # mirror expired; only the partial log is left
+        self.assertIsNone(self.log.get_profile_data("t1"))
+        self.log.backfill_from_messages("t1", [HumanMessage("m1", id="id1"), HumanMessage("m2", id="id2")])
+        self.log.flush()
+        self.assertEqual(len(self.redis.lrange("thread_conversation:t1", 0, -1)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Agent runtime: state reads must work with async-only checkpointers (scale-out Postgres saver)"""
+
+import sys
+import types
+import unittest
+from typing import Annotated, TypedDict
+from unittest import mock
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from convonet.agent_runtime import AgentRuntime
+
+
+class AsyncOnlySaver(InMemorySaver):
+    """Behaves like AsyncPostgresSaver: the synchronous checkpoint API is unavailable"""
+
+    def get_tuple(self, config):
+        raise NotImplementedError("synchronous checkpoint access")
+
+    def put(self, *args, **kwargs):
+        raise NotImplementedError("synchronous checkpoint access")
+
+    async def aget_tuple(self, config):
+        return InMemorySaver.get_tuple(self, config)
+
+    async def aput(self, *args, **kwargs):
+        return InMemorySaver.put(self, *args, **kwargs)
+
+
+class _State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def _build_graph():
+    builder = StateGraph(_State)
+    builder.add_node("echo", lambda state: {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")]})
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=AsyncOnlySaver())
+
+
+class AgentStateTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = _build_graph()
+
+        async def _get_agent_graph():
+            return self.graph
+
+        routes = types.ModuleType("convonet.routes")
+        routes._get_agent_graph = _get_agent_graph
+        patcher = mock.patch.dict(sys.modules, {"convonet.routes": routes})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runtime = AgentRuntime(name="test-agent-runtime")
+        self.addCleanup(self.runtime.shutdown)
+
+    def test_get_agent_state_uses_async_checkpointer_api(self):
+        config = {"configurable": {"thread_id": "user-1"}}
+        self.runtime.run(self.graph.ainvoke({"messages": [HumanMessage(content="hi")]}, config), timeout=5)
+
+        with self.assertRaises(NotImplementedError):
+            self.graph.get_state(config)
+        state = self.runtime.get_agent_state("user-1", timeout=5)
+        self.assertEqual([m.content for m in state.values["messages"]], ["hi", "echo: hi"])
+
+    def test_unknown_thread_has_empty_state(self):
+        state = self.runtime.get_agent_state("nobody", timeout=5)
+        self.assertFalse(state.values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Streaming STT: the Deepgram live provider against the local fake websocket server"""
+
+import os
+import threading
+import unittest
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from convonet import streaming_stt
+from convonet.audio_codec import AudioFormat
+from convonet.streaming_stt import DeepgramStreamingProvider, WebSocketStreamingTranscriber
+from tests.fake_stt_server import FakeStreamingSTTServer
+
+TRANSCRIPT = "create a todo to buy groceries"
+
+
+class StreamingSTTTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeStreamingSTTServer(transcript=TRANSCRIPT, bytes_per_word=1000, interim_every=2).start()
+        self.addCleanup(self.server.stop)
+        self.interims = []
+        self.finals = []
+        self.interim_seen = threading.Event()
+
+    def on_interim(self, text):
+        self.interims.append(text)
+        self.interim_seen.set()
+
+    def stream(self, transcriber, chunks=12, chunk_size=800):
+        for _ in range(chunks):
+            self.assertTrue(transcriber.send(b"\x00" * chunk_size))
+        self.assertTrue(self.interim_seen.wait(5), "no interim transcript before finish()")
+        return transcriber.finish(timeout=5.0)
+
+
+class WebSocketStreamingTranscriberTest(StreamingSTTTestCase):
+    def test_interim_then_final_transcript(self):
+        transcriber = WebSocketStreamingTranscriber(self.server.url, on_interim=self.on_interim,
+                                                    on_final=self.finals.append)
+        self.assertEqual(self.stream(transcriber), TRANSCRIPT)
+        self.assertEqual(self.finals, [TRANSCRIPT])
+        self.assertTrue(all(TRANSCRIPT.startswith(text) for text in self.interims), self.interims)
+        self.assertEqual(self.server.bytes_received, transcriber.bytes_sent)
+        self.assertFalse(transcriber.send(b"\x00"))  # closed after finish()
+
+
+class DeepgramStreamingProviderTest(StreamingSTTTestCase):
+    def test_provider_streams_to_configured_url(self):
+        with mock.patch.dict(os.environ, {'DEEPGRAM_STREAMING_URL': self.server.url}):
+            provider = DeepgramStreamingProvider(api_key="test")
+        transcriber = provider.open(on_interim=self.on_interim, on_final=self.finals.append, language="en")
+        self.assertEqual(self.stream(transcriber), TRANSCRIPT)
+        self.assertEqual(self.finals, [TRANSCRIPT])
+        self.assertEqual(self.server.connections, 1)
+
+        query = parse_qs(urlparse(self.server.request_paths[0]).query)
+        self.assertEqual(query["interim_results"], ["true"])
+        self.assertNotIn("encoding", query)  # containerized audio is auto-detected
+
+    def test_raw_audio_format_is_declared(self):
+        provider = DeepgramStreamingProvider(api_key="test", url=self.server.url)
+        transcriber = provider.open(on_interim=self.on_interim, audio_format=AudioFormat(sample_rate=8000))
+        self.assertEqual(self.stream(transcriber), TRANSCRIPT)
+
+        query = parse_qs(urlparse(self.server.request_paths[0]).query)
+        self.assertEqual((query["encoding"], query["sample_rate"]), (["linear16"], ["8000"]))
+
+    def test_open_streaming_transcriber_is_opt_in(self):
+        with mock.patch.dict(os.environ, {'ENABLE_STREAMING_STT': 'false'}):
+            self.assertIsNone(streaming_stt.open_streaming_transcriber())
+        self.assertEqual(self.server.connections, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+"""STT router: failover, hedging, circuit breakers (including half-open recovery) and the transcription cache"""
+
+import os
+import time
+import unittest
+from unittest import mock
+
+from convonet import transcription_cache
+from convonet.stt_providers import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, STTBusy, STTProvider, STTRequest, STTRouter,
+)
+
+
+class FakeProvider(STTProvider):
+    """Scripted provider: answer is a transcript, None, an exception, or a callable"""
+
+    def __init__(self, name, answer="hello", delay=0.0, final_on_empty=True):
+        self.name = name
+        self.answer = answer
+        self.delay = delay
+        self.final_on_empty = final_on_empty
+        self.calls = 0
+
+    def transcribe(self, request):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        answer = self.answer() if callable(self.answer) else self.answer
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class RouterTestCase(unittest.TestCase):
+    env = {}
+
+    def setUp(self):
+        env = {'TRANSCRIPTION_CACHE': 'false', 'STT_HEDGING': 'true', 'STT_HEDGE_DELAY_MS': '2000',
+               'STT_HEDGE_MIN_SAMPLES': '1000000', 'STT_TIMEOUT_SECONDS': '5',
+               'STT_BREAKER_FAILURES': '5', 'STT_BREAKER_COOLDOWN_SECONDS': '30', **self.env}
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def router(self, *providers):
+        router = STTRouter(list(providers), max_workers=4)
+        self.addCleanup(router._executor.shutdown, wait=True)
+        return router
+
+
+class FailoverTest(RouterTestCase):
+    def test_first_provider_answers_alone(self):
+        primary, backup = FakeProvider("a", "hi"), FakeProvider("b", "backup")
+        result = self.router(primary, backup).transcribe(STTRequest(b"audio"))
+        self.assertEqual((result.text, result.provider, result.hedged), ("hi", "a", False))
+        self.assertEqual(backup.calls, 0)
+
+    def test_error_fails_over_to_next_provider(self):
+        primary, backup = FakeProvider("a", RuntimeError("down")), FakeProvider("b", "backup")
+        router = self.router(primary, backup)
+        result = router.transcribe(STTRequest(b"audio"))
+        self.assertEqual((result.text, result.provider), ("backup", "b"))
+        self.assertEqual(router.stats["a"]["failures"], 1)
+
+    def test_all_failing_returns_none(self):
+        router = self.router(FakeProvider("a", RuntimeError("down")), FakeProvider("b", RuntimeError("down")))
+        self.assertIsNone(router.transcribe(STTRequest(b"audio")))
+
+    def test_no_speech_from_final_provider_ends_request(self):
+        primary, backup = FakeProvider("a", None), FakeProvider("b", "backup")
+        result = self.router(primary, backup).transcribe(STTRequest(b"audio"))
+        self.assertIsNone(result.text)
+        self.assertEqual(result.provider, "a")
+        self.assertEqual(backup.calls, 0)
+
+    def test_no_speech_from_non_final_provider_falls_through(self):
+        stream, batch = FakeProvider("stream", None, final_on_empty=False), FakeProvider("b", "batch")
+        result = self.router(stream, batch).transcribe(STTRequest(b"audio"))
+        self.assertEqual((result.text, result.provider), ("batch", "b"))
+
+
+class HedgingTest(RouterTestCase):
+    env = {'STT_HEDGE_DELAY_MS': '20'}
+
+    def test_slow_primary_is_hedged_and_backup_wins(self):
+        primary, backup = FakeProvider("a", "slow", delay=0.5), FakeProvider("b", "fast")
+        router = self.router(primary, backup)
+        result = router.transcribe(STTRequest(b"audio"))
+        self.assertEqual((result.text, result.provider, result.hedged), ("fast", "b", True))
+        self.assertEqual(router.stats["b"]["hedges_fired"], 1)
+        self.assertEqual(router.stats["b"]["hedges_won"], 1)
+
+    def test_no_hedge_when_disabled(self):
+        with mock.patch.dict(os.environ, {'STT_HEDGING': 'false'}):
+            primary, backup = FakeProvider("a", "slow", delay=0.1), FakeProvider("b", "fast")
+            result = self.router(primary, backup).transcribe(STTRequest(b"audio"))
+        self.assertEqual(result.provider, "a")
+        self.assertEqual(backup.calls, 0)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=30)
+        self.assertFalse(breaker.record_failure())
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.available())
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_admits_a_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.available())
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.available())
+        self.assertFalse(breaker.allow())
+
+    def test_released_probe_can_be_claimed_again(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertTrue(breaker.allow())
+
+    def test_probe_success_closes_and_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        breaker.allow()
+        self.assertTrue(breaker.record_failure())
+        self.assertEqual(breaker.state, OPEN)
+
+
+class RouterBreakerTest(RouterTestCase):
+    env = {'STT_BREAKER_FAILURES': '1', 'STT_BREAKER_COOLDOWN_SECONDS': '0.05'}
+
+    def test_open_breaker_skips_provider(self):
+        with mock.patch.dict(os.environ, {'STT_BREAKER_COOLDOWN_SECONDS': '30'}):
+            primary, backup = FakeProvider("a", RuntimeError("down")), FakeProvider("b", "backup")
+            router = self.router(primary, backup)
+        router.transcribe(STTRequest(b"audio"))
+        result = router.transcribe(STTRequest(b"audio"))
+        self.assertEqual(result.provider, "b")
+        self.assertEqual(primary.calls, 1)
+        self.assertEqual(router.breakers["a"].state, OPEN)
+        self.assertEqual(router.stats["a"]["skipped_open"], 1)
+
+    def test_backup_probe_is_not_claimed_when_primary_answers(self):
+        state = {"down": True}
+        primary = FakeProvider("a", lambda: RuntimeError("down") if state["down"] else "primary")
+        backup = FakeProvider("b", lambda: RuntimeError("down") if state["down"] else "backup")
+        router = self.router(primary, backup)
+        self.assertIsNone(router.transcribe(STTRequest(b"audio")))  # opens both breakers
+
+        time.sleep(0.1)
+        state["down"] = False
+        self.assertEqual(router.transcribe(STTRequest(b"audio")).provider, "a")
+        self.assertEqual(backup.calls, 1)
+        self.assertFalse(router.breakers["b"]._probing)
+
+        # Primary goes down again: the recovered backup must still get its probe
+        primary.answer = RuntimeError("down again")
+        time.sleep(0.1)
+        result = router.transcribe(STTRequest(b"audio"))
+        self.assertEqual(result.provider, "b")
+        self.assertEqual(backup.calls, 2)
+        self.assertEqual(router.breakers["b"].state, CLOSED)
+
+    def test_busy_provider_fails_over_without_tripping_or_leaking_probe(self):
+        busy = FakeProvider("local", STTBusy("at capacity"))
+        backup = FakeProvider("b", "backup")
+        router = self.router(busy, backup)
+        result = router.transcribe(STTRequest(b"audio"))
+        self.assertEqual(result.provider, "b")
+        self.assertEqual(router.stats["local"]["busy"], 1)
+        self.assertEqual(router.breakers["local"].state, CLOSED)
+
+        # A busy answer to a half-open probe gives the probe back
+        router.breakers["local"].record_failure()
+        time.sleep(0.1)
+        router.transcribe(STTRequest(b"audio"))
+        self.assertEqual(router.breakers["local"].state, HALF_OPEN)
+        self.assertTrue(router.breakers["local"].available())
+
+
+class TranscriptionCacheTest(RouterTestCase):
+    env = {'TRANSCRIPTION_CACHE': 'true'}
+
+    def setUp(self):
+        super().setUp()
+        cache = transcription_cache.TranscriptionCache(max_entries=8)
+        for patcher in (mock.patch('convonet.stt_providers.get_transcription_cache', return_value=cache),
+                        mock.patch.object(transcription_cache, 'REDIS_AVAILABLE', False)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cache = cache
+
+    def test_repeated_audio_is_served_from_cache(self):
+        provider = FakeProvider("a", "hello")
+        router = self.router(provider)
+        first = router.transcribe(STTRequest(b"same audio"))
+        second = router.transcribe(STTRequest(b"same audio"))
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual((second.text, second.provider), ("hello", "a"))
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(self.cache.get_stats()["memory_hits"], 1)
+
+    def test_language_is_part_of_the_key(self):
+        provider = FakeProvider("a", "hello")
+        router = self.router(provider)
+        router.transcribe(STTRequest(b"same audio", language="en"))
+        self.assertFalse(router.transcribe(STTRequest(b"same audio", language="de")).cached)
+        self.assertEqual(provider.calls, 2)
+
+    def test_failures_are_not_cached(self):
+        state = {"down": True}
+        provider = FakeProvider("a", lambda: RuntimeError("down") if state["down"] else "hello")
+        router = self.router(provider)
+        self.assertIsNone(router.transcribe(STTRequest(b"audio")))
+        state["down"] = False
+        self.assertEqual(router.transcribe(STTRequest(b"audio")).text, "hello")
+
+    def test_cache_hit_closes_unused_live_stream(self):
+        router = self.router(FakeProvider("a", "hello"))
+        router.transcribe(STTRequest(b"audio"))
+        stream = mock.Mock()
+        router.transcribe(STTRequest(b"audio", streaming_transcriber=stream))
+        stream.close.assert_called_once()
+        stream.finish.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Turn scheduler: admission control and round-robin fairness across users"""
+
+import threading
+import unittest
+
+from convonet.turn_scheduler import ADMITTED, QUEUED, REJECTED, TurnScheduler
+
+
+class TurnSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.order = []
+        self.done = threading.Semaphore(0)
+
+    def blocking_turn(self, name):
+        self.order.append(name)
+        self.release.wait(5)
+        self.done.release()
+
+    def turn(self, name):
+        self.order.append(name)
+        self.done.release()
+
+    def wait_for(self, count):
+        for _ in range(count):
+            self.assertTrue(self.done.acquire(timeout=5), "turn did not finish")
+
+    def test_rejects_when_user_or_queue_limit_is_reached(self):
+        scheduler = TurnScheduler(max_concurrent=1, max_queue_depth=2, max_queued_per_user=1)
+        self.assertEqual(scheduler.submit("u1", self.blocking_turn, "running"), ADMITTED)
+        self.assertEqual(scheduler.submit("u1", self.turn, "u1-1"), QUEUED)
+        self.assertEqual(scheduler.submit("u1", self.turn, "u1-2"), REJECTED)  # per-user limit
+        self.assertEqual(scheduler.submit("u2", self.turn, "u2-1"), QUEUED)
+        self.assertEqual(scheduler.submit("u3", self.turn, "u3-1"), REJECTED)  # queue full
+
+        stats = scheduler.get_stats()
+        self.assertEqual((stats["admitted"], stats["queued"], stats["rejected"]), (1, 2, 2))
+        self.assertEqual(stats["waiting"], 2)
+
+        self.release.set()
+        self.wait_for(3)
+        self.assertEqual(self.order, ["running", "u1-1", "u2-1"])
+
+    def test_waiting_turns_are_served_round_robin(self):
+        scheduler = TurnScheduler(max_concurrent=1, max_queue_depth=10, max_queued_per_user=5)
+        scheduler.submit("a", self.blocking_turn, "a0")
+        for name in ("a1", "a2", "a3"):
+            self.assertEqual(scheduler.submit("a", self.turn, name), QUEUED)
+        scheduler.submit("b", self.turn, "b1")
+        scheduler.submit("c", self.turn, "c1")
+
+        self.release.set()
+        self.wait_for(6)
+        # One chatty caller does not hold up the others
+        self.assertEqual(self.order, ["a0", "a1", "b1", "c1", "a2", "a3"])
+
+    def test_failing_turn_does_not_stop_the_worker(self):
+        scheduler = TurnScheduler(max_concurrent=1)
+
+        def failing():
+            self.done.release()
+            raise RuntimeError("boom")
+
+        scheduler.submit("u1", failing)
+        self.wait_for(1)
+        scheduler.submit("u1", self.turn, "after")
+        self.wait_for(1)
+        self.assertEqual(self.order, ["after"])
+        self.assertEqual(scheduler.get_stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Boot warm-up: readiness gating and retry of failed required steps"""
+
+import threading
+import time
+import unittest
+
+from convonet.warmup import FAILED, READY, SKIPPED, Warmup, WarmupSkipped
+
+
+class FlakyStep:
+    """Fails the first `failures` calls, then succeeds"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("database not accepting connections")
+        return "connected"
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class WarmupTest(unittest.TestCase):
+    def test_failed_required_step_is_retried_until_ready(self):
+        warmup = Warmup(retry_seconds=0.01, retry_max_seconds=0.05)
+        flaky = FlakyStep(failures=3)
+        step = warmup.register("database", flaky)
+        warmup.start()
+
+        self.assertTrue(wait_until(lambda: step.state == FAILED or step.state == READY))
+        self.assertTrue(wait_until(warmup.is_ready), warmup.status())
+        self.assertEqual(step.state, READY)
+        self.assertEqual((flaky.calls, step.attempts), (4, 4))
+        self.assertIsNone(step.retry_in_s)
+        self.assertEqual(warmup.status()["dependencies"]["database"]["detail"], "connected")
+
+    def test_not_ready_while_required_step_keeps_failing(self):
+        warmup = Warmup(retry_seconds=0.01, retry_max_seconds=0.01)
+        flaky = FlakyStep(failures=10 ** 6)
+        step = warmup.register("agent_graph", flaky)
+        warmup.start()
+
+        self.assertTrue(wait_until(lambda: step.attempts >= 3))
+        self.assertFalse(warmup.is_ready())
+        self.assertEqual(warmup.status()["dependencies"]["agent_graph"]["state"], FAILED)
+
+        flaky.failures = 0  # dependency comes back
+        self.assertTrue(wait_until(warmup.is_ready))
+
+    def test_optional_failure_and_skipped_step_do_not_gate_readiness(self):
+        warmup = Warmup(retry_seconds=0.01)
+        optional = FlakyStep(failures=10 ** 6)
+        warmup.register("http_pools", optional, required=False)
+
+        def not_configured():
+            raise WarmupSkipped("DB_URI not set")
+
+        skipped = warmup.register("database", not_configured)
+        warmup.start()
+
+        self.assertTrue(wait_until(warmup.is_ready))
+        self.assertTrue(wait_until(lambda: optional.calls == 1))
+        self.assertEqual(skipped.state, SKIPPED)
+        time.sleep(0.05)
+        self.assertEqual(optional.calls, 1)  # optional steps are not retried
+
+
+if __name__ == "__main__":
+    unittest.main()